@@ -1,64 +1,135 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Optional, List, Any
 from datetime import datetime
 import swisseph as swe
+import json
 import logging
+import os
 
 from .charts import calculate_d1_chart
+from .batch import calculate_d1_charts_batch_columns
+from .dasha import query_active_dasha, query_dasha_periods
+from .lagna import query_lagna_boundaries
+from .panchanga import query_panchanga, query_panchanga_year
+from .rectify import query_rectification
+from .shadbala import query_shadbala
+from .transits import query_next_transit, query_transits
+from .vargas import calculate_vargas, parse_vargas
+from .cache import get_chart_cache
+from .metrics import get_metrics
+from .pipeline import get_chart, get_pipeline, get_report, get_report_chart_data, stream_report
+from .report_cache import get_report_cache
 from .models import (
     ChartRequest,
     ChartResponse,
+    BatchChartRequest,
+    BatchChartResponse,
+    DashaPeriodsRequest,
+    DashaPeriodsResponse,
+    DashaActiveRequest,
+    DashaActiveResponse,
+    TransitRequest,
+    TransitResponse,
+    TransitNextResponse,
+    LagnaBoundariesResponse,
+    PanchangaResponse,
+    RectificationRequest,
+    RectificationResponse,
+    ShadbalaRequest,
+    ShadbalaResponse,
+    MatchRequest,
+    MatchResponse,
     ChartHouse,
     NakshatraInfo,
     DashaInfo,
     DashaPeriod,
     PlanetStrength
 )
-from .llm_query import generate_astrology_report
 from .utils import get_coordinates_from_location
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+EPHEMERIS_CALLS_HEADER = "X-Ephemeris-Calls"
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100000"))
+
 @router.post("/charts", response_model=ChartResponse)
 async def generate_chart(request: ChartRequest):
     try:
+        if request.vargas:
+            parse_vargas(request.vargas)
+
         # Convert location to coordinates
-        latitude, longitude = get_coordinates_from_location(request.location)
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
         
         # Calculate chart
-        chart_data = calculate_d1_chart(
-            name=request.name,
+        chart, ephemeris_calls = await get_chart(
             dob=request.dob,
             tob=request.tob,
             latitude=latitude,
             longitude=longitude
         )
-        return chart_data
+        logger.info(f"Chart for {request.name} used {ephemeris_calls} ephemeris calls")
+
+        # Divisional charts come from the D1 longitudes, with no ephemeris calls
+        vargas = calculate_vargas(chart.longitude_map(), request.vargas) if request.vargas else None
+
+        # The Chart is expanded straight into the ChartResponse JSON shape
+        return JSONResponse(
+            chart.to_response(request.name, vargas),
+            headers={EPHEMERIS_CALLS_HEADER: str(ephemeris_calls)}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating chart: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/charts/batch", response_model=BatchChartResponse)
+async def generate_charts_batch(request: BatchChartRequest, response: Response):
+    if len(request.dob) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size exceeds the limit of {MAX_BATCH_SIZE} records")
+    try:
+        columns, ephemeris_calls = await get_pipeline().run_chart_task(
+            calculate_d1_charts_batch_columns,
+            dobs=request.dob,
+            tobs=request.tob,
+            latitudes=request.latitude,
+            longitudes=request.longitude
+        )
+        response.headers[EPHEMERIS_CALLS_HEADER] = str(ephemeris_calls)
+        return columns
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generating chart batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.post("/generate-report")
-async def generate_report(request: ChartRequest):
+async def generate_report(request: ChartRequest, response: Response):
     try:
         # Convert location to coordinates
-        latitude, longitude = get_coordinates_from_location(request.location)
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
         
         # Calculate chart
-        chart_data = calculate_d1_chart(
-            name=request.name,
+        chart, ephemeris_calls = await get_chart(
             dob=request.dob,
             tob=request.tob,
             latitude=latitude,
             longitude=longitude
         )
+        chart_data, shadbala_calls = await get_report_chart_data(chart, request.name, latitude, longitude)
+        response.headers[EPHEMERIS_CALLS_HEADER] = str(ephemeris_calls + shadbala_calls)
         
         # Generate report
-        report = generate_astrology_report(chart_data)
+        report = await get_report(chart_data)
         return report
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -66,6 +137,325 @@ async def generate_report(request: ChartRequest):
         logger.error(f"Error generating report: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/dasha/periods", response_model=DashaPeriodsResponse)
+async def get_dasha_periods(request: DashaPeriodsRequest):
+    """
+    Vimshottari periods at one level (maha to prana) overlapping a date
+    window, one page at a time. Pass next_cursor back as cursor for the next page.
+    """
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_dasha_periods,
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude,
+            level=request.level,
+            start=request.start,
+            end=request.end,
+            cursor=request.cursor,
+            limit=request.limit
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculating dasha periods: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/dasha/active", response_model=DashaActiveResponse)
+async def get_active_dasha(request: DashaActiveRequest):
+    """
+    The maha/antar/pratyantar/sookshma/prana periods running at a date.
+    """
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_active_dasha,
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude,
+            at=request.at,
+            depth=request.depth
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculating active dasha: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/transits", response_model=TransitResponse)
+async def get_transits(request: TransitRequest):
+    """
+    Sign ingresses, nakshatra changes and retrograde stations in a date
+    window, plus transits over the natal planets and ascendant when birth
+    data is given.
+    """
+    try:
+        latitude = longitude = None
+        if request.location:
+            latitude, longitude = await get_pipeline().run_io(
+                'geocode', get_coordinates_from_location, request.location
+            )
+        result, _ = await get_pipeline().run_chart_task(
+            query_transits,
+            start=request.start,
+            end=request.end,
+            bodies=request.bodies,
+            event_types=request.events,
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude,
+            limit=request.limit
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error finding transits: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/transits/next", response_model=TransitNextResponse)
+async def get_next_transit(body: str, event: str = "sign_ingress", after: Optional[str] = None):
+    """
+    The next event of one type (default sign_ingress) for one body after a
+    date (default now).
+    """
+    try:
+        result, _ = await get_pipeline().run_chart_task(
+            query_next_transit,
+            body=body,
+            event_type=event,
+            after=after
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error finding next transit: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/lagna/boundaries", response_model=LagnaBoundariesResponse)
+async def get_lagna_boundaries(date: str, location: str):
+    """
+    The exact times (UTC) at which the sidereal ascendant enters each sign
+    during one local calendar day at a place.
+    """
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_lagna_boundaries,
+            date=date,
+            latitude=latitude,
+            longitude=longitude
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error finding lagna boundaries: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/panchanga", response_model=PanchangaResponse)
+async def get_panchanga(date: str, location: str, days: int = 1):
+    """
+    Vara, tithi, nakshatra, yoga and karana with their end times, and
+    sunrise and sunset, for one or more local days (sunrise to sunrise)
+    starting at date.
+    """
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_panchanga,
+            date=date,
+            latitude=latitude,
+            longitude=longitude,
+            days=days
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing panchanga: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/panchanga/year", response_model=PanchangaResponse)
+async def get_panchanga_year(year: int, location: str):
+    """
+    The panchanga of every day of a calendar year at a place, in one call.
+    """
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_panchanga_year,
+            year=year,
+            latitude=latitude,
+            longitude=longitude
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing panchanga: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/charts/rectify", response_model=RectificationResponse)
+async def rectify_birth_time(request: RectificationRequest):
+    """
+    The distinct chart segments (lagna sign, Moon nakshatra and pada, D9
+    lagna) for birth times within window_minutes either side of tob. Each
+    segment's dob and tob can be submitted to /charts as they are.
+    """
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_rectification,
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude,
+            window_minutes=request.window_minutes
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rectifying birth time: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/shadbala", response_model=ShadbalaResponse)
+async def get_shadbala(request: ShadbalaRequest):
+    """The six Shadbala components of the seven classical planets, in virupas."""
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_shadbala,
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing shadbala: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/match", response_model=MatchResponse)
+async def find_matches(request: MatchRequest):
+    """
+    Best Ashtakoota (Guna Milan) matches for one profile among every
+    candidate in the candidate store.
+    """
+    # Imported here: the koota tables are built when the module is loaded
+    from .matchmaking import CandidateStoreUnavailableError, candidate_store_configured, query_matches
+
+    if not candidate_store_configured():
+        raise HTTPException(status_code=503, detail="No candidate store; set MATCH_CANDIDATE_STORE_PATH")
+    try:
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
+        result, _ = await get_pipeline().run_chart_task(
+            query_matches,
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude,
+            role=request.role,
+            top_k=request.top_k,
+            min_score=request.min_score
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CandidateStoreUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error finding matches: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@router.post("/generate-report/stream")
+async def generate_report_stream(request: ChartRequest, http_request: Request):
+    """
+    Stream a report as Server-Sent Events: a "chart" event with the computed
+    chart, "token" events with report text as Gemini produces it, then a
+    "report" event with the assembled report (same shape as /generate-report),
+    or an "error" event. Generation stops when the client disconnects.
+    """
+    try:
+        # Convert location to coordinates
+        latitude, longitude = await get_pipeline().run_io(
+            'geocode', get_coordinates_from_location, request.location
+        )
+        
+        # Calculate chart
+        chart, ephemeris_calls = await get_chart(
+            dob=request.dob,
+            tob=request.tob,
+            latitude=latitude,
+            longitude=longitude
+        )
+        chart_data, shadbala_calls = await get_report_chart_data(chart, request.name, latitude, longitude)
+        ephemeris_calls += shadbala_calls
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generating chart for report stream: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def events():
+        yield _sse_event("chart", chart_data)
+        parts = []
+        report = stream_report(chart_data)
+        try:
+            async for text in report:
+                if await http_request.is_disconnected():
+                    logger.info(f"Client disconnected, stopped report for {request.name}")
+                    return
+                parts.append(text)
+                yield _sse_event("token", {"text": text})
+        except Exception as e:
+            logger.error(f"Error streaming report: {str(e)}")
+            yield _sse_event("error", {"detail": "Internal server error"})
+            return
+        finally:
+            await report.aclose()
+        yield _sse_event("report", {"overall_analysis": "".join(parts), "chart_data": chart_data})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            EPHEMERIS_CALLS_HEADER: str(ephemeris_calls),
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.get("/health")
 async def health_check():
     """
@@ -73,16 +463,46 @@ async def health_check():
     """
     return {"status": "healthy", "version": "1.0.0"}
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss/eviction counters for the chart and report caches.
+    """
+    return {"chart": get_chart_cache().stats(), "report": get_report_cache().stats()}
+
+def _cache_metrics() -> List[str]:
+    """The /cache/stats counters as Prometheus gauges."""
+    lines = ["# TYPE vedic_cache gauge"]
+    for cache, stats in (("chart", get_chart_cache().stats()), ("report", get_report_cache().stats())):
+        for tier, values in stats.items():
+            if not isinstance(values, dict):
+                values, tier = {tier: values}, "all"
+            for field, value in values.items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'vedic_cache{{cache="{cache}",tier="{tier}",field="{field}"}} {value}')
+    return lines
+
+get_metrics().add_collector(_cache_metrics)
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Per-stage latency histograms and cache counters in the Prometheus text format.
+    """
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
 @router.post("/d1", response_model=ChartResponse)
-async def get_d1_chart(request: ChartRequest):
+async def get_d1_chart(request: ChartRequest, response: Response):
     try:
-        result = calculate_d1_chart(
+        result, ephemeris_calls = await get_pipeline().run_chart_task(
+            calculate_d1_chart,
             name=request.name,
             dob=request.dob,
             tob=request.tob,
             latitude=request.latitude,
             longitude=request.longitude
         )
+        response.headers[EPHEMERIS_CALLS_HEADER] = str(ephemeris_calls)
         
         if not result:
             raise HTTPException(status_code=400, detail="Failed to calculate chart data")
@@ -0,0 +1,292 @@
+"""
+Ashtakavarga: the Bhinnashtakavarga (BAV) of the seven classical planets
+and their sum, the Sarvashtakavarga (SAV), from whole-sign positions.
+
+Each of the eight contributors (the seven planets and the lagna) gives a
+planet a benefic point (bindu) in fixed houses counted from itself. Those
+houses are a 12-bit mask per (planet, contributor), bit h - 1 for house h;
+rotating the mask left by the contributor's sign index turns houses into
+signs (bit 0 = Aries). A planet's BAV in a sign is the number of its eight
+rotated masks with that sign's bit set. The eight masks are summed bitwise
+with a carry-save adder into four bit planes (1s, 2s, 4s, 8s), so every
+sign is counted at once with integer AND/XOR.
+
+The masks a contributor gives all seven planets are pre-rotated for each
+of the twelve signs and packed side by side: into one 84-bit integer for
+a single chart, into 16-bit lanes of two uint64 words for the NumPy batch.
+A chart is then eight table lookups and eight carry-save additions. The
+planes are unpacked to twelve counts only at the end, by spreading each
+plane to a byte per sign (one chart; the counts come out of one
+to_bytes()) or a nibble per sign (batch).
+
+The BAV totals are fixed whatever the positions (Sun 48, Moon 49, Mars 39,
+Mercury 54, Jupiter 56, Venus 52, Saturn 39), so every SAV sums to 337.
+
+    ashtakavarga(signs)           one chart, sign indices in CONTRIBUTORS order
+    ashtakavarga_batch(signs)     (charts, 8) sign indices, as NumPy arrays
+    batch_ashtakavarga(batch)     a calculate_d1_charts_batch result
+
+    python -m astrology.ashtakavarga verify --charts 100000
+    python -m astrology.ashtakavarga bench --charts 1000000
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ASHTAKAVARGA_PLANETS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']
+CONTRIBUTORS = ASHTAKAVARGA_PLANETS + ['Ascendant']
+
+# Houses, counted from each contributor, in which it gives the planet a bindu
+BENEFIC_HOUSES = {
+    'Sun': {
+        'Sun': (1, 2, 4, 7, 8, 9, 10, 11), 'Moon': (3, 6, 10, 11), 'Mars': (1, 2, 4, 7, 8, 9, 10, 11),
+        'Mercury': (3, 5, 6, 9, 10, 11, 12), 'Jupiter': (5, 6, 9, 11), 'Venus': (6, 7, 12),
+        'Saturn': (1, 2, 4, 7, 8, 9, 10, 11), 'Ascendant': (3, 4, 6, 10, 11, 12),
+    },
+    'Moon': {
+        'Sun': (3, 6, 7, 8, 10, 11), 'Moon': (1, 3, 6, 7, 10, 11), 'Mars': (2, 3, 5, 6, 9, 10, 11),
+        'Mercury': (1, 3, 4, 5, 7, 8, 10, 11), 'Jupiter': (1, 4, 7, 8, 10, 11, 12),
+        'Venus': (3, 4, 5, 7, 9, 10, 11), 'Saturn': (3, 5, 6, 11), 'Ascendant': (3, 6, 10, 11),
+    },
+    'Mars': {
+        'Sun': (3, 5, 6, 10, 11), 'Moon': (3, 6, 11), 'Mars': (1, 2, 4, 7, 8, 10, 11),
+        'Mercury': (3, 5, 6, 11), 'Jupiter': (6, 10, 11, 12), 'Venus': (6, 8, 11, 12),
+        'Saturn': (1, 4, 7, 8, 9, 10, 11), 'Ascendant': (1, 3, 6, 10, 11),
+    },
+    'Mercury': {
+        'Sun': (5, 6, 9, 11, 12), 'Moon': (2, 4, 6, 8, 10, 11), 'Mars': (1, 2, 4, 7, 8, 9, 10, 11),
+        'Mercury': (1, 3, 5, 6, 9, 10, 11, 12), 'Jupiter': (6, 8, 11, 12),
+        'Venus': (1, 2, 3, 4, 5, 8, 9, 11), 'Saturn': (1, 2, 4, 7, 8, 9, 10, 11),
+        'Ascendant': (1, 2, 4, 6, 8, 10, 11),
+    },
+    'Jupiter': {
+        'Sun': (1, 2, 3, 4, 7, 8, 9, 10, 11), 'Moon': (2, 5, 7, 9, 11), 'Mars': (1, 2, 4, 7, 8, 10, 11),
+        'Mercury': (1, 2, 4, 5, 6, 9, 10, 11), 'Jupiter': (1, 2, 3, 4, 7, 8, 10, 11),
+        'Venus': (2, 5, 6, 9, 10, 11), 'Saturn': (3, 5, 6, 12), 'Ascendant': (1, 2, 4, 5, 6, 7, 9, 10, 11),
+    },
+    'Venus': {
+        'Sun': (8, 11, 12), 'Moon': (1, 2, 3, 4, 5, 8, 9, 11, 12), 'Mars': (3, 5, 6, 9, 11, 12),
+        'Mercury': (3, 5, 6, 9, 11), 'Jupiter': (5, 8, 9, 10, 11), 'Venus': (1, 2, 3, 4, 5, 8, 9, 10, 11),
+        'Saturn': (3, 4, 5, 8, 9, 10, 11), 'Ascendant': (1, 2, 3, 4, 5, 8, 9, 11),
+    },
+    'Saturn': {
+        'Sun': (1, 2, 4, 7, 8, 10, 11), 'Moon': (3, 6, 11), 'Mars': (3, 5, 6, 10, 11, 12),
+        'Mercury': (6, 8, 9, 10, 11, 12), 'Jupiter': (5, 6, 11, 12), 'Venus': (6, 11, 12),
+        'Saturn': (3, 5, 6, 11), 'Ascendant': (1, 3, 4, 6, 10, 11),
+    },
+}
+
+BAV_TOTALS = {planet: sum(len(houses) for houses in table.values()) for planet, table in BENEFIC_HOUSES.items()}
+SAV_TOTAL = sum(BAV_TOTALS.values())
+
+_FULL = 0xFFF
+
+# BENEFIC_MASKS[p][c]: houses from contributor c that give planet p a bindu, bit h - 1 for house h
+BENEFIC_MASKS: List[List[int]] = [
+    [sum(1 << (house - 1) for house in BENEFIC_HOUSES[planet][contributor]) for contributor in CONTRIBUTORS]
+    for planet in ASHTAKAVARGA_PLANETS
+]
+
+# Every 12-bit value with bit i moved to bit 8i: one byte per sign, for unpacking bit planes
+_SPREAD: List[int] = [sum((value >> sign & 1) << (8 * sign) for sign in range(12)) for value in range(1 << 12)]
+# Every 12-bit value with bit i moved to bit 4i: one nibble per sign, for the batch
+_SPREAD_NIBBLES = np.array([sum((value >> sign & 1) << (4 * sign) for sign in range(12))
+                            for value in range(1 << 12)], dtype=np.uint64)
+
+
+def _rotate(mask, sign):
+    """Rotate a 12-bit mask left by sign places: houses from a contributor become signs."""
+    return ((mask << sign) | (mask >> (12 - sign))) & _FULL
+
+
+# _PACKED_MASKS[c][sign]: contributor c's masks for all seven planets, rotated to
+# sign and packed into one integer (planet p in bits 12p .. 12p + 11)
+_PACKED_MASKS: List[List[int]] = [
+    [sum(_rotate(BENEFIC_MASKS[p][c], sign) << (12 * p) for p in range(len(ASHTAKAVARGA_PLANETS)))
+     for sign in range(12)]
+    for c in range(len(CONTRIBUTORS))
+]
+
+# The same for NumPy: planet p in the 16-bit lane p % 4 of 64-bit word p // 4
+_LANE_WORDS = (len(ASHTAKAVARGA_PLANETS) + 3) // 4
+_PACKED_LANES = np.zeros((len(CONTRIBUTORS), 12, _LANE_WORDS), dtype=np.uint64)
+for _c in range(len(CONTRIBUTORS)):
+    for _sign in range(12):
+        for _p in range(len(ASHTAKAVARGA_PLANETS)):
+            _PACKED_LANES[_c, _sign, _p // 4] |= np.uint64(_rotate(BENEFIC_MASKS[_p][_c], _sign) << (16 * (_p % 4)))
+
+
+def _bit_planes(masks) -> Tuple[Any, Any, Any, Any]:
+    """
+    Per-bit counts of up to 15 masks as four bit planes (1s, 2s, 4s, 8s),
+    by carry-save addition. Works on Python ints and on NumPy integer arrays.
+    """
+    ones = twos = fours = eights = 0
+    for mask in masks:
+        carry = ones & mask
+        ones ^= mask
+        carry_twos = twos & carry
+        twos ^= carry
+        carry_fours = fours & carry_twos
+        fours ^= carry_twos
+        eights ^= carry_fours
+    return ones, twos, fours, eights
+
+
+def _contributor_signs(signs: Sequence[int]) -> List[int]:
+    if len(signs) != len(CONTRIBUTORS):
+        raise ValueError(f"Ashtakavarga needs {len(CONTRIBUTORS)} sign indices ({', '.join(CONTRIBUTORS)})")
+    signs = [int(sign) for sign in signs]
+    if any(not 0 <= sign < 12 for sign in signs):
+        raise ValueError("Sign indices must be between 0 (Aries) and 11 (Pisces)")
+    return signs
+
+
+def ashtakavarga(signs: Sequence[int]) -> Dict[str, Any]:
+    """
+    BAV and SAV of one chart from the sign indices (0 = Aries) of the
+    CONTRIBUTORS, as Chart holds them for calculate_d1_chart. Tables are
+    lists of twelve bindu counts, Aries first.
+    """
+    signs = _contributor_signs(signs)
+    ones, twos, fours, eights = _bit_planes([packed[sign] for packed, sign in zip(_PACKED_MASKS, signs)])
+    packed = sarva = 0
+    for p in range(len(ASHTAKAVARGA_PLANETS)):
+        shift = 12 * p
+        counts = (_SPREAD[ones >> shift & _FULL] + (_SPREAD[twos >> shift & _FULL] << 1)
+                  + (_SPREAD[fours >> shift & _FULL] << 2) + (_SPREAD[eights >> shift & _FULL] << 3))
+        packed |= counts << (96 * p)
+        sarva += counts
+    table = packed.to_bytes(12 * len(ASHTAKAVARGA_PLANETS), "little")
+    return {
+        "bhinnashtakavarga": {planet: list(table[12 * p:12 * p + 12]) for p, planet in enumerate(ASHTAKAVARGA_PLANETS)},
+        "sarvashtakavarga": list(sarva.to_bytes(12, "little"))
+    }
+
+
+def ashtakavarga_batch(signs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    BAV and SAV for many charts: signs is (charts, 8) in CONTRIBUTORS order.
+    Returns BAV as (charts, 7, 12) uint8 and SAV as (charts, 12) uint16.
+    """
+    signs = np.asarray(signs)
+    if signs.ndim != 2 or signs.shape[1] != len(CONTRIBUTORS):
+        raise ValueError(f"Ashtakavarga signs must have shape (charts, {len(CONTRIBUTORS)})")
+    if signs.size and (signs.min() < 0 or signs.max() > 11):
+        raise ValueError("Sign indices must be between 0 (Aries) and 11 (Pisces)")
+    count = len(signs)
+    planets = len(ASHTAKAVARGA_PLANETS)
+    columns = np.ascontiguousarray(signs.T, dtype=np.intp)
+    planes = _bit_planes(_PACKED_LANES[c][columns[c]] for c in range(len(CONTRIBUTORS)))  # (charts, words)
+
+    # 12-bit planes per planet (little-endian lanes) -> a nibble per sign holding the count
+    lanes = [plane.view(np.uint16)[:, :planets] for plane in planes]
+    counts = _SPREAD_NIBBLES[lanes[0]]
+    for weight, lane in enumerate(lanes[1:], start=1):
+        counts |= _SPREAD_NIBBLES[lane] << np.uint64(weight)
+    packed = counts.view(np.uint8).reshape(count, planets, 8)[:, :, :6]
+    bhinna = np.empty((count, planets, 12), dtype=np.uint8)
+    bhinna[:, :, 0::2] = packed & 0x0F
+    bhinna[:, :, 1::2] = packed >> 4
+
+    sarva = bhinna[:, 0].astype(np.uint16)
+    for p in range(1, planets):
+        sarva += bhinna[:, p]
+    return bhinna, sarva
+
+
+def batch_ashtakavarga(batch: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """ashtakavarga_batch for a calculate_d1_charts_batch result."""
+    columns = [batch["bodies"].index(planet) for planet in ASHTAKAVARGA_PLANETS]
+    signs = np.column_stack([batch["signs"][:, columns], batch["ascendant_sign"]])
+    return ashtakavarga_batch(signs)
+
+
+def transit_bindus(natal: Dict[str, Any], body: str, sign: int) -> Tuple[int, int]:
+    """(BAV bindus of body, SAV bindus) in a sign, from a natal ashtakavarga() result."""
+    return natal["bhinnashtakavarga"][body][sign], natal["sarvashtakavarga"][sign]
+
+
+# --- Verification and benchmarks ---
+
+def _random_signs(charts: int, seed: int = 42) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 12, size=(charts, len(CONTRIBUTORS)))
+
+
+def _direct(signs: Sequence[int]) -> np.ndarray:
+    """BAV by counting houses directly, without masks."""
+    table = np.zeros((len(ASHTAKAVARGA_PLANETS), 12), dtype=np.int64)
+    for p, planet in enumerate(ASHTAKAVARGA_PLANETS):
+        for contributor, sign in zip(CONTRIBUTORS, signs):
+            for house in BENEFIC_HOUSES[planet][contributor]:
+                table[p, (sign + house - 1) % 12] += 1
+    return table
+
+
+def _verify(charts: int) -> bool:
+    signs = _random_signs(charts)
+    bhinna, sarva = ashtakavarga_batch(signs)
+    ok = True
+    totals = bhinna.sum(axis=2)
+    expected = np.array([BAV_TOTALS[planet] for planet in ASHTAKAVARGA_PLANETS])
+    if not (totals == expected).all() or not (sarva.sum(axis=1) == SAV_TOTAL).all():
+        print("BAV or SAV totals differ from the fixed totals")
+        ok = False
+    checked = min(charts, 2000)
+    mismatches = 0
+    for n in range(checked):
+        single = ashtakavarga(signs[n])
+        direct = _direct(signs[n])
+        batch_table = bhinna[n].astype(np.int64)
+        batch_sarva = sarva[n].astype(np.int64)
+        single_table = np.array([single["bhinnashtakavarga"][planet] for planet in ASHTAKAVARGA_PLANETS])
+        if not ((direct == batch_table).all() and (direct == single_table).all()
+                and (direct.sum(axis=0) == single["sarvashtakavarga"]).all()
+                and (direct.sum(axis=0) == batch_sarva).all()):
+            mismatches += 1
+    print(f"BAV totals {dict(zip(ASHTAKAVARGA_PLANETS, expected.tolist()))}, SAV {SAV_TOTAL}")
+    print(f"{charts} charts: totals {'ok' if ok else 'WRONG'}; "
+          f"{checked} checked against direct counting, {mismatches} mismatches")
+    return ok and mismatches == 0
+
+
+def _bench(charts: int) -> None:
+    signs = _random_signs(charts)
+    single_count = min(charts, 20000)
+    rows = signs[:single_count].tolist()
+    start = time.perf_counter()
+    for row in rows:
+        ashtakavarga(row)
+    single = time.perf_counter() - start
+    print(f"one chart at a time: {single_count / single:12,.0f} charts/s ({single / single_count * 1e6:.2f} us per chart)")
+
+    ashtakavarga_batch(signs[:1000])
+    start = time.perf_counter()
+    ashtakavarga_batch(signs)
+    batch = time.perf_counter() - start
+    print(f"batch of {charts}: {charts / batch:12,.0f} charts/s ({batch / charts * 1e6:.3f} us per chart)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    verify = commands.add_parser("verify", help="fixed totals and agreement with direct counting")
+    verify.add_argument("--charts", type=int, default=100000)
+    bench = commands.add_parser("bench", help="charts per second, one at a time and batched")
+    bench.add_argument("--charts", type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.command == "verify":
+        sys.exit(0 if _verify(args.charts) else 1)
+    _bench(args.charts)
+
+
+if __name__ == "__main__":
+    main()
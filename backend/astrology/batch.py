@@ -0,0 +1,220 @@
+"""
+Vectorized D1 chart computation for large batches of birth records.
+
+calculate_d1_charts_batch does the date parsing, timezone offsets, Julian day
+conversion, sidereal offset, sign/house assignment, nakshatra/pada lookup and
+Vimshottari balance as NumPy array operations over the whole batch. The only
+per-record Python loop is the one around the swisseph calls; with
+EPHEMERIS_ENGINE=table the planet positions are interpolated for the whole
+batch at once as well. Ascendants come from the closed-form lagna engine
+for the whole batch.
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Sequence
+import numpy as np
+import logging
+
+from .charts import PLANET_NUMBERS, ZODIAC_SIGNS, NAKSHATRAS, DASHA_ORDER, DASHA_YEARS
+from .ephemeris import EPHEMERIS_ENGINE, calc_ut, get_ayanamsa_ut
+from .ephemeris_tables import get_ephemeris_table
+from .lagna import ascendants
+from .timezones import get_timezone_resolver
+
+logger = logging.getLogger(__name__)
+
+# Bodies in column order: everything in PLANET_NUMBERS followed by Ketu
+BATCH_BODIES = list(PLANET_NUMBERS) + ['Ketu']
+
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = 360.0 / 108
+UNIX_EPOCH_JD = 2440587.5
+SECONDS_PER_DAY = 86400.0
+
+_DASHA_YEARS_BY_INDEX = np.array([DASHA_YEARS[lord] for lord in DASHA_ORDER], dtype=np.float64)
+
+
+def _parse_local_seconds(dobs: Sequence[str], tobs: Sequence[str]) -> np.ndarray:
+    """Parse dob/tob strings into local wall-clock seconds since 1970-01-01."""
+    stamps = np.char.add(np.char.add(np.asarray(dobs, dtype=str), "T"), np.char.zfill(np.asarray(tobs, dtype=str), 5))
+    try:
+        local = stamps.astype("datetime64[s]")
+    except ValueError as e:
+        raise ValueError(f"Invalid date or time in batch: {str(e)}")
+    return local.astype(np.int64)
+
+
+def _utc_offsets(local_seconds: np.ndarray, timezone_str: str) -> np.ndarray:
+    """
+    UTC offsets in seconds for local wall-clock times in one timezone.
+
+    Uses pytz's transition tables directly so that a whole group of records
+    is localized with searchsorted instead of one localize() call each.
+    Times inside a DST gap or overlap resolve to one of the two candidate
+    offsets, which can differ from pytz's is_dst=False choice for that hour.
+    """
+    tz = get_timezone_resolver().zone(timezone_str)
+    transitions = getattr(tz, "_utc_transition_times", None)
+    if not transitions:
+        offset = tz.utcoffset(datetime(2000, 1, 1))
+        return np.full(local_seconds.shape, int(offset.total_seconds()), dtype=np.int64)
+
+    transition_seconds = np.array(transitions, dtype="datetime64[s]").astype(np.int64)
+    offsets = np.array(
+        [int(info[0].total_seconds()) for info in tz._transition_info], dtype=np.int64
+    )
+
+    # Fixed-point iteration: guess the offset, convert to UTC, look up the
+    # offset in force at that instant, repeat until stable.
+    index = np.searchsorted(transition_seconds, local_seconds, side="right") - 1
+    for _ in range(3):
+        utc_guess = local_seconds - offsets[np.maximum(index, 0)]
+        next_index = np.searchsorted(transition_seconds, utc_guess, side="right") - 1
+        if np.array_equal(next_index, index):
+            break
+        index = next_index
+    return offsets[np.maximum(index, 0)]
+
+
+def _julian_days_ut(local_seconds: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Convert local birth times to Julian days (UT) using each record's timezone."""
+    zone_per_record = get_timezone_resolver().resolve_many(latitudes, longitudes)
+    unresolved = np.flatnonzero(np.equal(zone_per_record, None))
+    if len(unresolved):
+        i = unresolved[0]
+        raise ValueError(f"Could not determine timezone for coordinates: {latitudes[i]}, {longitudes[i]}")
+
+    offsets = np.zeros(local_seconds.shape, dtype=np.int64)
+    for zone in set(zone_per_record.tolist()):
+        mask = zone_per_record == zone
+        offsets[mask] = _utc_offsets(local_seconds[mask], zone)
+
+    return (local_seconds - offsets) / SECONDS_PER_DAY + UNIX_EPOCH_JD
+
+
+def _ephemeris_columns(jd: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray):
+    """
+    Sidereal positions and speeds (one column per PLANET_NUMBERS body, plus an
+    unfilled Ketu column in speeds), ayanamsa and tropical ascendant.
+
+    With the table engine the positions are interpolated for the whole batch
+    at once; otherwise this is the only per-record loop, around the swisseph
+    calls. Ascendants are vectorized by the lagna engine either way.
+    """
+    count = len(jd)
+    positions = np.empty((count, len(PLANET_NUMBERS)), dtype=np.float64)
+    speeds = np.empty((count, len(BATCH_BODIES)), dtype=np.float64)
+    asc_tropical = ascendants(jd, latitudes, longitudes)
+
+    table = get_ephemeris_table() if EPHEMERIS_ENGINE == 'table' else None
+    if table is not None and count and table.covers(float(jd.min())) and table.covers(float(jd.max())):
+        ayanamsa = table.ayanamsas(jd)
+        for j, name in enumerate(PLANET_NUMBERS):
+            positions[:, j], speeds[:, j] = table.positions(name, jd)
+        return positions, speeds, ayanamsa, asc_tropical
+
+    body_numbers = [int(number) for number in PLANET_NUMBERS.values()]
+    ayanamsa = np.empty(count, dtype=np.float64)
+    for i in range(count):
+        jd_i = float(jd[i])
+        ayanamsa[i] = get_ayanamsa_ut(jd_i)
+        for j, number in enumerate(body_numbers):
+            position = calc_ut(jd_i, number)[0]
+            positions[i, j] = position[0]
+            speeds[i, j] = position[3]
+    positions = np.mod(positions - ayanamsa[:, None], 360.0)
+    return positions, speeds, ayanamsa, asc_tropical
+
+
+def calculate_d1_charts_batch(dobs: Sequence[str], tobs: Sequence[str],
+                              latitudes: Sequence[float], longitudes: Sequence[float]) -> Dict[str, Any]:
+    """
+    Calculate D1 charts for many birth records at once.
+
+    Returns a columnar dict of NumPy arrays. Per-body arrays have shape
+    (records, len(BATCH_BODIES)); signs, nakshatras and dasha lords are
+    indices into ZODIAC_SIGNS, NAKSHATRAS and DASHA_ORDER.
+    """
+    try:
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        count = len(dobs)
+        if not (len(tobs) == len(latitudes) == len(longitudes) == count):
+            raise ValueError("dob, tob, latitude and longitude must have the same length")
+
+        local_seconds = _parse_local_seconds(dobs, tobs)
+        jd = _julian_days_ut(local_seconds, latitudes, longitudes)
+
+        positions, speeds, ayanamsa, asc_tropical = _ephemeris_columns(jd, latitudes, longitudes)
+
+        # Ketu is the last column, opposite Rahu
+        rahu = BATCH_BODIES.index('Rahu')
+        sidereal = np.empty((count, len(BATCH_BODIES)), dtype=np.float64)
+        sidereal[:, :-1] = positions
+        sidereal[:, -1] = np.mod(sidereal[:, rahu] + 180.0, 360.0)
+        speeds[:, -1] = speeds[:, rahu]
+        ascendant = np.mod(asc_tropical - ayanamsa, 360.0)
+
+        # Whole Sign houses
+        signs = (sidereal // 30).astype(np.int8)
+        ascendant_sign = (ascendant // 30).astype(np.int8)
+        house_numbers = (np.mod(signs - ascendant_sign[:, None], 12) + 1).astype(np.int8)
+
+        nakshatras = (sidereal // NAKSHATRA_SPAN).astype(np.int8)
+        padas = (np.mod(sidereal, NAKSHATRA_SPAN) // PADA_SPAN + 1).astype(np.int8)
+
+        # Vimshottari balance from the Moon's progress through its nakshatra
+        moon = sidereal[:, BATCH_BODIES.index('Moon')]
+        moon_nakshatra = (moon // NAKSHATRA_SPAN).astype(np.int64)
+        dasha_lord = (moon_nakshatra % 9).astype(np.int8)
+        fraction_elapsed = np.mod(moon, NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+        dasha_balance = (1.0 - fraction_elapsed) * _DASHA_YEARS_BY_INDEX[dasha_lord]
+
+        return {
+            "count": count,
+            "bodies": BATCH_BODIES,
+            "jd_ut": jd,
+            "ascendant": ascendant,
+            "ascendant_sign": ascendant_sign,
+            "longitudes": sidereal,
+            "speeds": speeds,
+            "signs": signs,
+            "houses": house_numbers,
+            "nakshatras": nakshatras,
+            "padas": padas,
+            "dasha_lord": dasha_lord,
+            "dasha_balance_years": dasha_balance
+        }
+    except Exception as e:
+        logger.error(f"Error calculating D1 chart batch: {str(e)}")
+        raise
+
+
+def batch_to_columns(batch: Dict[str, Any], decimals: int = 6) -> Dict[str, Any]:
+    """Convert a batch result to JSON-serializable columns for the API."""
+    bodies: List[str] = batch["bodies"]
+    longitudes = np.round(batch["longitudes"], decimals)
+    speeds = np.round(batch["speeds"], decimals)
+    return {
+        "count": batch["count"],
+        "bodies": bodies,
+        "sign_names": ZODIAC_SIGNS,
+        "nakshatra_names": NAKSHATRAS,
+        "dasha_lord_names": DASHA_ORDER,
+        "jd_ut": np.round(batch["jd_ut"], 8).tolist(),
+        "ascendant": np.round(batch["ascendant"], decimals).tolist(),
+        "ascendant_sign": batch["ascendant_sign"].tolist(),
+        "longitudes": {body: longitudes[:, j].tolist() for j, body in enumerate(bodies)},
+        "speeds": {body: speeds[:, j].tolist() for j, body in enumerate(bodies)},
+        "signs": {body: batch["signs"][:, j].tolist() for j, body in enumerate(bodies)},
+        "houses": {body: batch["houses"][:, j].tolist() for j, body in enumerate(bodies)},
+        "nakshatras": {body: batch["nakshatras"][:, j].tolist() for j, body in enumerate(bodies)},
+        "padas": {body: batch["padas"][:, j].tolist() for j, body in enumerate(bodies)},
+        "dasha_lord": batch["dasha_lord"].tolist(),
+        "dasha_balance_years": np.round(batch["dasha_balance_years"], decimals).tolist()
+    }
+
+
+def calculate_d1_charts_batch_columns(dobs: Sequence[str], tobs: Sequence[str],
+                                      latitudes: Sequence[float], longitudes: Sequence[float]) -> Dict[str, Any]:
+    """calculate_d1_charts_batch followed by batch_to_columns, for running in a chart worker."""
+    return batch_to_columns(calculate_d1_charts_batch(dobs, tobs, latitudes, longitudes))
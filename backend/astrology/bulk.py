@@ -0,0 +1,165 @@
+"""
+Streaming bulk chart generation over a pool of worker processes.
+
+Records are read as a stream, geocoded in the parent when they carry a
+location instead of coordinates, grouped into chunks and handed to spawn
+worker processes. Each worker configures swisseph and loads the timezone
+and lagna tables once in its initializer, logs only warnings and errors
+(per-record info lines would cost as much as the rows), and returns its
+chunk as finished JSON lines.
+
+Output order equals input order: the parent keeps a bounded window of
+pending chunks (AsyncResults) and always writes the oldest one first,
+blocking on it when the window is full. That window is also the
+backpressure: the reader stops pulling records while it is full, so memory
+stays constant however long the input is.
+
+Each output line is the chart in the calculate_d1_chart shape with the
+record's id added, or {"id": ..., "error": ...} for a record that failed;
+one bad record never stops the run.
+
+Configuration:
+    BULK_CHUNK_SIZE      records per task sent to a worker
+    BULK_WINDOW          pending chunks per worker
+    BULK_GEOCODE_CACHE   distinct locations remembered by the geocode cache
+    BULK_LOG_LEVEL       log level of the astrology modules in the workers
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+from .chart_model import compute_chart
+from .export import chunked
+from .utils import get_coordinates_from_location
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '256'))
+BULK_WINDOW = int(os.getenv('BULK_WINDOW', '4'))
+BULK_GEOCODE_CACHE = int(os.getenv('BULK_GEOCODE_CACHE', '100000'))
+BULK_LOG_LEVEL = os.getenv('BULK_LOG_LEVEL', 'WARNING').upper()
+
+
+@lru_cache(maxsize=BULK_GEOCODE_CACHE)
+def _cached_coordinates(location: str) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """(latitude, longitude, error) for a location; failures are remembered too."""
+    try:
+        latitude, longitude = get_coordinates_from_location(location)
+        return latitude, longitude, None
+    except ValueError as e:
+        return None, None, str(e)
+
+
+def resolve_location(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in latitude/longitude from the record's location, or set its error."""
+    if record.get('latitude') not in (None, '') and record.get('longitude') not in (None, ''):
+        return record
+    location = str(record.get('location') or '').strip()
+    if not location:
+        return dict(record, error="Record needs latitude and longitude or a location")
+    latitude, longitude, error = _cached_coordinates(location)
+    if error is not None:
+        return dict(record, error=error)
+    return dict(record, latitude=latitude, longitude=longitude)
+
+
+def chart_line(record: Dict[str, Any]) -> str:
+    """One output JSON line for a record."""
+    record_id = record.get('id')
+    if record.get('error'):
+        return json.dumps({"id": record_id, "error": record['error']})
+    try:
+        chart = compute_chart(str(record['dob']), str(record['tob']),
+                              float(record['latitude']), float(record['longitude']))
+        return json.dumps(dict(id=record_id, **chart.to_dict(record.get('name') or "")))
+    except Exception as e:
+        return json.dumps({"id": record_id, "error": str(e)})
+
+
+def _init_bulk_worker() -> None:
+    """Pool initializer: configure swisseph and load what charts need, nothing else."""
+    from .lagna import preload_lagna_tables
+    from .pipeline import _configure_swisseph
+    from .timezones import get_timezone_resolver
+
+    logging.getLogger("astrology").setLevel(BULK_LOG_LEVEL)
+    _configure_swisseph()
+    get_timezone_resolver()
+    preload_lagna_tables()
+
+
+def chart_lines(records: List[Dict[str, Any]]) -> str:
+    """Worker task: a chunk of records to a block of JSON lines."""
+    return "".join(chart_line(record) + "\n" for record in records)
+
+
+class BulkProgress:
+    """Rows done, errors and throughput, reported at most every interval seconds."""
+
+    def __init__(self, report: Optional[Callable[[str], None]] = None, interval: float = 2.0):
+        self.report = report
+        self.interval = interval
+        self.rows = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def update(self, block: str) -> None:
+        self.rows += block.count("\n")
+        self.errors += block.count('"error": ')
+        now = time.perf_counter()
+        if self.report is not None and now - self._last >= self.interval:
+            self._last = now
+            self.report(self.summary())
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return f"{self.rows} rows, {self.errors} errors, {elapsed:.1f}s, {self.rows / max(elapsed, 1e-9):,.0f} rows/s"
+
+
+def run_bulk(records: Iterable[Dict[str, Any]], out: TextIO, workers: Optional[int] = None,
+             chunk_size: int = BULK_CHUNK_SIZE, window: int = BULK_WINDOW,
+             report: Optional[Callable[[str], None]] = None) -> BulkProgress:
+    """
+    Compute charts for a stream of records and write ordered JSON lines to
+    out. workers=0 computes in this process; the default is one worker per
+    CPU. At most workers * window chunks are in flight at a time.
+    """
+    progress = BulkProgress(report)
+    chunks: Iterator[List[Dict[str, Any]]] = chunked(map(resolve_location, records), chunk_size)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 0:
+        for chunk in chunks:
+            block = chart_lines(chunk)
+            out.write(block)
+            progress.update(block)
+        return progress
+
+    pool = multiprocessing.get_context("spawn").Pool(workers, initializer=_init_bulk_worker)
+    pending: Deque[Any] = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.apply_async(chart_lines, (chunk,)))
+            # Backpressure: stop reading until the oldest chunk is written
+            while len(pending) >= workers * window:
+                block = pending.popleft().get()
+                out.write(block)
+                progress.update(block)
+        while pending:
+            block = pending.popleft().get()
+            out.write(block)
+            progress.update(block)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return progress
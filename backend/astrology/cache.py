@@ -0,0 +1,253 @@
+"""
+Chart result cache.
+
+Computed charts (chart_model.Chart) are cached under a key built from
+normalized birth data: dob, tob rounded to the minute, latitude/longitude
+rounded to two decimals (about 1 km), ayanamsa and house system. There are
+two tiers: an in-process LRU with a TTL holding the Chart objects
+themselves, and an optional SQLite file shared between workers and
+restarts holding Chart.to_state() as JSON.
+
+A Chart holds no name and no dasha fields that depend on datetime.now()
+(current_maha_dasha, years_remaining, and how far the sequence extends);
+those are produced when the chart is converted to JSON, so a hit never
+serves stale values and costs no ephemeris calls.
+
+Configuration:
+    CHART_CACHE_SIZE         in-process entries (0 disables the cache)
+    CHART_CACHE_TTL          seconds an entry stays valid
+    CHART_CACHE_SQLITE_PATH  enables the SQLite tier at this path
+    CHART_CACHE_SQLITE_SIZE  maximum rows kept in the SQLite tier
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .chart_model import Chart
+
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_SIZE = int(os.getenv('CHART_CACHE_SIZE', '4096'))
+CHART_CACHE_TTL = float(os.getenv('CHART_CACHE_TTL', str(7 * 24 * 3600)))
+CHART_CACHE_SQLITE_PATH = os.getenv('CHART_CACHE_SQLITE_PATH')
+CHART_CACHE_SQLITE_SIZE = int(os.getenv('CHART_CACHE_SQLITE_SIZE', '100000'))
+
+AYANAMSA = 'LAHIRI'
+HOUSE_SYSTEM = 'WHOLE_SIGN'
+
+# Part of every key; bump it when the cached chart state (its shape or how it
+# is computed, as for dignities in 4 and exact nakshatra spans in 5) changes
+# so that entries in a persistent SQLite tier are not served in the old shape
+CHART_SCHEMA_VERSION = 5
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for one cache."""
+
+    __slots__ = ("hits", "misses", "evictions", "expirations")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache tier storing JSON values in a SQLite table."""
+
+    def __init__(self, path: str, max_size: int, ttl: float, table: str = "chart_cache"):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.table = table
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            if row[1] < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now + self.ttl, now)
+            )
+            excess = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_size
+            if excess > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)", (excess,)
+                )
+                self.stats.evictions += excess
+            self._conn.commit()
+
+
+def chart_cache_key(dob: str, tob: str, latitude: float, longitude: float,
+                    ayanamsa: str = AYANAMSA, house_system: str = HOUSE_SYSTEM) -> str:
+    """Normalize birth data into a cache key."""
+    birth_time = datetime.strptime(f"{dob.strip()} {tob.strip()}", "%Y-%m-%d %H:%M")
+    return "|".join([
+        birth_time.strftime("%Y-%m-%d %H:%M"),
+        f"{round(latitude, 2) + 0.0:.2f}",
+        f"{round(longitude, 2) + 0.0:.2f}",
+        ayanamsa,
+        house_system,
+        f"v{CHART_SCHEMA_VERSION}"
+    ])
+
+
+class ChartCache:
+    """Two-tier cache of computed Charts."""
+
+    def __init__(self, max_size: int = CHART_CACHE_SIZE, ttl: float = CHART_CACHE_TTL,
+                 sqlite_path: Optional[str] = CHART_CACHE_SQLITE_PATH,
+                 sqlite_size: int = CHART_CACHE_SQLITE_SIZE):
+        self.memory = LRUCache(max_size, ttl)
+        self.disk = SQLiteCache(sqlite_path, sqlite_size, ttl) if sqlite_path else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory.max_size > 0 or self.disk is not None
+
+    def get(self, key: str) -> Optional[Chart]:
+        chart = self.memory.get(key)
+        if chart is None and self.disk is not None:
+            chart = self._get_disk(key)
+        return chart
+
+    def _get_disk(self, key: str) -> Optional[Chart]:
+        state = self.disk.get(key)
+        if state is None:
+            return None
+        chart = Chart.from_state(state)
+        self.memory.put(key, chart)
+        return chart
+
+    def put(self, key: str, chart: Chart) -> None:
+        self.memory.put(key, chart)
+        if self.disk is not None:
+            self.disk.put(key, chart.to_state())
+
+    def lookup(self, dob: str, tob: str, latitude: float, longitude: float) -> Optional[Chart]:
+        """Return the cached chart for this birth data, or None on a miss."""
+        if not self.enabled:
+            return None
+        return self.get(chart_cache_key(dob, tob, latitude, longitude))
+
+    def lookup_memory(self, dob: str, tob: str, latitude: float, longitude: float) -> Optional[Chart]:
+        """Like lookup, but only the in-process tier: never blocks on SQLite."""
+        if self.memory.max_size <= 0:
+            return None
+        return self.memory.get(chart_cache_key(dob, tob, latitude, longitude))
+
+    def lookup_disk(self, dob: str, tob: str, latitude: float, longitude: float) -> Optional[Chart]:
+        """Like lookup, but only the SQLite tier (a hit is copied to memory)."""
+        if self.disk is None:
+            return None
+        return self._get_disk(chart_cache_key(dob, tob, latitude, longitude))
+
+    def store(self, dob: str, tob: str, latitude: float, longitude: float, chart: Chart) -> None:
+        """Cache a chart computed for this birth data."""
+        if self.enabled:
+            self.put(chart_cache_key(dob, tob, latitude, longitude), chart)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory": dict(self.memory.stats.as_dict(), size=len(self.memory))}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats.as_dict()
+        return stats
+
+
+_chart_cache: Optional[ChartCache] = None
+_chart_cache_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartCache:
+    """Process-wide chart cache configured from the environment."""
+    global _chart_cache
+    if _chart_cache is None:
+        with _chart_cache_lock:
+            if _chart_cache is None:
+                _chart_cache = ChartCache()
+    return _chart_cache
@@ -0,0 +1,267 @@
+"""
+Compact internal representation of a D1 chart.
+
+A Chart holds the computed state of one birth chart as fixed-size arrays
+indexed by body (CHART_BODIES order): sidereal longitudes and speeds as
+array('d'), and signs, houses, nakshatras, padas and dignities as one
+byte per body. Aspects are a 12 x 12 bitmask with one 16-bit row per body
+(bit j of row i set when body i aspects body j). Combustion is a bitmask
+too. Nothing in it is a string, apart from the birth date that the
+dasha is measured from.
+
+The JSON shape the API has always returned is built only at the edge:
+
+    chart.to_dict(name)      the dict calculate_d1_chart returns
+    chart.to_response(name)  the ChartResponse-shaped dict, ready for json.dumps
+
+The time-dependent dasha fields are recomputed on every conversion, so a
+cached Chart never serves a stale current dasha. Charts pickle to a few
+hundred bytes (for chart workers) and to_state()/from_state() give a
+flat JSON list for the SQLite cache tier.
+"""
+from array import array
+from typing import Any, Dict, List, Optional
+import logging
+
+from .charts import (
+    NAKSHATRA_SPAN,
+    PADA_SPAN,
+    PLANET_NUMBERS,
+    ZODIAC_SIGNS,
+    NAKSHATRAS,
+    birth_julian_day,
+    calculate_vimshottari_dasha,
+    compute_planet_snapshot,
+    is_combust,
+    planet_dignity,
+)
+from .ashtakavarga import ASHTAKAVARGA_PLANETS, ashtakavarga
+from .lagna import ascendant as tropical_ascendant
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Rahu and Ketu first, then the remaining planets: the order calculate_d1_chart
+# has always listed bodies in
+CHART_BODIES = ['Rahu', 'Ketu'] + [name for name in PLANET_NUMBERS if name != 'Rahu']
+BODY_INDEX = {name: i for i, name in enumerate(CHART_BODIES)}
+BODY_COUNT = len(CHART_BODIES)
+
+# Bodies with a planet_strengths entry, in PLANET_NUMBERS order
+STRENGTH_BODIES = [name for name in PLANET_NUMBERS if name not in ('Rahu', 'Ketu')]
+
+DIGNITIES = ["Neutral", "Exalted", "Debilitated", "Own Sign"]
+_DIGNITY_CODES = {name: i for i, name in enumerate(DIGNITIES)}
+_DIGNITY_STRENGTH = [0.0, 1.0, -1.0, 0.5]
+
+# Major aspects: conjunction, sextile, square, trine, opposition, with an 8 degree orb
+ASPECT_ANGLES = (0, 60, 90, 120, 180)
+ASPECT_ORB = 8
+
+_HOUSE_LABELS = [f"{i+1}st" for i in range(12)]
+
+
+def _aspect_rows(longitudes: array) -> array:
+    rows = array('H', bytes(2 * BODY_COUNT))
+    for i in range(BODY_COUNT):
+        row = 0
+        for j in range(BODY_COUNT):
+            if i != j:
+                diff = abs(longitudes[i] - longitudes[j])
+                if diff > 180:
+                    diff = 360 - diff
+                for angle in ASPECT_ANGLES:
+                    if abs(diff - angle) < ASPECT_ORB:
+                        row |= 1 << j
+                        break
+        rows[i] = row
+    return rows
+
+
+class Chart:
+    """One D1 chart as arrays indexed by CHART_BODIES position."""
+
+    __slots__ = (
+        "dob", "jd", "ascendant", "longitudes", "speeds",
+        "signs", "houses", "nakshatras", "padas", "dignities",
+        "combust", "aspects",
+    )
+
+    def __init__(self, dob: str, jd: float, ascendant: float, longitudes: array, speeds: array,
+                 combust: int, aspects: array, dignities: Optional[bytes] = None):
+        self.dob = dob
+        self.jd = jd
+        self.ascendant = ascendant
+        self.longitudes = longitudes
+        self.speeds = speeds
+        self.combust = combust
+        self.aspects = aspects
+
+        asc_sign = int(ascendant // 30)
+        self.signs = bytes(int(lon // 30) for lon in longitudes)
+        self.houses = bytes((sign - asc_sign) % 12 for sign in self.signs)
+        # Same arithmetic as get_nakshatra_pada and the batch path
+        self.nakshatras = bytes(int(lon // NAKSHATRA_SPAN) for lon in longitudes)
+        self.padas = bytes(int(lon % NAKSHATRA_SPAN // PADA_SPAN) + 1 for lon in longitudes)
+        if dignities is None:
+            dignities = bytes(
+                _DIGNITY_CODES[planet_dignity(name, ZODIAC_SIGNS[self.signs[i]])]
+                for i, name in enumerate(CHART_BODIES)
+            )
+        self.dignities = dignities
+
+    @classmethod
+    def from_snapshot(cls, dob: str, jd: float, ascendant: float, snapshot) -> "Chart":
+        longitudes = array('d', [snapshot.longitude(name) for name in CHART_BODIES])
+        speeds = array('d', [snapshot.speed(name) for name in CHART_BODIES])
+        sun = snapshot.longitude('Sun')
+        combust = 0
+        for name in STRENGTH_BODIES:
+            if is_combust(int(PLANET_NUMBERS[name]), sun, snapshot.longitude(name)):
+                combust |= 1 << BODY_INDEX[name]
+        return cls(dob, jd, ascendant, longitudes, speeds, combust, _aspect_rows(longitudes))
+
+    # --- Accessors ---
+
+    def longitude(self, name: str) -> float:
+        return self.longitudes[BODY_INDEX[name]]
+
+    def speed(self, name: str) -> float:
+        return self.speeds[BODY_INDEX[name]]
+
+    def is_retrograde(self, name: str) -> bool:
+        return self.speeds[BODY_INDEX[name]] < 0
+
+    def is_combust(self, name: str) -> bool:
+        return bool(self.combust >> BODY_INDEX[name] & 1)
+
+    def aspects_between(self, first: str, second: str) -> bool:
+        return bool(self.aspects[BODY_INDEX[first]] >> BODY_INDEX[second] & 1)
+
+    def longitude_map(self) -> Dict[str, float]:
+        """Sidereal longitudes by name, ascendant first (the input calculate_vargas takes)."""
+        return dict(zip(['Ascendant'] + CHART_BODIES, [self.ascendant] + list(self.longitudes)))
+
+    # --- JSON edge ---
+
+    def _houses(self) -> List[Dict[str, str]]:
+        asc_sign = int(self.ascendant // 30)
+        members: List[List[str]] = [[] for _ in range(12)]
+        for i, house in enumerate(self.houses):
+            members[house].append(CHART_BODIES[i])
+        return [
+            {"house": _HOUSE_LABELS[i], "sign": ZODIAC_SIGNS[(asc_sign + i) % 12], "planets": ", ".join(members[i])}
+            for i in range(12)
+        ]
+
+    def _planet_strengths(self, shadbala: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Dict[str, Any]]:
+        with timed("strengths"):
+            strengths = {}
+            for name in STRENGTH_BODIES:
+                i = BODY_INDEX[name]
+                dignity = self.dignities[i]
+                retrograde = self.speeds[i] < 0
+                combust = bool(self.combust >> i & 1)
+                strength = _DIGNITY_STRENGTH[dignity]
+                if combust:
+                    strength -= 0.5
+                if retrograde:
+                    strength -= 0.25
+                strengths[name] = {
+                    "sign": ZODIAC_SIGNS[self.signs[i]],
+                    "longitude": round(self.longitudes[i], 2),
+                    "dignity": DIGNITIES[dignity],
+                    "retrograde": retrograde,
+                    "combust": combust,
+                    "strength": round(strength, 2),
+                    "condition": "Strong" if strength > 0.25 else "Weak" if strength < -0.25 else "Moderate"
+                }
+                if shadbala is not None:
+                    strengths[name]["shadbala"] = shadbala[name]["rupas"] if name in shadbala else None
+                    strengths[name]["shadbala_ratio"] = shadbala[name]["ratio"] if name in shadbala else None
+            return strengths
+
+    def _aspects(self) -> Dict[str, List[str]]:
+        return {
+            name: [CHART_BODIES[j] for j in range(BODY_COUNT) if self.aspects[i] >> j & 1]
+            for i, name in enumerate(CHART_BODIES)
+        }
+
+    def _ashtakavarga(self) -> Dict[str, Any]:
+        signs = [self.signs[BODY_INDEX[name]] for name in ASHTAKAVARGA_PLANETS]
+        return ashtakavarga(signs + [int(self.ascendant // 30)])
+
+    def _dasha(self) -> Dict[str, Any]:
+        with timed("dasha"):
+            dasha = calculate_vimshottari_dasha(self.longitude('Moon'), self.dob)
+        return {
+            "current_maha_dasha": dasha["current_maha_dasha"],
+            "years_remaining": dasha["years_remaining"],
+            "sequence": dasha["sequence"]
+        }
+
+    def _nakshatra(self) -> Dict[str, Any]:
+        moon = BODY_INDEX['Moon']
+        return {"nakshatra": NAKSHATRAS[self.nakshatras[moon]], "pada": self.padas[moon]}
+
+    def to_dict(self, name: str, shadbala: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Any]:
+        """
+        The dict calculate_d1_chart returns, including the sidereal longitudes.
+        Planet strengths include Shadbala when a calculate_shadbala() result is given.
+        """
+        return {
+            "name": name,
+            "ascendant": ZODIAC_SIGNS[int(self.ascendant // 30)],
+            "houses": self._houses(),
+            "nakshatra": self._nakshatra(),
+            "dasha": self._dasha(),
+            "planet_strengths": self._planet_strengths(shadbala),
+            "aspects": self._aspects(),
+            "ashtakavarga": self._ashtakavarga(),
+            "longitudes": self.longitude_map()
+        }
+
+    def to_response(self, name: str, vargas: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """The ChartResponse JSON shape, built without pydantic validation."""
+        return {
+            "name": name,
+            "ascendant": ZODIAC_SIGNS[int(self.ascendant // 30)],
+            "houses": self._houses(),
+            "nakshatra": self._nakshatra(),
+            "dasha": self._dasha(),
+            "planet_strengths": self._planet_strengths(),
+            "aspects": self._aspects(),
+            "ashtakavarga": self._ashtakavarga(),
+            "vargas": vargas
+        }
+
+    # --- Cache state ---
+
+    def to_state(self) -> List[Any]:
+        """Flat JSON-serializable state (everything else is derived from it)."""
+        return [self.dob, self.jd, self.ascendant, list(self.longitudes), list(self.speeds),
+                self.combust, list(self.aspects), list(self.dignities)]
+
+    @classmethod
+    def from_state(cls, state: List[Any]) -> "Chart":
+        dob, jd, ascendant, longitudes, speeds, combust, aspects, dignities = state
+        return cls(dob, jd, ascendant, array('d', longitudes), array('d', speeds), combust,
+                   array('H', aspects), bytes(dignities))
+
+    def __reduce__(self):
+        return (Chart.from_state, (self.to_state(),))
+
+
+def compute_chart(dob: str, tob: str, latitude: float, longitude: float) -> Chart:
+    """Compute a D1 chart with Whole Sign houses into a Chart."""
+    try:
+        jd = birth_julian_day(dob, tob, latitude, longitude)
+        with timed("ephemeris"):
+            snapshot = compute_planet_snapshot(jd)
+            asc_tropical = tropical_ascendant(jd, latitude, longitude)
+        ascendant = (asc_tropical - snapshot.ayanamsa) % 360
+        with timed("chart"):
+            return Chart.from_snapshot(dob, jd, ascendant, snapshot)
+    except Exception as e:
+        logger.error(f"Error calculating chart: {str(e)}")
+        raise
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import swisseph as swe
-print('swisseph loaded from:', swe.__file__)
 from datetime import datetime, timezone, timedelta
 import pytz
-from timezonefinder import TimezoneFinder
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from .models import ChartHouse, NakshatraInfo, DashaInfo, DashaPeriod
+from .ephemeris import PlanetSnapshot, calc_ut, get_ayanamsa_ut
+from .timezones import get_timezone_resolver
+from .metrics import timed
 import os
 import logging
 
@@ -36,10 +37,24 @@ PLANET_NUMBERS = {
 # If you leave it as None, swisseph will try to use its default search paths or download.
 EPHE_PATH = os.getenv('SWEPH_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ephe'))  # Use project root/ephe directory
 
-if EPHE_PATH:
-    if not os.path.exists(EPHE_PATH):
+# When the ephemeris directory is checked: "startup" (run_api's startup
+# hook), "import" (when this module is imported) or "off"
+EPHEMERIS_VALIDATION = os.getenv('EPHEMERIS_VALIDATION', 'startup').lower()
+
+_validated_ephemeris_paths = set()
+
+
+def validate_ephemeris_path(path: Optional[str] = EPHE_PATH) -> None:
+    """
+    Check that the Swiss Ephemeris directory exists and holds the planet,
+    Moon and asteroid files. The result is cached per path, so calling it
+    again (from workers or on every startup hook) costs nothing.
+    """
+    if not path or path in _validated_ephemeris_paths:
+        return
+    if not os.path.exists(path):
         raise ValueError(
-            f"Swiss Ephemeris data directory not found at {EPHE_PATH}. "
+            f"Swiss Ephemeris data directory not found at {path}. "
             "Please ensure the directory exists and contains the required ephemeris files. "
             "You can download them from https://www.astro.com/swisseph/swephfiles.htm "
             "or set the SWEPH_PATH environment variable to point to your ephemeris files."
@@ -49,7 +64,7 @@ if EPHE_PATH:
     required_files = ['sepl.se1', 'semo.se1', 'seas.se1']
     required_files_alt = ['sepl_18.se1', 'semo_18.se1', 'seas_18.se1']
     
-    files_present = os.listdir(EPHE_PATH)
+    files_present = os.listdir(path)
     has_required_files = (
         all(f in files_present for f in required_files) or
         all(f in files_present for f in required_files_alt)
@@ -57,14 +72,21 @@ if EPHE_PATH:
     
     if not has_required_files:
         raise ValueError(
-            f"Swiss Ephemeris data directory at {EPHE_PATH} is missing required files. "
+            f"Swiss Ephemeris data directory at {path} is missing required files. "
             "Please ensure you have downloaded and placed the following files: "
             "sepl.se1 (or sepl_18.se1) for Planetary Ephemeris, "
             "semo.se1 (or semo_18.se1) for Moon Ephemeris, and "
             "seas.se1 (or seas_18.se1) for Asteroid Ephemeris. "
             "You can download them from https://www.astro.com/swisseph/swephfiles.htm"
         )
-    
+    _validated_ephemeris_paths.add(path)
+    logger.info(f"Swiss Ephemeris files found in {path}")
+
+
+if EPHEMERIS_VALIDATION == 'import':
+    validate_ephemeris_path()
+
+if EPHE_PATH:
     swe.set_ephe_path(EPHE_PATH)
 
 # Vedic Astrology uses Lahiri Ayanamsa
@@ -110,6 +132,10 @@ PLANET_IDS = [
     swe.VENUS, swe.SATURN, swe.TRUE_NODE, swe.URANUS, swe.NEPTUNE, swe.PLUTO
 ]
 
+# Exact spans: one nakshatra is 360/27 degrees and holds four padas
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = 360.0 / 108
+
 ZODIAC_SIGNS = [
     "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
     "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
@@ -195,7 +221,7 @@ def calculate_vimshottari_dasha(moon_long: float, dob: str) -> Dict[str, Any]:
         dasha_lord = get_dasha_lord_from_nakshatra(nakshatra)
         
         # Calculate offset within nakshatra (0-13.333333 degrees)
-        nak_offset = (moon_long % 13.333333) / 13.333333
+        nak_offset = (moon_long % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
         
         # Vimshottari dasha periods (in years)
         dasha_periods = {
@@ -219,39 +245,11 @@ def calculate_vimshottari_dasha(moon_long: float, dob: str) -> Dict[str, Any]:
         current_dasha_start = dob_dt - timedelta(days=elapsed_years * 365.25)
         
         # Calculate sequence of dashas
-        dasha_sequence = []
-        current_date_float = current_dasha_start.year + (current_dasha_start.month - 1) / 12 + (current_dasha_start.day - 1) / 365.25
-        
-        # Get the order of dasha lords starting from the birth dasha
-        dasha_lords = list(dasha_periods.keys())
-        start_index = dasha_lords.index(dasha_lord)
-        ordered_lords = dasha_lords[start_index:] + dasha_lords[:start_index]
-        
-        # Calculate sequence
-        for lord in ordered_lords:
-            years = dasha_periods[lord]
-            end_date_float = current_date_float + years
-            dasha_sequence.append({
-                "lord": lord,
-                "start_year": current_date_float,
-                "end_year": end_date_float
-            })
-            current_date_float = end_date_float
-            
-            # If we've covered the current year, we can stop
-            if end_date_float > current_date.year:
-                break
+        start_year = current_dasha_start.year + (current_dasha_start.month - 1) / 12 + (current_dasha_start.day - 1) / 365.25
+        dasha_sequence = build_dasha_sequence(dasha_lord, start_year, current_date)
         
         # Find current dasha and remaining years
-        current_dasha = None
-        years_remaining = 0
-        current_year_float = current_date.year + (current_date.month - 1) / 12 + (current_date.day - 1) / 365.25
-        
-        for dasha in dasha_sequence:
-            if dasha["start_year"] <= current_year_float < dasha["end_year"]:
-                current_dasha = dasha["lord"]
-                years_remaining = dasha["end_year"] - current_year_float
-                break
+        current_dasha, years_remaining = find_current_dasha(dasha_sequence, current_date)
         
         return {
             "current_maha_dasha": current_dasha,
@@ -262,6 +260,57 @@ def calculate_vimshottari_dasha(moon_long: float, dob: str) -> Dict[str, Any]:
         logger.error(f"Error calculating Vimshottari dasha: {str(e)}")
         raise
 
+def _fractional_year(date: datetime) -> float:
+    """Year plus month/day fraction, the scale dasha sequences are expressed in."""
+    return date.year + (date.month - 1) / 12 + (date.day - 1) / 365.25
+
+def build_dasha_sequence(first_lord: str, start_year: float, current_date: datetime) -> List[Dict[str, Any]]:
+    """Mahadasha periods from first_lord onwards, stopping once current_date is covered."""
+    start_index = DASHA_ORDER.index(first_lord)
+    ordered_lords = DASHA_ORDER[start_index:] + DASHA_ORDER[:start_index]
+    current_year_float = _fractional_year(current_date)
+    
+    dasha_sequence = []
+    current_date_float = start_year
+    for lord in ordered_lords:
+        end_date_float = current_date_float + DASHA_YEARS[lord]
+        dasha_sequence.append({
+            "lord": lord,
+            "start_year": current_date_float,
+            "end_year": end_date_float
+        })
+        current_date_float = end_date_float
+        
+        # If we've covered the current date, we can stop
+        if end_date_float > current_year_float:
+            break
+    return dasha_sequence
+
+def find_current_dasha(dasha_sequence: List[Dict[str, Any]], current_date: datetime) -> tuple[Optional[str], float]:
+    """Return the mahadasha lord running at current_date and its remaining years."""
+    current_year_float = _fractional_year(current_date)
+    for dasha in dasha_sequence:
+        if dasha["start_year"] <= current_year_float < dasha["end_year"]:
+            return dasha["lord"], dasha["end_year"] - current_year_float
+    return None, 0
+
+def refresh_vimshottari_dasha(dasha_sequence: List[Dict[str, Any]], current_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Recompute the time-dependent dasha fields from a previously computed
+    sequence, without the Moon's longitude. Gives the same result as
+    calculate_vimshottari_dasha for the same birth data.
+    """
+    if current_date is None:
+        current_date = datetime.now()
+    first = dasha_sequence[0]
+    sequence = build_dasha_sequence(first["lord"], first["start_year"], current_date)
+    current_dasha, years_remaining = find_current_dasha(sequence, current_date)
+    return {
+        "current_maha_dasha": current_dasha,
+        "years_remaining": years_remaining,
+        "sequence": sequence
+    }
+
 def get_sign_from_longitude(longitude_deg):
     """Determines the zodiac sign for a given sidereal longitude."""
     sign_index = int(longitude_deg / 30)
@@ -336,69 +385,91 @@ def is_combust(planet: int, sun_long: float, planet_long: float) -> bool:
         
     return diff <= combustion_ranges[planet]
 
-def calculate_planet_strengths(jd_ut: float, latitude: float, longitude: float) -> Dict[str, Dict[str, Any]]:
-    """Calculate detailed planetary conditions and strengths."""
+def planet_dignity(planet_name: str, sign: str) -> str:
+    """Dignity of a planet in a sign: Exalted, Debilitated, Own Sign or Neutral."""
+    # The dignity tables are keyed by swisseph planet number, not name
+    planet = PLANET_NUMBERS.get(planet_name)
+    if planet in EXALTATION_SIGNS and sign == EXALTATION_SIGNS[planet]:
+        return "Exalted"
+    elif planet in DEBILITATION_SIGNS and sign == DEBILITATION_SIGNS[planet]:
+        return "Debilitated"
+    elif planet in OWN_SIGNS and sign in OWN_SIGNS[planet]:
+        return "Own Sign"
+    return "Neutral"
+
+def calculate_planet_strengths(jd_ut: float, latitude: float, longitude: float,
+                               snapshot: Optional[PlanetSnapshot] = None, shadbala: bool = False,
+                               ascendant: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Calculate detailed planetary conditions and strengths. With shadbala,
+    each classical planet also gets its Shadbala in rupas and its ratio to
+    the required minimum (ascendant: the sidereal ascendant, if known).
+    """
     try:
-        # Get ayanamsa
-        ayanamsa = swe.get_ayanamsa_ut(jd_ut)
-        
-        # Get Sun's position for combustion check
-        sun_data = swe.calc_ut(jd_ut, int(PLANET_NUMBERS['Sun']))
-        sun_long = (sun_data[0][0] - ayanamsa) % 360
-        
-        strengths = {}
-        
-        # Calculate for each planet
-        for planet_name, planet_number in PLANET_NUMBERS.items():
-            if planet_name in ['Rahu', 'Ketu']:
-                continue
+        shadbala_table = None
+        if shadbala:
+            from .shadbala import calculate_shadbala
+            if snapshot is None:
+                snapshot = compute_planet_snapshot(jd_ut)
+            shadbala_table = calculate_shadbala(jd_ut, latitude, longitude, snapshot, ascendant)
+
+        with timed("strengths"):
+            if snapshot is None:
+                snapshot = compute_planet_snapshot(jd_ut)
+        
+            # Get Sun's position for combustion check
+            sun_long = snapshot.longitude('Sun')
+        
+            strengths = {}
+        
+            # Calculate for each planet
+            for planet_name, planet_number in PLANET_NUMBERS.items():
+                if planet_name in ['Rahu', 'Ketu']:
+                    continue
                 
-            # Get planet position
-            planet_data = swe.calc_ut(jd_ut, int(planet_number))
-            planet_long = (planet_data[0][0] - ayanamsa) % 360
-            is_retrograde = planet_data[0][3] < 0
+                # Get planet position
+                planet_long = snapshot.longitude(planet_name)
+                is_retrograde = snapshot.is_retrograde(planet_name)
             
-            # Check combustion
-            combust = is_combust(int(planet_number), sun_long, planet_long)
+                # Check combustion
+                combust = is_combust(int(planet_number), sun_long, planet_long)
             
-            # Calculate dignity
-            sign_index = int(planet_long // 30)
-            sign = ZODIAC_SIGNS[sign_index]
+                # Calculate dignity
+                sign_index = int(planet_long // 30)
+                sign = ZODIAC_SIGNS[sign_index]
             
-            # Determine dignity status
-            dignity = "Neutral"
-            if planet_name in EXALTATION_SIGNS and sign == EXALTATION_SIGNS[planet_name]:
-                dignity = "Exalted"
-            elif planet_name in DEBILITATION_SIGNS and sign == DEBILITATION_SIGNS[planet_name]:
-                dignity = "Debilitated"
-            elif planet_name in OWN_SIGNS and sign in OWN_SIGNS[planet_name]:
-                dignity = "Own Sign"
+                # Determine dignity status
+                dignity = planet_dignity(planet_name, sign)
             
-            # Calculate numerical strength for reference
-            strength = 0.0
-            if dignity == "Exalted":
-                strength = 1.0
-            elif dignity == "Debilitated":
-                strength = -1.0
-            elif dignity == "Own Sign":
-                strength = 0.5
+                # Calculate numerical strength for reference
+                strength = 0.0
+                if dignity == "Exalted":
+                    strength = 1.0
+                elif dignity == "Debilitated":
+                    strength = -1.0
+                elif dignity == "Own Sign":
+                    strength = 0.5
                 
-            if combust:
-                strength -= 0.5
-            if is_retrograde:
-                strength -= 0.25
+                if combust:
+                    strength -= 0.5
+                if is_retrograde:
+                    strength -= 0.25
             
-            strengths[planet_name] = {
-                "sign": sign,
-                "longitude": round(planet_long, 2),
-                "dignity": dignity,
-                "retrograde": is_retrograde,
-                "combust": combust,
-                "strength": round(strength, 2),
-                "condition": "Strong" if strength > 0.25 else "Weak" if strength < -0.25 else "Moderate"
-            }
+                strengths[planet_name] = {
+                    "sign": sign,
+                    "longitude": round(planet_long, 2),
+                    "dignity": dignity,
+                    "retrograde": is_retrograde,
+                    "combust": combust,
+                    "strength": round(strength, 2),
+                    "condition": "Strong" if strength > 0.25 else "Weak" if strength < -0.25 else "Moderate"
+                }
+                if shadbala_table is not None:
+                    entry = shadbala_table.get(planet_name)
+                    strengths[planet_name]["shadbala"] = entry["rupas"] if entry else None
+                    strengths[planet_name]["shadbala_ratio"] = entry["ratio"] if entry else None
             
-        return strengths
+            return strengths
         
     except Exception as e:
         logger.error(f"Error calculating planet strengths: {str(e)}")
@@ -407,18 +478,21 @@ def calculate_planet_strengths(jd_ut: float, latitude: float, longitude: float)
 def get_sidereal_longitude(jd_ut: float, planet: int) -> float:
     """Get the sidereal longitude of a planet."""
     flags = swe.FLG_SWIEPH | swe.FLG_NONUT
-    pos = swe.calc_ut(jd_ut, planet, flags)[0][0]
-    ayanamsa = swe.get_ayanamsa_ut(jd_ut)
+    pos = calc_ut(jd_ut, planet, flags)[0][0]
+    ayanamsa = get_ayanamsa_ut(jd_ut)
     return (pos - ayanamsa) % 360
 
-def calculate_aspects(jd_ut: float) -> dict:
+def calculate_aspects(jd_ut: float, snapshot: Optional[PlanetSnapshot] = None) -> dict:
     """Calculate planetary aspects based on sign positions."""
+    if snapshot is None:
+        snapshot = compute_planet_snapshot(jd_ut)
+
     positions = {}
     aspects = {}
 
     # Get sign positions for all classical planets
     for planet in ASPECT_RULES.keys():
-        long = get_sidereal_longitude(jd_ut, planet)
+        long = snapshot.longitude(PLANET_NAMES[planet])
         positions[planet] = {
             "longitude": round(long, 2),
             "sign": int(long // 30)
@@ -455,6 +529,10 @@ def calculate_aspects(jd_ut: float) -> dict:
 
 # --- Core Chart Logic ---
 
+def compute_planet_snapshot(jd_ut: float) -> PlanetSnapshot:
+    """Compute sidereal positions and speeds of all PLANET_NUMBERS bodies at jd_ut."""
+    return PlanetSnapshot.compute(jd_ut, PLANET_NUMBERS)
+
 def get_dasha_lord_from_nakshatra(nakshatra: str) -> str:
     """Get the dasha lord based on nakshatra."""
     nakshatra_dasha_map = {
@@ -490,140 +568,9 @@ def get_dasha_lord_from_nakshatra(nakshatra: str) -> str:
 
 def calculate_d1_chart(name: str, dob: str, tob: str, latitude: float, longitude: float) -> Dict[str, Any]:
     """Calculate D1 (Rashi) chart using Swiss Ephemeris with Whole Sign House system."""
-    try:
-        # Parse date and time
-        dt_str = f"{dob} {tob}"
-        try:
-            # Try parsing as 24-hour format first
-            dt_object_local = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-        except ValueError:
-            # If that fails, try 12-hour format
-            dt_object_local = datetime.strptime(dt_str, "%Y-%m-%d %I:%M")
-            
-        logger.info(f"Parsed datetime: {dt_object_local}")
-        
-        # Convert to UTC
-        utc_dt = convert_to_utc(dt_object_local, latitude, longitude)
-        
-        # Convert to Julian day
-        jd = swe.julday(utc_dt.year, utc_dt.month, utc_dt.day, 
-                       utc_dt.hour + utc_dt.minute/60.0)
-        
-        # Calculate planet positions
-        planet_positions = {}
-        nakshatras = []
-        
-        # First calculate Rahu's position
-        rahu_data = swe.calc_ut(jd, int(PLANET_NUMBERS['Rahu']))
-        rahu_pos = (rahu_data[0][0] - swe.get_ayanamsa_ut(jd)) % 360
-        planet_positions['Rahu'] = rahu_pos
-        planet_positions['Ketu'] = (rahu_pos + 180) % 360
-        
-        # Calculate other planet positions
-        for planet_name, planet_number in PLANET_NUMBERS.items():
-            if planet_name in ['Rahu', 'Ketu']:
-                continue
-                
-            # Calculate tropical position
-            planet_data = swe.calc_ut(jd, int(planet_number))
-            tropical_pos = planet_data[0][0]
-            ayanamsa = swe.get_ayanamsa_ut(jd)
-            
-            # Convert to sidereal
-            sidereal_pos = (tropical_pos - ayanamsa) % 360
-            planet_positions[planet_name] = sidereal_pos
-            
-            # Calculate nakshatra
-            nakshatra, pada = get_nakshatra_pada(sidereal_pos)
-            nakshatras.append({
-                "planet": planet_name,
-                "nakshatra": nakshatra,
-                "pada": pada,
-                "sign": get_sign(sidereal_pos),
-                "degree": sidereal_pos
-            })
-        
-        # Calculate ascendant using Whole Sign system
-        asc_tropical = swe.houses(jd, latitude, longitude)[0][0]
-        ayanamsa = swe.get_ayanamsa_ut(jd)
-        asc_sidereal = (asc_tropical - ayanamsa) % 360
-        asc_sign_index = int(asc_sidereal // 30)
-        
-        # Initialize house data
-        houses = []
-        house_planets = {i: [] for i in range(12)}  # 0 = house 1
-        
-        # Assign planets to houses based on their sign
-        for planet, lon in planet_positions.items():
-            sign_index = int(lon // 30)
-            rel_house_index = (sign_index - asc_sign_index) % 12
-            house_planets[rel_house_index].append(planet)
-        
-        # Generate house data
-        for i in range(12):
-            sign_index = (asc_sign_index + i) % 12
-            sign_name = ZODIAC_SIGNS[sign_index]
-            planets_in_house = house_planets[i]
-            houses.append({
-                "house": f"{i+1}st",
-                "sign": sign_name,
-                "planets": ", ".join(planets_in_house) if planets_in_house else ""
-            })
-        
-        # Calculate aspects
-        aspects = {}
-        for p1_name, p1_pos in planet_positions.items():
-            aspects[p1_name] = []
-            for p2_name, p2_pos in planet_positions.items():
-                if p1_name != p2_name:
-                    diff = abs(p1_pos - p2_pos)
-                    if diff > 180:
-                        diff = 360 - diff
-                    
-                    # Check for major aspects
-                    if abs(diff - 0) < 8:  # Conjunction
-                        aspects[p1_name].append(p2_name)
-                    elif abs(diff - 60) < 8:  # Sextile
-                        aspects[p1_name].append(p2_name)
-                    elif abs(diff - 90) < 8:  # Square
-                        aspects[p1_name].append(p2_name)
-                    elif abs(diff - 120) < 8:  # Trine
-                        aspects[p1_name].append(p2_name)
-                    elif abs(diff - 180) < 8:  # Opposition
-                        aspects[p1_name].append(p2_name)
-        
-        # Get Moon's nakshatra and position
-        moon_nakshatra = next(n["nakshatra"] for n in nakshatras if n["planet"] == "Moon")
-        moon_long = planet_positions["Moon"]
-        
-        # Calculate dashas properly using moon longitude
-        dasha_result = calculate_vimshottari_dasha(moon_long, dob)
-        
-        logger.info(f"Calculated ascendant: {get_sign(asc_sidereal)} {asc_sidereal}°")
-        logger.info(f"Calculated planet positions: {planet_positions}")
-        
-        # Calculate planet strengths
-        planet_strengths = calculate_planet_strengths(jd, latitude, longitude)
-        
-        return {
-            "name": name,
-            "ascendant": get_sign(asc_sidereal),
-            "houses": houses,
-            "nakshatra": {
-                "nakshatra": moon_nakshatra,
-                "pada": next(n["pada"] for n in nakshatras if n["planet"] == "Moon")
-            },
-            "dasha": {
-                "current_maha_dasha": dasha_result["current_maha_dasha"],
-                "years_remaining": dasha_result["years_remaining"],
-                "sequence": dasha_result["sequence"]
-            },
-            "planet_strengths": planet_strengths,
-            "aspects": aspects
-        }
-    except Exception as e:
-        logger.error(f"Error calculating D1 chart: {str(e)}")
-        raise
+    # The chart is computed into the compact Chart model and expanded here
+    from .chart_model import compute_chart
+    return compute_chart(dob, tob, latitude, longitude).to_dict(name)
 
 def get_planet_name(planet: int) -> str:
     """Get the name of a planet from its Swiss Ephemeris ID."""
@@ -658,29 +605,41 @@ def print_chart_as_markdown(chart_data, name, chart_type="Lagna"):
 def convert_to_utc(dt_object_local: datetime, latitude: float, longitude: float) -> datetime:
     """Convert local datetime to UTC."""
     try:
-        # Get timezone from coordinates
-        tf = TimezoneFinder()
-        timezone_str = tf.timezone_at(lat=latitude, lng=longitude)
-        if not timezone_str:
-            raise ValueError(f"Could not determine timezone for coordinates: {latitude}, {longitude}")
-        
-        # Convert to UTC
-        local_tz = pytz.timezone(timezone_str)
-        local_dt = local_tz.localize(dt_object_local)
-        utc_dt = local_dt.astimezone(pytz.UTC)
-        
-        logger.info(f"Converted datetime {dt_object_local} to UTC {utc_dt}")
-        return utc_dt
+        with timed("timezone"):
+            # Get timezone from coordinates
+            resolver = get_timezone_resolver()
+            timezone_str = resolver.timezone_at(latitude, longitude)
+            if not timezone_str:
+                raise ValueError(f"Could not determine timezone for coordinates: {latitude}, {longitude}")
+        
+            # Convert to UTC
+            local_tz = resolver.zone(timezone_str)
+            local_dt = local_tz.localize(dt_object_local)
+            utc_dt = local_dt.astimezone(pytz.UTC)
+        
+            logger.info(f"Converted datetime {dt_object_local} to UTC {utc_dt}")
+            return utc_dt
     except Exception as e:
         logger.error(f"Error converting datetime to UTC: {str(e)}")
         raise
 
+def birth_julian_day(dob: str, tob: str, latitude: float, longitude: float) -> float:
+    """Julian day (UT) of a local birth date and time, parsed as in calculate_d1_chart."""
+    dt_str = f"{dob} {tob}"
+    try:
+        dt_object_local = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
+    except ValueError:
+        dt_object_local = datetime.strptime(dt_str, "%Y-%m-%d %I:%M")
+    utc_dt = convert_to_utc(dt_object_local, latitude, longitude)
+    return swe.julday(utc_dt.year, utc_dt.month, utc_dt.day,
+                      utc_dt.hour + utc_dt.minute/60.0)
+
 def get_nakshatra_pada(longitude: float) -> tuple[str, int]:
     """Calculate Nakshatra and Pada from longitude."""
-    nak_index = int(longitude // 13.3333)
+    nak_index = int(longitude // NAKSHATRA_SPAN)
     nakshatra = NAKSHATRAS[nak_index]
-    offset_in_nak = longitude % 13.3333
-    pada = int(offset_in_nak // 3.3333) + 1
+    offset_in_nak = longitude % NAKSHATRA_SPAN
+    pada = int(offset_in_nak // PADA_SPAN) + 1
     return nakshatra, pada
 
 def get_sign(longitude: float) -> str:
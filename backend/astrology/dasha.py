@@ -0,0 +1,256 @@
+"""
+Vimshottari dasha tree with sub-periods computed lazily.
+
+Five levels are supported: maha, antar, pratyantar, sookshma and prana.
+Eagerly that is 9^5 = 59,049 periods per 120-year cycle, so nodes only
+create their children when a query walks into them.
+
+Boundaries are Julian days (UT). They are measured from the exact birth
+moment and the Moon's exact sidereal longitude, and a year is YEAR_DAYS
+days long. Children divide their parent's span by cumulative fractions,
+and the last child ends exactly where its parent ends, so boundaries do
+not drift with depth.
+
+Queries:
+    DashaTree.active_at(jd)            the chain of periods running at jd
+    DashaTree.periods(start, end, level)  periods of one level overlapping a window,
+                                          in chronological order
+
+Each node's children are found by bisecting their start times, so
+active_at costs O(levels * log 9) and a window query only expands the nodes
+it returns.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+from .charts import DASHA_ORDER, DASHA_YEARS, PLANET_NUMBERS, birth_julian_day
+from .ephemeris import PlanetSnapshot
+
+logger = logging.getLogger(__name__)
+
+LEVEL_NAMES = ["maha", "antar", "pratyantar", "sookshma", "prana"]
+MAX_LEVEL = len(LEVEL_NAMES)
+
+YEAR_DAYS = 365.25
+CYCLE_YEARS = sum(DASHA_YEARS.values())  # 120
+NAKSHATRA_SPAN = 360.0 / 27
+
+# Mahadasha cycles built from the start of the birth cycle (240 years)
+MAHA_CYCLES = 2
+
+_J2000_JD = 2451545.0
+_J2000 = datetime(2000, 1, 1, 12)
+
+_LORD_YEARS = [DASHA_YEARS[lord] for lord in DASHA_ORDER]
+
+
+def jd_to_datetime(jd: float) -> datetime:
+    """UTC datetime for a Julian day (proleptic Gregorian calendar)."""
+    return _J2000 + timedelta(days=jd - _J2000_JD)
+
+
+def datetime_to_jd(dt: datetime) -> float:
+    """Julian day for a naive UTC datetime."""
+    return _J2000_JD + (dt - _J2000).total_seconds() / 86400.0
+
+
+class DashaNode:
+    """One dasha period. Children are created on first access."""
+
+    __slots__ = ("lord", "level", "start", "end", "parent", "_children", "_starts")
+
+    def __init__(self, lord: int, level: int, start: float, end: float, parent: Optional["DashaNode"]):
+        self.lord = lord
+        self.level = level
+        self.start = start
+        self.end = end
+        self.parent = parent
+        self._children: Optional[List["DashaNode"]] = None
+        self._starts: Optional[List[float]] = None
+
+    @property
+    def children(self) -> List["DashaNode"]:
+        """Sub-periods, starting with this period's own lord."""
+        if self._children is None:
+            if self.level >= MAX_LEVEL:
+                self._children, self._starts = [], []
+            else:
+                span = self.end - self.start
+                children = []
+                elapsed = 0
+                for k in range(9):
+                    lord = (self.lord + k) % 9
+                    child_start = self.start + span * elapsed / CYCLE_YEARS
+                    elapsed += _LORD_YEARS[lord]
+                    child_end = self.end if k == 8 else self.start + span * elapsed / CYCLE_YEARS
+                    children.append(DashaNode(lord, self.level + 1, child_start, child_end, self))
+                self._children = children
+                self._starts = [child.start for child in children]
+        return self._children
+
+    def child_at(self, jd: float) -> Optional["DashaNode"]:
+        children = self.children
+        if not children or not (self.start <= jd < self.end):
+            return None
+        return children[bisect_right(self._starts, jd) - 1]
+
+    def lords(self) -> List[str]:
+        """Lords from the mahadasha down to this period."""
+        path = []
+        node = self
+        while node is not None and node.level > 0:
+            path.append(DASHA_ORDER[node.lord])
+            node = node.parent
+        return path[::-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "level": LEVEL_NAMES[self.level - 1],
+            "lord": DASHA_ORDER[self.lord],
+            "lords": self.lords(),
+            "start_jd": self.start,
+            "end_jd": self.end,
+            "start": jd_to_datetime(self.start).isoformat(timespec="seconds"),
+            "end": jd_to_datetime(self.end).isoformat(timespec="seconds")
+        }
+
+
+class DashaTree:
+    """Lazily expanded Vimshottari periods for one birth."""
+
+    def __init__(self, birth_jd: float, moon_longitude: float, year_days: float = YEAR_DAYS,
+                 cycles: int = MAHA_CYCLES):
+        self.birth_jd = birth_jd
+        self.moon_longitude = moon_longitude % 360.0
+        self.year_days = year_days
+
+        nakshatra = int(self.moon_longitude // NAKSHATRA_SPAN)
+        first_lord = nakshatra % 9
+        elapsed_fraction = (self.moon_longitude % NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+        elapsed_days = elapsed_fraction * _LORD_YEARS[first_lord] * year_days
+
+        # Level-0 root spanning every mahadasha that is built
+        start = birth_jd - elapsed_days
+        self.root = DashaNode(first_lord, 0, start, start, None)
+        mahas = []
+        for k in range(9 * cycles):
+            lord = (first_lord + k) % 9
+            end = start + _LORD_YEARS[lord] * year_days
+            mahas.append(DashaNode(lord, 1, start, end, self.root))
+            start = end
+        self.root.end = start
+        self.root._children = mahas
+        self.root._starts = [maha.start for maha in mahas]
+
+    @property
+    def start(self) -> float:
+        return self.root.start
+
+    @property
+    def end(self) -> float:
+        return self.root.end
+
+    @property
+    def balance_years(self) -> float:
+        """Years of the first mahadasha remaining at birth."""
+        return (self.root.children[0].end - self.birth_jd) / self.year_days
+
+    def active_at(self, jd: float, depth: int = MAX_LEVEL) -> List[DashaNode]:
+        """The periods running at jd, from mahadasha down to the given depth."""
+        chain = []
+        node = self.root
+        for _ in range(min(depth, MAX_LEVEL)):
+            node = node.child_at(jd)
+            if node is None:
+                break
+            chain.append(node)
+        return chain
+
+    def periods(self, start: float, end: float, level: int) -> Iterator[DashaNode]:
+        """Periods at level (1-5) that overlap [start, end), in chronological order."""
+        if not 1 <= level <= MAX_LEVEL:
+            raise ValueError(f"Dasha level must be between 1 and {MAX_LEVEL}")
+        return self._overlapping(self.root, max(start, self.start), min(end, self.end), level)
+
+    def _overlapping(self, node: DashaNode, start: float, end: float, level: int) -> Iterator[DashaNode]:
+        if start >= end:
+            return
+        children = node.children
+        index = max(bisect_right(node._starts, start) - 1, 0)
+        while index < len(children) and children[index].start < end:
+            child = children[index]
+            if child.end > start:
+                if child.level == level:
+                    yield child
+                else:
+                    yield from self._overlapping(child, start, end, level)
+            index += 1
+
+
+def build_dasha_tree(dob: str, tob: str, latitude: float, longitude: float) -> DashaTree:
+    """Dasha tree for birth data, from the exact birth moment and Moon longitude."""
+    try:
+        birth_jd = birth_julian_day(dob, tob, latitude, longitude)
+        snapshot = PlanetSnapshot.compute(birth_jd, {'Moon': PLANET_NUMBERS['Moon']})
+        return DashaTree(birth_jd, snapshot.longitude('Moon'))
+    except Exception as e:
+        logger.error(f"Error building dasha tree: {str(e)}")
+        raise
+
+
+def _date_to_jd(value: str) -> float:
+    """Julian day for a "YYYY-MM-DD" or ISO datetime string, taken as UTC unless it has an offset."""
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}. Use YYYY-MM-DD or an ISO datetime")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return datetime_to_jd(moment)
+
+
+def query_dasha_periods(dob: str, tob: str, latitude: float, longitude: float, level: int,
+                        start: Optional[str] = None, end: Optional[str] = None,
+                        cursor: Optional[float] = None, limit: int = 100) -> Dict[str, Any]:
+    """
+    One page of the periods at a level that overlap a date window.
+
+    The window defaults to the whole tree. cursor is the end_jd of the last
+    period on the previous page (returned as next_cursor); periods at one
+    level do not overlap, so the next page starts there.
+    """
+    tree = build_dasha_tree(dob, tob, latitude, longitude)
+    window_start = _date_to_jd(start) if start else tree.start
+    window_end = _date_to_jd(end) if end else tree.end
+    if cursor is not None:
+        window_start = max(window_start, cursor)
+
+    page = []
+    for node in tree.periods(window_start, window_end, level):
+        if len(page) == limit:
+            break
+        page.append(node)
+    has_more = len(page) == limit and page[-1].end < min(window_end, tree.end)
+
+    return {
+        "level": LEVEL_NAMES[level - 1],
+        "birth_jd": tree.birth_jd,
+        "balance_years": tree.balance_years,
+        "periods": [node.to_dict() for node in page],
+        "next_cursor": page[-1].end if has_more else None
+    }
+
+
+def query_active_dasha(dob: str, tob: str, latitude: float, longitude: float,
+                       at: Optional[str] = None, depth: int = MAX_LEVEL) -> Dict[str, Any]:
+    """The chain of periods running at a date (default: now)."""
+    tree = build_dasha_tree(dob, tob, latitude, longitude)
+    jd = _date_to_jd(at) if at else datetime_to_jd(datetime.utcnow())
+    return {
+        "jd": jd,
+        "birth_jd": tree.birth_jd,
+        "balance_years": tree.balance_years,
+        "periods": [node.to_dict() for node in tree.active_at(jd, depth)]
+    }
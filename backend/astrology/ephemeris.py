@@ -0,0 +1,145 @@
+"""
+Swiss Ephemeris access layer.
+
+Every swisseph call made while building a chart goes through the wrappers in
+this module so that the number of ephemeris calls per request can be counted,
+and so that all body positions for a Julian day are computed once into a
+PlanetSnapshot that the downstream stages read from.
+
+EPHEMERIS_ENGINE selects where snapshot positions come from: "swisseph"
+(default) or "table" for the precomputed tables in ephemeris_tables.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import swisseph as swe
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+EPHEMERIS_ENGINE = os.getenv('EPHEMERIS_ENGINE', 'swisseph').lower()
+
+
+class EphemerisCallCounter:
+    """Number of swisseph calls and table lookups made inside a count_ephemeris_calls() block."""
+
+    __slots__ = ("calls", "table_lookups")
+
+    def __init__(self):
+        self.calls = 0
+        self.table_lookups = 0
+
+
+_call_counter: ContextVar[Optional[EphemerisCallCounter]] = ContextVar(
+    "ephemeris_call_counter", default=None
+)
+
+
+@contextmanager
+def count_ephemeris_calls() -> Iterator[EphemerisCallCounter]:
+    """Count the swisseph calls made by the current request (or task)."""
+    counter = EphemerisCallCounter()
+    token = _call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_counter.reset(token)
+
+
+def _record_call() -> None:
+    counter = _call_counter.get()
+    if counter is not None:
+        counter.calls += 1
+
+
+def _record_table_lookups(lookups: int) -> None:
+    counter = _call_counter.get()
+    if counter is not None:
+        counter.table_lookups += lookups
+
+
+def _get_table_engine():
+    from .ephemeris_tables import get_ephemeris_table
+    return get_ephemeris_table()
+
+
+def calc_ut(jd_ut: float, body: int, flags: int = swe.FLG_SWIEPH | swe.FLG_SPEED):
+    """Counted wrapper around swe.calc_ut."""
+    _record_call()
+    return swe.calc_ut(jd_ut, body, flags)
+
+
+def get_ayanamsa_ut(jd_ut: float) -> float:
+    """Counted wrapper around swe.get_ayanamsa_ut."""
+    _record_call()
+    return swe.get_ayanamsa_ut(jd_ut)
+
+
+def houses(jd_ut: float, latitude: float, longitude: float):
+    """Counted wrapper around swe.houses."""
+    _record_call()
+    return swe.houses(jd_ut, latitude, longitude)
+
+
+class PlanetSnapshot:
+    """Sidereal longitudes and daily speeds of every body at one Julian day."""
+
+    __slots__ = ("jd", "ayanamsa", "longitudes", "speeds")
+
+    def __init__(self, jd: float, ayanamsa: float,
+                 longitudes: Dict[str, float], speeds: Dict[str, float]):
+        self.jd = jd
+        self.ayanamsa = ayanamsa
+        self.longitudes = longitudes
+        self.speeds = speeds
+
+    @classmethod
+    def compute(cls, jd: float, bodies: Dict[str, int]) -> "PlanetSnapshot":
+        """
+        Compute positions for all bodies with one ayanamsa call and one
+        calc_ut call per body. Ketu is derived from Rahu when present.
+        """
+        if EPHEMERIS_ENGINE == 'table':
+            table = _get_table_engine()
+            if table is not None and table.covers(jd):
+                return cls.from_table(table, jd, bodies)
+
+        ayanamsa = get_ayanamsa_ut(jd)
+        longitudes = {}
+        speeds = {}
+        for name, number in bodies.items():
+            data = calc_ut(jd, int(number))
+            longitudes[name] = (data[0][0] - ayanamsa) % 360
+            speeds[name] = data[0][3]
+
+        if 'Rahu' in longitudes:
+            longitudes['Ketu'] = (longitudes['Rahu'] + 180) % 360
+            speeds['Ketu'] = speeds['Rahu']
+
+        return cls(jd, ayanamsa, longitudes, speeds)
+
+    @classmethod
+    def from_table(cls, table, jd: float, bodies: Dict[str, int]) -> "PlanetSnapshot":
+        """Build a snapshot by interpolating a precomputed EphemerisTable."""
+        ayanamsa = table.ayanamsa(jd)
+        longitudes, speeds = table.snapshot(jd, bodies)
+        _record_table_lookups(len(bodies) + 1)
+
+        if 'Rahu' in longitudes:
+            longitudes['Ketu'] = (longitudes['Rahu'] + 180) % 360
+            speeds['Ketu'] = speeds['Rahu']
+
+        return cls(jd, ayanamsa, longitudes, speeds)
+
+    def longitude(self, name: str) -> float:
+        """Sidereal longitude of a body in degrees."""
+        return self.longitudes[name]
+
+    def speed(self, name: str) -> float:
+        """Daily motion of a body in degrees per day."""
+        return self.speeds[name]
+
+    def is_retrograde(self, name: str) -> bool:
+        """True when the body is moving backwards through the zodiac."""
+        return self.speeds[name] < 0
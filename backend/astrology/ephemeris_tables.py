@@ -0,0 +1,376 @@
+"""
+Precomputed ephemeris tables ("table engine").
+
+An offline build samples the sidereal longitude of every body in
+PLANET_NUMBERS, plus the Lahiri ayanamsa, on a fixed grid, and stores each
+sample with its derivative taken by a fourth-order central difference of
+the samples (swisseph's own speed is not smooth enough for the outer
+bodies). Everything goes into one binary file. At runtime the file is
+memory-mapped and read with cubic Hermite interpolation on those values and
+derivatives.
+
+Error bound: over 1900-2100 with the default grid (Moon hourly; Sun, Mercury,
+Venus and Mars every 6 hours; the outer bodies, Rahu and the ayanamsa daily)
+the interpolated sidereal longitude stays within TABLE_ERROR_BOUND_ARCSEC
+(5 arc-seconds) of swisseph for every body; the Sun, Moon and Venus are
+within 0.1". The remaining error comes from small discontinuities in
+swisseph's own output where its file segments join, which no smooth
+interpolant follows; a finer grid does not reduce it.
+`python -m astrology.ephemeris_tables verify` checks this on random dates and
+exits non-zero if the bound is exceeded; tests/test_ephemeris_tables.py runs
+the same check on a one-year table.
+
+Speed (`bench`): a vectorized lookup over many dates is about 100x faster
+than swisseph per snapshot, but a single-date table snapshot is only about
+5x faster, short of the 10x target. Its cost is Python overhead per series,
+not interpolation, so bulk work should use the vectorized path.
+
+Enable it with EPHEMERIS_ENGINE=table; EPHEMERIS_TABLE_PATH points at the
+file. Dates outside the table fall back to swisseph.
+
+    python -m astrology.ephemeris_tables build --start-year 1900 --end-year 2100
+    python -m astrology.ephemeris_tables verify --samples 20000
+    python -m astrology.ephemeris_tables bench
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, Tuple
+import numpy as np
+import swisseph as swe
+import logging
+
+from .charts import PLANET_NUMBERS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_PATH = os.getenv(
+    'EPHEMERIS_TABLE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ephe', 'ephemeris_tables.bin')
+)
+
+TABLE_ERROR_BOUND_ARCSEC = 5.0
+# Speedup over swisseph that a table snapshot was meant to reach
+SNAPSHOT_SPEEDUP_TARGET = 10.0
+
+AYANAMSA_SERIES = 'Ayanamsa'
+
+# Sampling step in days per series; everything else is sampled daily
+GRID_STEPS = {
+    'Moon': 1.0 / 24,
+    'Sun': 0.25,
+    'Mercury': 0.25,
+    'Venus': 0.25,
+    'Mars': 0.25,
+}
+DEFAULT_GRID_STEP = 1.0
+
+_MAGIC = b'VEDTBL01'
+_HEADER = struct.Struct('<8sIIdd')           # magic, version, series count, jd start, jd end
+_SERIES_ENTRY = struct.Struct('<16sdQQ')     # name, step (days), sample count, byte offset
+_FORMAT_VERSION = 1
+
+
+class EphemerisTable:
+    """Memory-mapped ephemeris table with cubic Hermite interpolation."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, series_count, self.jd_start, self.jd_end = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {_FORMAT_VERSION} ephemeris table")
+
+        # name -> (step, last segment index, scalar view, array view); both
+        # views share the mmap
+        self._series: Dict[str, Tuple[float, int, memoryview, np.ndarray]] = {}
+        buffer = memoryview(self._mmap)
+        for i in range(series_count):
+            raw_name, step, count, offset = _SERIES_ENTRY.unpack_from(
+                self._mmap, _HEADER.size + i * _SERIES_ENTRY.size
+            )
+            name = raw_name.rstrip(b'\0').decode('ascii')
+            size = count * 2 * 8
+            scalar = buffer[offset:offset + size].cast('d')
+            array = np.frombuffer(self._mmap, dtype='<f8', count=count * 2, offset=offset).reshape(count, 2)
+            self._series[name] = (step, count - 1, scalar, array)
+
+    @property
+    def bodies(self):
+        return [name for name in self._series if name != AYANAMSA_SERIES]
+
+    def covers(self, jd: float) -> bool:
+        return self.jd_start <= jd < self.jd_end
+
+    def _interpolate(self, name: str, jd: float, wrap: bool) -> Tuple[float, float]:
+        step, last, values, _ = self._series[name]
+        x = (jd - self.jd_start) / step
+        i = int(x)
+        if x < 0 or i >= last:
+            raise ValueError(f"Julian day {jd} is outside the ephemeris table range")
+        t = x - i
+        k = 2 * i
+        p0 = values[k]
+        m0 = values[k + 1] * step
+        delta = values[k + 2] - p0
+        if wrap:
+            if delta > 180:
+                delta -= 360
+            elif delta < -180:
+                delta += 360
+        m1 = values[k + 3] * step
+
+        # Hermite segment as a cubic in t: p0 + m0 t + c t^2 + d t^3
+        c = 3 * delta - 2 * m0 - m1
+        d = m0 + m1 - 2 * delta
+        value = p0 + t * (m0 + t * (c + t * d))
+        rate = (m0 + t * (2 * c + t * 3 * d)) / step
+        if wrap:
+            value %= 360
+        return value, rate
+
+    def position(self, body: str, jd: float) -> Tuple[float, float]:
+        """Sidereal longitude (degrees) and speed (degrees/day) of a body."""
+        return self._interpolate(body, jd, True)
+
+    def ayanamsa(self, jd: float) -> float:
+        """Lahiri ayanamsa in degrees."""
+        return self._interpolate(AYANAMSA_SERIES, jd, False)[0]
+
+    def snapshot(self, jd: float, bodies) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Longitudes and speeds of several bodies at one Julian day.
+
+        Same arithmetic as position(), inlined into one loop because this is
+        the per-chart hot path.
+        """
+        series = self._series
+        offset = jd - self.jd_start
+        longitudes = {}
+        speeds = {}
+        for name in bodies:
+            step, last, values, _ = series[name]
+            x = offset / step
+            i = int(x)
+            if x < 0 or i >= last:
+                raise ValueError(f"Julian day {jd} is outside the ephemeris table range")
+            t = x - i
+            k = 2 * i
+            p0 = values[k]
+            m0 = values[k + 1] * step
+            delta = values[k + 2] - p0
+            if delta > 180:
+                delta -= 360
+            elif delta < -180:
+                delta += 360
+            m1 = values[k + 3] * step
+            c = 3 * delta - 2 * m0 - m1
+            d = m0 + m1 - 2 * delta
+            longitudes[name] = (p0 + t * (m0 + t * (c + t * d))) % 360
+            speeds[name] = (m0 + t * (2 * c + t * 3 * d)) / step
+        return longitudes, speeds
+
+    def _interpolate_array(self, name: str, jd: np.ndarray, wrap: bool) -> Tuple[np.ndarray, np.ndarray]:
+        step, last, _, samples = self._series[name]
+        jd = np.asarray(jd, dtype=np.float64)
+        x = (jd - self.jd_start) / step
+        i = np.floor(x).astype(np.int64)
+        if np.any(i < 0) or np.any(i >= last):
+            raise ValueError("Julian days outside the ephemeris table range")
+        t = x - i
+        p0 = samples[i, 0]
+        m0 = samples[i, 1] * step
+        delta = samples[i + 1, 0] - p0
+        if wrap:
+            delta = np.mod(delta + 180.0, 360.0) - 180.0
+        m1 = samples[i + 1, 1] * step
+
+        c = 3 * delta - 2 * m0 - m1
+        d = m0 + m1 - 2 * delta
+        value = p0 + t * (m0 + t * (c + t * d))
+        rate = (m0 + t * (2 * c + t * 3 * d)) / step
+        if wrap:
+            value = np.mod(value, 360.0)
+        return value, rate
+
+    def positions(self, body: str, jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized position() over an array of Julian days."""
+        return self._interpolate_array(body, jd, True)
+
+    def ayanamsas(self, jd: np.ndarray) -> np.ndarray:
+        """Vectorized ayanamsa() over an array of Julian days."""
+        return self._interpolate_array(AYANAMSA_SERIES, jd, False)[0]
+
+
+_table = None
+_table_loaded = False
+
+
+def get_ephemeris_table():
+    """Return the process-wide table, or None if the table file is unavailable."""
+    global _table, _table_loaded
+    if not _table_loaded:
+        _table_loaded = True
+        if os.path.exists(DEFAULT_TABLE_PATH):
+            _table = EphemerisTable(DEFAULT_TABLE_PATH)
+            logger.info(f"Loaded ephemeris table from {DEFAULT_TABLE_PATH}")
+        else:
+            logger.warning(f"EPHEMERIS_ENGINE=table but {DEFAULT_TABLE_PATH} does not exist; using swisseph")
+    return _table
+
+
+# --- Offline build ---
+
+def _derivative(values: np.ndarray, step: float) -> np.ndarray:
+    """Fourth-order central difference; drops two samples at each end."""
+    return (values[:-4] - 8 * values[1:-3] + 8 * values[3:-1] - values[4:]) / (12 * step)
+
+
+def _sample_series(jd_start: float, step: float, count: int, number: int) -> np.ndarray:
+    """
+    Sample a body's sidereal longitude and its derivative.
+
+    The derivative is taken from the samples rather than from swisseph's
+    reported speed, which is not smooth enough for Hermite interpolation of
+    the outer planets.
+    """
+    jds = jd_start + step * np.arange(-2, count + 2)
+    longitudes = np.empty(len(jds), dtype=np.float64)
+    for i, jd in enumerate(jds):
+        jd = float(jd)
+        longitudes[i] = (swe.calc_ut(jd, number)[0][0] - swe.get_ayanamsa_ut(jd)) % 360
+    unwrapped = longitudes[0] + np.concatenate(
+        [[0.0], np.cumsum(np.mod(np.diff(longitudes) + 180.0, 360.0) - 180.0)]
+    )
+    return np.column_stack([longitudes[2:-2], _derivative(unwrapped, step)])
+
+
+def build_table(path: str, start_year: int, end_year: int) -> None:
+    """Sample every body on its grid and write the table file."""
+    jd_start = swe.julday(start_year, 1, 1, 0.0)
+    jd_end = swe.julday(end_year + 1, 1, 1, 0.0)
+
+    day_count = int(math.ceil(jd_end - jd_start)) + 1
+    ayanamsa_jd = jd_start + DEFAULT_GRID_STEP * np.arange(-2, day_count + 2)
+    ayanamsa = np.array([swe.get_ayanamsa_ut(float(jd)) for jd in ayanamsa_jd])
+    series = {
+        AYANAMSA_SERIES: (DEFAULT_GRID_STEP, np.column_stack([ayanamsa[2:-2], _derivative(ayanamsa, DEFAULT_GRID_STEP)]))
+    }
+
+    for name, number in PLANET_NUMBERS.items():
+        step = GRID_STEPS.get(name, DEFAULT_GRID_STEP)
+        count = int(math.ceil((jd_end - jd_start) / step)) + 1
+        started = time.perf_counter()
+        series[name] = (step, _sample_series(jd_start, step, count, int(number)))
+        logger.info(f"Sampled {name}: {count} points in {time.perf_counter() - started:.1f}s")
+
+    offset = _HEADER.size + len(series) * _SERIES_ENTRY.size
+    offset += (-offset) % 8
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(series), jd_start, jd_end))
+        entries = []
+        for name, (step, samples) in series.items():
+            f.write(_SERIES_ENTRY.pack(name.encode('ascii'), step, len(samples), offset))
+            entries.append(samples)
+            offset += samples.nbytes
+        f.write(b'\0' * ((-f.tell()) % 8))
+        for samples in entries:
+            f.write(np.ascontiguousarray(samples, dtype='<f8').tobytes())
+    os.replace(tmp_path, path)
+
+
+def verify_table(table: EphemerisTable, samples: int, seed: int = 0) -> Dict[str, float]:
+    """Maximum absolute sidereal longitude error per body in arc-seconds."""
+    rng = np.random.default_rng(seed)
+    jds = rng.uniform(table.jd_start, table.jd_end - 1, samples)
+    errors = {name: 0.0 for name in table.bodies}
+    errors[AYANAMSA_SERIES] = 0.0
+    for jd in jds:
+        jd = float(jd)
+        ayanamsa = swe.get_ayanamsa_ut(jd)
+        errors[AYANAMSA_SERIES] = max(errors[AYANAMSA_SERIES], abs(table.ayanamsa(jd) - ayanamsa) * 3600)
+        for name in table.bodies:
+            expected = (swe.calc_ut(jd, int(PLANET_NUMBERS[name]))[0][0] - ayanamsa) % 360
+            actual = table.position(name, jd)[0]
+            error = abs((actual - expected + 180) % 360 - 180) * 3600
+            errors[name] = max(errors[name], error)
+    return errors
+
+
+def _bench(table: EphemerisTable, samples: int) -> None:
+    from .ephemeris import PlanetSnapshot
+    jd_array = np.random.default_rng(1).uniform(table.jd_start, table.jd_end - 1, samples)
+    jds = [float(jd) for jd in jd_array]
+
+    started = time.perf_counter()
+    for jd in jds:
+        PlanetSnapshot.compute(jd, PLANET_NUMBERS)
+    swisseph_time = (time.perf_counter() - started) / samples
+
+    started = time.perf_counter()
+    for jd in jds:
+        PlanetSnapshot.from_table(table, jd, PLANET_NUMBERS)
+    table_time = (time.perf_counter() - started) / samples
+
+    started = time.perf_counter()
+    for name in PLANET_NUMBERS:
+        table.positions(name, jd_array)
+    table.ayanamsas(jd_array)
+    vector_time = (time.perf_counter() - started) / samples
+
+    lookups = len(PLANET_NUMBERS) + 1
+    print(f"swisseph snapshot:   {swisseph_time * 1e6:8.2f} us")
+    print(f"table snapshot:      {table_time * 1e6:8.2f} us  ({swisseph_time / table_time:.1f}x faster)")
+    print(f"vectorized snapshot: {vector_time * 1e6:8.2f} us  ({swisseph_time / vector_time:.1f}x faster, "
+          f"{vector_time / lookups * 1e9:.0f} ns per lookup)")
+    if swisseph_time / table_time < SNAPSHOT_SPEEDUP_TARGET:
+        print(f"note: the table snapshot misses the {SNAPSHOT_SPEEDUP_TARGET:.0f}x target; "
+              f"its cost is Python overhead per series, use the vectorized path for bulk work")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the precomputed ephemeris table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="sample swisseph and write the table file")
+    build.add_argument("--start-year", type=int, default=1900)
+    build.add_argument("--end-year", type=int, default=2100)
+    build.add_argument("--out", default=DEFAULT_TABLE_PATH)
+    verify = sub.add_parser("verify", help="compare the table against swisseph on random dates")
+    verify.add_argument("--samples", type=int, default=20000)
+    verify.add_argument("--path", default=DEFAULT_TABLE_PATH)
+    bench = sub.add_parser("bench", help="time table snapshots against swisseph snapshots")
+    bench.add_argument("--samples", type=int, default=20000)
+    bench.add_argument("--path", default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_table(args.out, args.start_year, args.end_year)
+        print(f"Wrote {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
+        return 0
+
+    table = EphemerisTable(args.path)
+    if args.command == "bench":
+        _bench(table, args.samples)
+        return 0
+
+    errors = verify_table(table, args.samples)
+    for name, error in errors.items():
+        print(f"{name:10s} max error {error:.4f}\"")
+    worst = max(errors.values())
+    if worst > TABLE_ERROR_BOUND_ARCSEC:
+        print(f"FAILED: {worst:.4f}\" exceeds the {TABLE_ERROR_BOUND_ARCSEC}\" bound")
+        return 1
+    print(f"OK: all bodies within {TABLE_ERROR_BOUND_ARCSEC}\"")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Columnar export of D1 charts for analytics (Arrow IPC or Parquet).
+
+Birth records (CSV or JSON Lines with dob, tob, latitude, longitude and an
+optional id, from a file or stdin) are read as a stream, computed chunk by chunk with
+calculate_d1_charts_batch and written as one record batch (Arrow) or row
+group (Parquet) per chunk, so memory stays bounded by the chunk size
+whatever the input size.
+
+Columns, one row per record:
+    id, dob, tob, latitude, longitude   passed through from the input
+    jd_ut, ascendant                    float64
+    ascendant_sign                      int8 index into ZODIAC_SIGNS
+    <body>_longitude                    float64 sidereal longitude
+    <body>_sign, <body>_house           int8 (sign index, house 1-12)
+    <body>_nakshatra                    dictionary<int8, string>
+    <body>_pada                         int8
+    dasha_lord                          dictionary<int8, string>
+    dasha_balance_years                 float64
+
+pyarrow is optional: it is imported only when an Arrow or Parquet file is
+written (pip install pyarrow). The jsonl format writes the same columns as
+JSON Lines and needs nothing extra.
+"""
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import csv
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from .batch import BATCH_BODIES, calculate_d1_charts_batch
+from .charts import DASHA_ORDER, NAKSHATRAS, ZODIAC_SIGNS
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('arrow', 'parquet', 'jsonl')
+# Codecs each format accepts; Arrow IPC buffers only support lz4 and zstd
+EXPORT_COMPRESSION = {
+    'arrow': ('none', 'lz4', 'zstd'),
+    'parquet': ('none', 'snappy', 'gzip', 'lz4', 'zstd'),
+    'jsonl': ('none',)
+}
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '10000'))
+
+_EXTENSIONS = {
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.parquet': 'parquet',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise RuntimeError(f"Arrow and Parquet export need pyarrow (pip install pyarrow): {str(e)}")
+    return pyarrow
+
+
+def format_for_path(path: str) -> str:
+    """Export format implied by a file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError(f"Cannot infer the export format from {path}; use one of {', '.join(_EXTENSIONS)}")
+    return _EXTENSIONS[extension]
+
+
+def parse_birth_records(lines: Iterable[str], fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parse CSV (with a header) or JSON Lines birth records from lines of text.
+    Without fmt, a first line starting with "{" means JSON Lines.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    lines = chain([first], lines)
+    if (fmt or ('jsonl' if first.lstrip().startswith('{') else 'csv')) == 'jsonl':
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(lines)
+
+
+def read_birth_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream birth records from a CSV or JSON Lines file, or from stdin when path is "-"."""
+    if path == '-':
+        yield from parse_birth_records(sys.stdin)
+        return
+    fmt = 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else None
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from parse_birth_records(f, fmt)
+
+
+def chunked(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split a stream into lists of at most size items."""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def chart_columns(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Compute one chunk of records into the export columns (NumPy arrays)."""
+    dobs = [str(record['dob']) for record in records]
+    tobs = [str(record['tob']) for record in records]
+    latitudes = np.array([float(record['latitude']) for record in records])
+    longitudes = np.array([float(record['longitude']) for record in records])
+    batch = calculate_d1_charts_batch(dobs, tobs, latitudes, longitudes)
+
+    columns = {
+        "id": np.array([str(record.get('id', '')) for record in records], dtype=object),
+        "dob": np.array(dobs, dtype=object),
+        "tob": np.array(tobs, dtype=object),
+        "latitude": latitudes,
+        "longitude": longitudes,
+        "jd_ut": batch["jd_ut"],
+        "ascendant": batch["ascendant"],
+        "ascendant_sign": batch["ascendant_sign"],
+    }
+    for j, body in enumerate(BATCH_BODIES):
+        key = body.lower()
+        columns[f"{key}_longitude"] = batch["longitudes"][:, j]
+        columns[f"{key}_sign"] = batch["signs"][:, j]
+        columns[f"{key}_house"] = batch["houses"][:, j]
+        columns[f"{key}_nakshatra"] = batch["nakshatras"][:, j]
+        columns[f"{key}_pada"] = batch["padas"][:, j]
+    columns["dasha_lord"] = batch["dasha_lord"]
+    columns["dasha_balance_years"] = batch["dasha_balance_years"]
+    return columns
+
+
+def _dictionary(name: str) -> Optional[List[str]]:
+    if name.endswith("_nakshatra"):
+        return NAKSHATRAS
+    if name == "dasha_lord":
+        return DASHA_ORDER
+    return None
+
+
+def arrow_schema():
+    """Arrow schema of the export columns."""
+    pa = _require_pyarrow()
+    fields = [
+        pa.field("id", pa.string()),
+        pa.field("dob", pa.string()),
+        pa.field("tob", pa.string()),
+        pa.field("latitude", pa.float64()),
+        pa.field("longitude", pa.float64()),
+        pa.field("jd_ut", pa.float64()),
+        pa.field("ascendant", pa.float64()),
+        pa.field("ascendant_sign", pa.int8()),
+    ]
+    for body in BATCH_BODIES:
+        key = body.lower()
+        fields += [
+            pa.field(f"{key}_longitude", pa.float64()),
+            pa.field(f"{key}_sign", pa.int8()),
+            pa.field(f"{key}_house", pa.int8()),
+            pa.field(f"{key}_nakshatra", pa.dictionary(pa.int8(), pa.string())),
+            pa.field(f"{key}_pada", pa.int8()),
+        ]
+    fields += [
+        pa.field("dasha_lord", pa.dictionary(pa.int8(), pa.string())),
+        pa.field("dasha_balance_years", pa.float64()),
+    ]
+    return pa.schema(fields, metadata={"sign_names": json.dumps(ZODIAC_SIGNS), "bodies": json.dumps(BATCH_BODIES)})
+
+
+def to_record_batch(columns: Dict[str, np.ndarray], schema):
+    """Arrow RecordBatch from chart_columns output; every chunk shares the same dictionaries."""
+    pa = _require_pyarrow()
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        dictionary = _dictionary(field.name)
+        if dictionary is not None:
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(values, pa.int8()), pa.array(dictionary)))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ArrowWriter:
+    def __init__(self, path: str, compression: Optional[str]):
+        pa = _require_pyarrow()
+        self.schema = arrow_schema()
+        options = pa.ipc.IpcWriteOptions(compression=None if compression == 'none' else compression)
+        self._writer = pa.ipc.new_file(path, self.schema, options=options)
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        self._writer.write_batch(to_record_batch(columns, self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, compression: Optional[str]):
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        self.schema = arrow_schema()
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression or 'snappy')
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        self._writer.write_batch(to_record_batch(columns, self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _JsonLinesWriter:
+    def __init__(self, path: str, compression: Optional[str]):
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, columns: Dict[str, np.ndarray]) -> None:
+        names = list(columns)
+        values = [
+            [NAKSHATRAS[i] for i in column] if name.endswith("_nakshatra")
+            else [DASHA_ORDER[i] for i in column] if name == "dasha_lord"
+            else column.tolist()
+            for name, column in columns.items()
+        ]
+        for row in zip(*values):
+            self._file.write(json.dumps(dict(zip(names, row))))
+            self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+_WRITERS = {'arrow': _ArrowWriter, 'parquet': _ParquetWriter, 'jsonl': _JsonLinesWriter}
+
+
+def check_compression(fmt: str, compression: Optional[str]) -> None:
+    """Raise ValueError unless the format exists and supports the compression."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}. Supported: {', '.join(EXPORT_FORMATS)}")
+    if compression and compression not in EXPORT_COMPRESSION[fmt]:
+        raise ValueError(f"{fmt} export does not support {compression} compression. "
+                         f"Supported: {', '.join(EXPORT_COMPRESSION[fmt])}")
+
+
+def open_writer(path: str, fmt: str, compression: Optional[str] = None):
+    """Writer with write(columns) and close() for one export format."""
+    check_compression(fmt, compression)
+    return _WRITERS[fmt](path, compression)
+
+
+def export_charts(records: Iterable[Dict[str, Any]], out_path: str, fmt: Optional[str] = None,
+                  chunk_size: int = EXPORT_CHUNK_SIZE, compression: Optional[str] = None,
+                  progress=None) -> int:
+    """
+    Compute charts for a stream of birth records and write them to out_path
+    in chunk_size pieces. Returns the number of rows written; progress, if
+    given, is called with the running row count after every chunk.
+    """
+    tmp_path = out_path + '.tmp'
+    writer = open_writer(tmp_path, fmt or format_for_path(out_path), compression)
+    rows = 0
+    try:
+        for chunk in chunked(records, chunk_size):
+            writer.write(chart_columns(chunk))
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows)
+    except Exception as e:
+        writer.close()
+        os.remove(tmp_path)
+        logger.error(f"Error exporting charts: {str(e)}")
+        raise
+    writer.close()
+    os.replace(tmp_path, out_path)
+    return rows
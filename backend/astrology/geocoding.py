@@ -0,0 +1,344 @@
+"""
+Offline geocoding against a local GeoNames-style gazetteer.
+
+The gazetteer keeps coordinates, population and timezone in compact arrays
+indexed by row id, plus a hash index from normalized place names (and their
+alternate names) to row ids. Lookups are a dict probe; misses get a single
+edit (typo) fuzzy pass before giving up. Qualifiers after the first comma
+("Paris, Texas", "New Delhi, India") are matched against the row's country
+code, country name and first-level admin name when those files are present.
+
+A hit only counts when the name matched exactly and every qualifier matched.
+Typo corrections and matches whose qualifiers could not be checked are
+guesses: they go to the fallback like a miss and are only returned (with a
+warning, never written back) when the fallback is disabled or unreachable.
+
+Nominatim is only used as a fallback for places the gazetteer does not
+know, and its answers are written back to the index (and to an overlay file
+when GAZETTEER_OVERLAY_PATH is set) so the next lookup is local.
+
+Configuration:
+    GAZETTEER_PATH          GeoNames dump (e.g. cities500.txt or .zip); the
+                            directory may also hold countryInfo.txt and
+                            admin1CodesASCII.txt
+    GAZETTEER_OVERLAY_PATH  file that Nominatim results are appended to
+    GEOCODER_FALLBACK       "nominatim" (default) or "none"
+"""
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import io
+import logging
+import os
+import re
+import threading
+import unicodedata
+import zipfile
+
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.getenv('GAZETTEER_PATH')
+GAZETTEER_OVERLAY_PATH = os.getenv('GAZETTEER_OVERLAY_PATH')
+GEOCODER_FALLBACK = os.getenv('GEOCODER_FALLBACK', 'nominatim').lower()
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_FUZZY_ALPHABET = "abcdefghijklmnopqrstuvwxyz "
+
+
+class GeocoderUnavailableError(Exception):
+    """The fallback geocoder timed out or could not be reached."""
+
+
+class GeoLocation(NamedTuple):
+    name: str
+    latitude: float
+    longitude: float
+    timezone: Optional[str]
+    country_code: str
+
+
+def normalize_place_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_name = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", ascii_name.lower()).strip()
+
+
+def _single_edits(word: str) -> Iterable[str]:
+    """All strings one delete, transpose, replace or insert away from word."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    for left, right in splits:
+        if right:
+            yield left + right[1:]
+            for ch in _FUZZY_ALPHABET:
+                if ch != right[0]:
+                    yield left + ch + right[1:]
+        if len(right) > 1:
+            yield left + right[1] + right[0] + right[2:]
+        for ch in _FUZZY_ALPHABET:
+            yield left + ch + right
+
+
+class Gazetteer:
+    """In-memory place index with array-backed coordinate storage."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.populations = array('q')
+        self.country_codes: List[str] = []
+        self.admin1_codes: List[str] = []
+        self.timezone_ids = array('H')
+        self.timezones: List[str] = []
+        self._timezone_index: Dict[str, int] = {}
+        self._index: Dict[str, Tuple[int, ...]] = {}
+        self._country_names: Dict[str, str] = {}   # normalized country name -> code
+        self._admin1_names: Dict[str, str] = {}    # "CC.code" -> normalized admin1 name
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _timezone_id(self, timezone: Optional[str]) -> int:
+        timezone = timezone or ""
+        tz_id = self._timezone_index.get(timezone)
+        if tz_id is None:
+            tz_id = len(self.timezones)
+            self.timezones.append(timezone)
+            self._timezone_index[timezone] = tz_id
+        return tz_id
+
+    def _index_name(self, key: str, row: int) -> None:
+        if not key:
+            return
+        rows = self._index.get(key)
+        if rows is None:
+            self._index[key] = (row,)
+        elif row not in rows:
+            self._index[key] = rows + (row,)
+
+    def add(self, name: str, latitude: float, longitude: float, timezone: Optional[str] = None,
+            population: int = 0, country_code: str = "", admin1_code: str = "",
+            aliases: Iterable[str] = ()) -> int:
+        """Add a place and index it under its name and aliases. Returns the row id."""
+        with self._lock:
+            row = len(self.names)
+            self.names.append(name)
+            self.latitudes.append(latitude)
+            self.longitudes.append(longitude)
+            self.populations.append(population)
+            self.country_codes.append(country_code)
+            self.admin1_codes.append(admin1_code)
+            self.timezone_ids.append(self._timezone_id(timezone))
+            self._index_name(normalize_place_name(name), row)
+            for alias in aliases:
+                self._index_name(normalize_place_name(alias), row)
+            return row
+
+    def load_geonames(self, path: str, include_alternate_names: bool = True) -> int:
+        """
+        Load a GeoNames dump (tab separated, 19 columns; plain or zipped).
+        countryInfo.txt and admin1CodesASCII.txt next to it are loaded too.
+        Returns the number of places added.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        self._load_country_info(os.path.join(directory, "countryInfo.txt"))
+        self._load_admin1_codes(os.path.join(directory, "admin1CodesASCII.txt"))
+
+        added = 0
+        for line in _read_lines(path):
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 18 or line.startswith("#"):
+                continue
+            aliases = [fields[2]]
+            if include_alternate_names and fields[3]:
+                aliases.extend(fields[3].split(","))
+            self.add(
+                name=fields[1],
+                latitude=float(fields[4]),
+                longitude=float(fields[5]),
+                timezone=fields[17] or None,
+                population=int(fields[14] or 0),
+                country_code=fields[8],
+                admin1_code=fields[10],
+                aliases=aliases
+            )
+            added += 1
+        logger.info(f"Loaded {added} places from {path}")
+        return added
+
+    def _load_country_info(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        for line in _read_lines(path):
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) > 4:
+                self._country_names[normalize_place_name(fields[4])] = fields[0]
+                self._country_names[fields[1].lower()] = fields[0]  # ISO3
+
+    def _load_admin1_codes(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        for line in _read_lines(path):
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) > 2:
+                self._admin1_names[fields[0]] = normalize_place_name(fields[2])
+
+    def _matches_qualifier(self, row: int, qualifier: str) -> bool:
+        country = self.country_codes[row]
+        if qualifier == country.lower() or self._country_names.get(qualifier) == country:
+            return True
+        admin1 = self._admin1_names.get(f"{country}.{self.admin1_codes[row]}")
+        return admin1 is not None and (qualifier == admin1 or qualifier == self.admin1_codes[row].lower())
+
+    def _best(self, rows: Iterable[int], qualifiers: List[str]) -> Tuple[Optional[int], bool]:
+        """Most populous row, preferring rows that match every qualifier; and whether one did."""
+        rows = list(rows)
+        if not rows:
+            return None, False
+        if qualifiers:
+            qualified = [row for row in rows
+                         if all(self._matches_qualifier(row, q) for q in qualifiers)]
+            if not qualified:
+                return max(rows, key=lambda row: self.populations[row]), False
+            rows = qualified
+        return max(rows, key=lambda row: self.populations[row]), True
+
+    def _location(self, row: int) -> GeoLocation:
+        return GeoLocation(
+            name=self.names[row],
+            latitude=self.latitudes[row],
+            longitude=self.longitudes[row],
+            timezone=self.timezones[self.timezone_ids[row]] or None,
+            country_code=self.country_codes[row]
+        )
+
+    def _resolve(self, query: str, fuzzy: bool) -> Tuple[Optional[int], bool]:
+        """(row, confident) for a query; confident only for exact names with all qualifiers matched."""
+        full = normalize_place_name(query)
+        rows = self._index.get(full)
+        if rows:
+            return self._best(rows, [])
+
+        parts = [normalize_place_name(part) for part in query.split(",")]
+        place, qualifiers = parts[0], [q for q in parts[1:] if q]
+        rows = self._index.get(place)
+        if rows:
+            return self._best(rows, qualifiers)
+        if not fuzzy or not place:
+            return None, False
+        candidates = set()
+        for edit in _single_edits(place):
+            candidates.update(self._index.get(edit, ()))
+        row, _ = self._best(candidates, qualifiers)
+        return row, False
+
+    def lookup(self, query: str) -> Optional[GeoLocation]:
+        """Resolve "Place[, qualifier...]" to a location, or None unless the match is certain."""
+        row, confident = self._resolve(query, fuzzy=False)
+        return self._location(row) if confident else None
+
+    def guess(self, query: str, fuzzy: bool = True) -> Optional[GeoLocation]:
+        """Closest match for a query, allowing one typo and unmatched qualifiers, or None."""
+        row, _ = self._resolve(query, fuzzy)
+        return self._location(row) if row is not None else None
+
+
+def _read_lines(path: str) -> Iterable[str]:
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            member = next(n for n in archive.namelist() if n.endswith(".txt"))
+            with archive.open(member) as raw:
+                yield from io.TextIOWrapper(raw, encoding="utf-8")
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from f
+
+
+def _append_overlay(path: str, query: str, latitude: float, longitude: float) -> None:
+    """Append a place to the overlay file in GeoNames column layout."""
+    fields = [""] * 19
+    fields[1] = fields[2] = query
+    fields[4] = repr(latitude)
+    fields[5] = repr(longitude)
+    fields[14] = "0"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\t".join(fields) + "\n")
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+_nominatim = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer, loaded from GAZETTEER_PATH on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                gazetteer = Gazetteer()
+                if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+                    gazetteer.load_geonames(GAZETTEER_PATH)
+                elif GAZETTEER_PATH:
+                    logger.warning(f"GAZETTEER_PATH {GAZETTEER_PATH} does not exist")
+                if GAZETTEER_OVERLAY_PATH and os.path.exists(GAZETTEER_OVERLAY_PATH):
+                    gazetteer.load_geonames(GAZETTEER_OVERLAY_PATH, include_alternate_names=False)
+                _gazetteer = gazetteer
+    return _gazetteer
+
+
+def _get_nominatim():
+    global _nominatim
+    if _nominatim is None:
+        from geopy.geocoders import Nominatim
+        _nominatim = Nominatim(user_agent="vedic-ai", timeout=10)
+    return _nominatim
+
+
+def preload_gazetteer() -> None:
+    """Load the gazetteer at startup instead of on the first geocode."""
+    gazetteer = get_gazetteer()
+    logger.info(f"Gazetteer ready ({len(gazetteer)} places)")
+
+
+def geocode_with_fallback(location: str) -> Optional[GeoLocation]:
+    """
+    Look a location up in the gazetteer, falling back to Nominatim if enabled.
+    Nominatim results are written back to the gazetteer; gazetteer guesses
+    (typo corrections, unmatched qualifiers) are only used without one.
+    """
+    gazetteer = get_gazetteer()
+    result = gazetteer.lookup(location)
+    if result is not None:
+        return result
+    guess = gazetteer.guess(location)
+    if GEOCODER_FALLBACK != 'nominatim':
+        return _use_guess(location, guess)
+
+    # geopy is only imported when a place is missing from the gazetteer
+    from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+    try:
+        with timed("nominatim"):
+            location_data = _get_nominatim().geocode(location)
+    except (GeocoderTimedOut, GeocoderUnavailable) as e:
+        if guess is not None:
+            return _use_guess(location, guess)
+        raise GeocoderUnavailableError(str(e))
+    if location_data is None:
+        return None
+    gazetteer.add(location, location_data.latitude, location_data.longitude)
+    if GAZETTEER_OVERLAY_PATH:
+        _append_overlay(GAZETTEER_OVERLAY_PATH, location, location_data.latitude, location_data.longitude)
+    logger.info(f"Added {location} to the gazetteer from Nominatim")
+    return GeoLocation(location, location_data.latitude, location_data.longitude, None, "")
+
+
+def _use_guess(location: str, guess: Optional[GeoLocation]) -> Optional[GeoLocation]:
+    if guess is not None:
+        logger.warning(f"Geocoding {location!r} to the closest gazetteer match {guess.name} ({guess.country_code})")
+    return guess
@@ -0,0 +1,510 @@
+"""
+Closed-form ascendant (lagna) engine.
+
+Whole Sign charts only need the ascendant, so instead of swe.houses (which
+computes all twelve Placidus cusps, of which calculate_d1_chart used only
+the first) the ascendant is computed directly:
+
+    GMST        IAU 2006, from the Earth rotation angle
+    nutation    IAU 1980 series, its 31 largest terms
+    obliquity   IAU 2006 mean obliquity plus the nutation in obliquity
+    ARMC        GMST + equation of the equinoxes + east longitude
+    ascendant   atan2(cos ARMC, -(sin ARMC cos eps + tan lat sin eps))
+
+Between LAGNA_TABLE_START_YEAR and LAGNA_TABLE_END_YEAR the nutation is
+read from a daily table, linearly interpolated (within 0.01" of the
+series), which NumPy builds on first use; outside it the series is
+evaluated directly. Before 1850 and from 2050 swisseph switches to a
+long-term sidereal time model that differs from IAU 2006 by up to about 2";
+the engine follows it with a correction sampled from swe.sidtime every 10
+days over those parts of the table range. The Lahiri ayanamsa used by the
+sidereal functions is a degree-4 polynomial fitted to
+swe.get_ayanamsa_ut over the table range (within 0.0001").
+
+ascendant() is the single-chart path (plain float maths, a few
+microseconds); ascendants() and sidereal_ascendants() take NumPy arrays of
+(jd, latitude, longitude) for the batch engine, and midheavens() gives the
+MC from the same sidereal time.
+
+Error bound: within the table range and for latitudes up to 66 degrees the
+ascendant agrees with swe.houses()[0][0] to LAGNA_ERROR_BOUND_ARCSEC (1").
+Closer to the poles the ascendant is ill-conditioned (the ecliptic can lie
+almost along the horizon) and no bound is given.
+`python -m astrology.lagna verify` checks this on random charts and exits
+non-zero if the bound is exceeded.
+
+lagna_boundaries() finds the exact times at which the sidereal ascendant
+enters each sign (or each part of another span, e.g. a navamsa) between
+two Julian days: a scan every LAGNA_SCAN_MINUTES (scaled down with the
+span), then bisection of every change at once.
+
+Configuration:
+    LAGNA_ENGINE             "closed" (default) or "swisseph" (swe.houses)
+    LAGNA_TABLE_START_YEAR   first year of the nutation table (default 1800)
+    LAGNA_TABLE_END_YEAR     last year of the nutation table (default 2200)
+
+    python -m astrology.lagna verify --samples 100000
+    python -m astrology.lagna bench
+    python -m astrology.lagna boundaries 2024-01-15 --latitude 19.076 --longitude 72.8777
+"""
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple, Union
+import argparse
+import logging
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import swisseph as swe
+
+from .charts import ZODIAC_SIGNS, convert_to_utc
+from .ephemeris import houses as calc_houses
+
+logger = logging.getLogger(__name__)
+
+LAGNA_ENGINE = os.getenv('LAGNA_ENGINE', 'closed').lower()
+LAGNA_TABLE_START_YEAR = int(os.getenv('LAGNA_TABLE_START_YEAR', '1800'))
+LAGNA_TABLE_END_YEAR = int(os.getenv('LAGNA_TABLE_END_YEAR', '2200'))
+
+LAGNA_ERROR_BOUND_ARCSEC = 1.0
+LAGNA_SCAN_MINUTES = 2.0
+
+J2000 = 2451545.0
+# swisseph uses its long-term sidereal time before 1850-01-01 and from 2050-01-01
+_SIDT_LONG_TERM_BEFORE = 2396758.5
+_SIDT_LONG_TERM_FROM = 2469807.5
+_CORRECTION_STEP = 10.0
+
+Number = Union[float, np.ndarray]
+
+# IAU 1980 nutation: multipliers of D, M, M', F, Omega, then the sine
+# coefficient of dpsi and the cosine coefficient of deps (0.0001" and
+# 0.0001" per Julian century)
+_NUTATION_TERMS = np.array([
+    (0, 0, 0, 0, 1, -171996, -174.2, 92025, 8.9),
+    (-2, 0, 0, 2, 2, -13187, -1.6, 5736, -3.1),
+    (0, 0, 0, 2, 2, -2274, -0.2, 977, -0.5),
+    (0, 0, 0, 0, 2, 2062, 0.2, -895, 0.5),
+    (0, 1, 0, 0, 0, 1426, -3.4, 54, -0.1),
+    (0, 0, 1, 0, 0, 712, 0.1, -7, 0),
+    (-2, 1, 0, 2, 2, -517, 1.2, 224, -0.6),
+    (0, 0, 0, 2, 1, -386, -0.4, 200, 0),
+    (0, 0, 1, 2, 2, -301, 0, 129, -0.1),
+    (-2, -1, 0, 2, 2, 217, -0.5, -95, 0.3),
+    (-2, 0, 1, 0, 0, -158, 0, 0, 0),
+    (-2, 0, 0, 2, 1, 129, 0.1, -70, 0),
+    (0, 0, -1, 2, 2, 123, 0, -53, 0),
+    (2, 0, 0, 0, 0, 63, 0, 0, 0),
+    (0, 0, 1, 0, 1, 63, 0.1, -33, 0),
+    (2, 0, -1, 2, 2, -59, 0, 26, 0),
+    (0, 0, -1, 0, 1, -58, -0.1, 32, 0),
+    (0, 0, 1, 2, 1, -51, 0, 27, 0),
+    (-2, 0, 2, 0, 0, 48, 0, 0, 0),
+    (0, 0, -2, 2, 1, 46, 0, -24, 0),
+    (2, 0, 0, 2, 2, -38, 0, 16, 0),
+    (0, 0, 2, 2, 2, -31, 0, 13, 0),
+    (0, 0, 2, 0, 0, 29, 0, 0, 0),
+    (-2, 0, 1, 2, 2, 29, 0, -12, 0),
+    (0, 0, 0, 2, 0, 26, 0, 0, 0),
+    (-2, 0, 0, 2, 0, -22, 0, 0, 0),
+    (0, 0, -1, 2, 1, 21, 0, -10, 0),
+    (0, 2, 0, 0, 0, 17, -0.1, 0, 0),
+    (2, 0, -1, 0, 1, 16, 0, -8, 0),
+    (-2, 2, 0, 2, 2, -16, 0.1, 7, 0),
+    (0, 1, 0, 0, 1, -15, 0, 9, 0),
+])
+_NUTATION_MULTIPLIERS = _NUTATION_TERMS[:, :5].T.copy()
+_NUTATION_SCALE = 1e-4 / 3600.0
+
+
+def _centuries(jd: Number) -> Number:
+    return (jd - J2000) / 36525.0
+
+
+def nutation_series(jd: Number) -> Tuple[np.ndarray, np.ndarray]:
+    """Nutation in longitude and in obliquity (degrees) from the series."""
+    t = np.atleast_1d(np.asarray(_centuries(jd), dtype=np.float64))
+    t2, t3 = t * t, t * t * t
+    arguments = np.radians(np.stack([
+        297.85036 + 445267.111480 * t - 0.0019142 * t2 + t3 / 189474.0,
+        357.52772 + 35999.050340 * t - 0.0001603 * t2 - t3 / 300000.0,
+        134.96298 + 477198.867398 * t + 0.0086972 * t2 + t3 / 56250.0,
+        93.27191 + 483202.017538 * t - 0.0036825 * t2 + t3 / 327270.0,
+        125.04452 - 1934.136261 * t + 0.0020708 * t2 + t3 / 450000.0,
+    ], axis=-1)) @ _NUTATION_MULTIPLIERS
+    sines, cosines = np.sin(arguments), np.cos(arguments)
+    terms = _NUTATION_TERMS
+    dpsi = sines @ terms[:, 5] + t * (sines @ terms[:, 6])
+    deps = cosines @ terms[:, 7] + t * (cosines @ terms[:, 8])
+    return dpsi * _NUTATION_SCALE, deps * _NUTATION_SCALE
+
+
+def mean_obliquity(jd: Number) -> Number:
+    """IAU 2006 mean obliquity of the ecliptic in degrees."""
+    t = _centuries(jd)
+    return (84381.406 + t * (-46.836769 + t * (-0.0001831 + t * (0.00200340 + t * (-5.76e-7 - t * 4.34e-8))))) / 3600.0
+
+
+def _gmst_polynomial(t: Number) -> Number:
+    # GMST minus the Earth rotation angle, in degrees
+    return (0.014506 + t * (4612.156534 + t * (1.3915817 + t * (-0.00000044 + t * (-0.000029956 - t * 0.0000000368))))) / 3600.0
+
+
+class _UniformSeries:
+    """Values sampled every step days from start, linearly interpolated and clamped at the ends."""
+
+    __slots__ = ("start", "step", "end", "values", "_floats")
+
+    def __init__(self, start: float, step: float, values: np.ndarray):
+        self.start = start
+        self.step = step
+        self.end = start + step * (len(values) - 1)
+        self.values = values
+        # Scalar reads from an array('d') return plain floats
+        self._floats = array('d', values.tobytes())
+
+    def at(self, jd: float) -> float:
+        values = self._floats
+        x = (jd - self.start) / self.step
+        i = int(x)
+        if not 0 <= i < len(values) - 1:
+            return values[0] if x < 0 else values[-1]
+        a = values[i]
+        return a + (x - i) * (values[i + 1] - a)
+
+    def interp(self, jd: np.ndarray) -> np.ndarray:
+        x = (jd - self.start) / self.step
+        i = np.clip(np.floor(x).astype(np.int64), 0, len(self.values) - 2)
+        f = np.clip(x - i, 0.0, 1.0)
+        a = self.values[i]
+        return a + f * (self.values[i + 1] - a)
+
+
+class LagnaTables:
+    """Nutation table, sidereal time correction and Lahiri fit over one range of years."""
+
+    def __init__(self, start_year: int = LAGNA_TABLE_START_YEAR, end_year: int = LAGNA_TABLE_END_YEAR):
+        started = time.perf_counter()
+        self.jd_start = swe.julday(start_year, 1, 1, 0.0)
+        self.jd_end = swe.julday(end_year + 1, 1, 1, 0.0)
+
+        days = np.arange(self.jd_start, self.jd_end + 1.0)
+        dpsi, deps = np.empty_like(days), np.empty_like(days)
+        for i in range(0, len(days), 16384):
+            dpsi[i:i + 16384], deps[i:i + 16384] = nutation_series(days[i:i + 16384])
+        self.dpsi = _UniformSeries(self.jd_start, 1.0, dpsi)
+        self.deps = _UniformSeries(self.jd_start, 1.0, deps)
+        self._dpsi, self._deps = self.dpsi._floats, self.deps._floats
+        self._last_day = len(days) - 1
+
+        self.correction_before = self._correction(self.jd_start, _SIDT_LONG_TERM_BEFORE, backwards=True)
+        self.correction_from = self._correction(_SIDT_LONG_TERM_FROM, self.jd_end, backwards=False)
+
+        # The sidereal mode is per thread and this may run in any of them
+        swe.set_sid_mode(swe.SIDM_LAHIRI)
+        samples = np.linspace(self.jd_start, self.jd_end, 801)
+        ayanamsas = np.array([swe.get_ayanamsa_ut(float(jd)) for jd in samples])
+        self.lahiri = np.polynomial.polynomial.polyfit(_centuries(samples), ayanamsas, 4)
+        self._lahiri = tuple(float(c) for c in self.lahiri[::-1])
+        logger.info(f"Built lagna tables for {start_year}-{end_year} in {time.perf_counter() - started:.2f}s")
+
+    def _correction(self, jd_from: float, jd_to: float, backwards: bool):
+        """swe.sidtime minus the closed-form GAST on a grid anchored at swisseph's model switch."""
+        if jd_to <= jd_from:
+            return None
+        count = int(math.ceil((jd_to - jd_from) / _CORRECTION_STEP)) + 1
+        if backwards:
+            grid = jd_to - _CORRECTION_STEP * np.arange(count)[::-1]
+        else:
+            grid = jd_from + _CORRECTION_STEP * np.arange(count)
+        ours = _closed_form_gast(grid, *self._nutation_array(grid))
+        theirs = np.array([swe.sidtime(float(jd)) * 15.0 for jd in grid])
+        return _UniformSeries(float(grid[0]), _CORRECTION_STEP, (theirs - ours + 180.0) % 360.0 - 180.0)
+
+    def _nutation_array(self, jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        inside = (jd >= self.jd_start) & (jd <= self.jd_end)
+        if inside.all():
+            return self.dpsi.interp(jd), self.deps.interp(jd)
+        dpsi, deps = nutation_series(jd)
+        dpsi[inside] = self.dpsi.interp(jd[inside])
+        deps[inside] = self.deps.interp(jd[inside])
+        return dpsi, deps
+
+    def nutation(self, jd: float) -> Tuple[float, float]:
+        x = jd - self.jd_start
+        i = int(x)
+        if 0 <= i < self._last_day:
+            dpsi, deps = self._dpsi, self._deps
+            a, b = dpsi[i], deps[i]
+            return a + (x - i) * (dpsi[i + 1] - a), b + (x - i) * (deps[i + 1] - b)
+        dpsi, deps = nutation_series(jd)
+        return float(dpsi[0]), float(deps[0])
+
+    def correction(self, jd: float) -> float:
+        if jd >= _SIDT_LONG_TERM_FROM:
+            return self.correction_from.at(jd) if self.correction_from is not None else 0.0
+        if jd < _SIDT_LONG_TERM_BEFORE:
+            return self.correction_before.at(jd) if self.correction_before is not None else 0.0
+        return 0.0
+
+    def corrections(self, jd: np.ndarray) -> np.ndarray:
+        correction = np.zeros_like(jd)
+        for series, mask in ((self.correction_from, jd >= _SIDT_LONG_TERM_FROM),
+                             (self.correction_before, jd < _SIDT_LONG_TERM_BEFORE)):
+            if series is not None and mask.any():
+                correction[mask] = series.interp(jd[mask])
+        return correction
+
+    def lahiri_ayanamsa(self, jd: float) -> float:
+        if not self.jd_start <= jd <= self.jd_end:
+            return swe.get_ayanamsa_ut(jd)
+        t = (jd - J2000) / 36525.0
+        value = 0.0
+        for coefficient in self._lahiri:
+            value = value * t + coefficient
+        return value
+
+    def lahiri_ayanamsas(self, jd: np.ndarray) -> np.ndarray:
+        ayanamsa = np.polynomial.polynomial.polyval(_centuries(jd), self.lahiri)
+        outside = (jd < self.jd_start) | (jd > self.jd_end)
+        if outside.any():
+            ayanamsa[outside] = [swe.get_ayanamsa_ut(float(value)) for value in jd[outside]]
+        return ayanamsa
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_lagna_tables() -> LagnaTables:
+    """Process-wide tables, built on first use."""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                _tables = LagnaTables()
+    return _tables
+
+
+def preload_lagna_tables() -> None:
+    """Build the tables at startup instead of on the first chart."""
+    if LAGNA_ENGINE == 'closed':
+        get_lagna_tables()
+
+
+def _closed_form_gast(jd: np.ndarray, dpsi: np.ndarray, deps: np.ndarray) -> np.ndarray:
+    """Apparent sidereal time at Greenwich in degrees, IAU 2006, without swisseph's long-term correction."""
+    du = jd - J2000
+    era = 360.0 * ((0.7790572732640 + 0.00273781191135448 * du + np.mod(du, 1.0)) % 1.0)
+    eps = np.radians(mean_obliquity(jd) + deps)
+    return era + _gmst_polynomial(_centuries(jd)) + dpsi * np.cos(eps)
+
+
+def ascendant(jd_ut: float, latitude: float, longitude: float) -> float:
+    """Tropical ascendant in degrees of one chart, as swe.houses()[0][0]."""
+    if LAGNA_ENGINE == 'swisseph':
+        return calc_houses(jd_ut, latitude, longitude)[0][0]
+    tables = get_lagna_tables()
+    dpsi, deps = tables.nutation(jd_ut)
+    t = (jd_ut - J2000) / 36525.0
+    du = jd_ut - J2000
+    eps = math.radians(mean_obliquity(jd_ut) + deps)
+    gast = (360.0 * ((0.7790572732640 + 0.00273781191135448 * du + du % 1.0) % 1.0)
+            + _gmst_polynomial(t) + dpsi * math.cos(eps) + tables.correction(jd_ut))
+    armc = math.radians(gast + longitude)
+    asc = math.degrees(math.atan2(
+        math.cos(armc), -(math.sin(armc) * math.cos(eps) + math.tan(math.radians(latitude)) * math.sin(eps))
+    ))
+    return asc % 360.0
+
+
+def ascendants(jd_ut: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Tropical ascendants in degrees for arrays of charts."""
+    jd_ut = np.asarray(jd_ut, dtype=np.float64)
+    latitudes = np.broadcast_to(np.asarray(latitudes, dtype=np.float64), jd_ut.shape)
+    longitudes = np.broadcast_to(np.asarray(longitudes, dtype=np.float64), jd_ut.shape)
+    if LAGNA_ENGINE == 'swisseph':
+        return np.array([
+            calc_houses(float(jd), float(lat), float(lon))[0][0]
+            for jd, lat, lon in zip(jd_ut, latitudes, longitudes)
+        ])
+    tables = get_lagna_tables()
+    dpsi, deps = tables._nutation_array(jd_ut)
+    eps = np.radians(mean_obliquity(jd_ut) + deps)
+    armc = np.radians(_closed_form_gast(jd_ut, dpsi, deps) + tables.corrections(jd_ut) + longitudes)
+    asc = np.degrees(np.arctan2(
+        np.cos(armc), -(np.sin(armc) * np.cos(eps) + np.tan(np.radians(latitudes)) * np.sin(eps))
+    ))
+    return np.mod(asc, 360.0)
+
+
+def midheavens(jd_ut: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Tropical midheavens (MC) in degrees for arrays of charts, as swe.houses()[1][1]."""
+    jd_ut = np.asarray(jd_ut, dtype=np.float64)
+    longitudes = np.broadcast_to(np.asarray(longitudes, dtype=np.float64), jd_ut.shape)
+    if LAGNA_ENGINE == 'swisseph':
+        return np.array([
+            calc_houses(float(jd), 0.0, float(lon))[1][1] for jd, lon in zip(jd_ut, longitudes)
+        ])
+    tables = get_lagna_tables()
+    dpsi, deps = tables._nutation_array(jd_ut)
+    eps = np.radians(mean_obliquity(jd_ut) + deps)
+    armc = np.radians(_closed_form_gast(jd_ut, dpsi, deps) + tables.corrections(jd_ut) + longitudes)
+    return np.mod(np.degrees(np.arctan2(np.sin(armc), np.cos(armc) * np.cos(eps))), 360.0)
+
+
+def lahiri_ayanamsa(jd_ut: float) -> float:
+    """Lahiri ayanamsa in degrees from the fit (swisseph outside the table range)."""
+    return get_lagna_tables().lahiri_ayanamsa(jd_ut)
+
+
+def sidereal_ascendants(jd_ut: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Sidereal (Lahiri) ascendants in degrees for arrays of charts."""
+    jd_ut = np.asarray(jd_ut, dtype=np.float64)
+    return np.mod(ascendants(jd_ut, latitudes, longitudes) - get_lagna_tables().lahiri_ayanamsas(jd_ut), 360.0)
+
+
+# --- Sign boundaries ---
+
+def lagna_boundaries(jd_start: float, jd_end: float, latitude: float, longitude: float,
+                     span: float = 30.0, tolerance_seconds: float = 0.001) -> Tuple[int, List[Tuple[float, int]]]:
+    """
+    Part of the sidereal ascendant (floor(ascendant / span); signs for the
+    default span) at jd_start and every (jd, part) at which it enters a
+    part before jd_end, in time order, to tolerance_seconds.
+    """
+    step = LAGNA_SCAN_MINUTES * span / 30.0 / 1440.0
+    grid = np.append(np.arange(jd_start, jd_end, step), jd_end)
+
+    def signs(jd: np.ndarray) -> np.ndarray:
+        return (sidereal_ascendants(jd, latitude, longitude) // span).astype(np.int64)
+
+    scan = signs(grid)
+    changes = np.nonzero(scan[1:] != scan[:-1])[0]
+    lo, hi = grid[changes], grid[changes + 1]
+    before = scan[changes]
+    # Bisect every bracket at once: lo keeps the old sign, hi has left it
+    while len(lo) and (hi - lo).max() * 86400.0 > tolerance_seconds:
+        mid = (lo + hi) / 2
+        same = signs(mid) == before
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    return int(scan[0]), [(float(jd), int(sign)) for jd, sign in zip(hi, signs(hi))]
+
+
+def query_lagna_boundaries(date: str, latitude: float, longitude: float) -> Dict[str, Any]:
+    """The times (UTC) at which the sidereal ascendant enters each sign during a local calendar day."""
+    from .dasha import datetime_to_jd, jd_to_datetime
+
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid date: {date}. Use YYYY-MM-DD")
+    start = convert_to_utc(day, latitude, longitude).replace(tzinfo=None)
+    end = convert_to_utc(day + timedelta(days=1), latitude, longitude).replace(tzinfo=None)
+    first_sign, boundaries = lagna_boundaries(datetime_to_jd(start), datetime_to_jd(end), latitude, longitude)
+    return {
+        "date": date,
+        "start_utc": start.isoformat(timespec="seconds"),
+        "end_utc": end.isoformat(timespec="seconds"),
+        "start_sign": ZODIAC_SIGNS[first_sign],
+        "boundaries": [
+            {"sign": ZODIAC_SIGNS[sign], "jd": jd, "utc": jd_to_datetime(jd).isoformat(timespec="milliseconds")}
+            for jd, sign in boundaries
+        ]
+    }
+
+
+# --- Verification and benchmarks ---
+
+def _random_charts(samples: int, seed: int, max_latitude: float):
+    tables = get_lagna_tables()
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(tables.jd_start, tables.jd_end, samples),
+            rng.uniform(-max_latitude, max_latitude, samples),
+            rng.uniform(-180.0, 180.0, samples))
+
+
+def verify(samples: int, seed: int = 0, max_latitude: float = 66.0) -> Dict[str, float]:
+    """Largest differences from swisseph in arc-seconds on random charts."""
+    jd, lat, lon = _random_charts(samples, seed, max_latitude)
+    reference = np.array([swe.houses(float(j), float(la), float(lo))[0][0] for j, la, lo in zip(jd, lat, lon)])
+    vector = ascendants(jd, lat, lon)
+    scalar = np.array([ascendant(float(j), float(la), float(lo)) for j, la, lo in zip(jd, lat, lon)])
+    ayanamsa = np.array([swe.get_ayanamsa_ut(float(j)) for j in jd])
+
+    def worst(values: np.ndarray, expected: np.ndarray) -> float:
+        return float(np.abs((values - expected + 180.0) % 360.0 - 180.0).max() * 3600.0)
+
+    return {
+        "ascendants": worst(vector, reference),
+        "ascendant": worst(scalar, reference),
+        "lahiri_ayanamsa": worst(get_lagna_tables().lahiri_ayanamsas(jd), ayanamsa),
+    }
+
+
+def _bench(samples: int) -> None:
+    jd, lat, lon = _random_charts(samples, 1, 60.0)
+    charts = list(zip(jd.tolist(), lat.tolist(), lon.tolist()))[:20000]
+
+    for label, func in (("swe.houses", lambda j, la, lo: swe.houses(j, la, lo)[0][0]), ("ascendant", ascendant)):
+        start = time.perf_counter()
+        for chart in charts:
+            func(*chart)
+        print(f"{label:<22} {(time.perf_counter() - start) / len(charts) * 1e6:8.2f} us/chart")
+
+    start = time.perf_counter()
+    ascendants(jd, lat, lon)
+    elapsed = time.perf_counter() - start
+    print(f"{'ascendants':<22} {elapsed / samples * 1e6:8.3f} us/chart  {samples / elapsed:14,.0f} charts/s")
+    start = time.perf_counter()
+    sidereal_ascendants(jd, lat, lon)
+    elapsed = time.perf_counter() - start
+    print(f"{'sidereal_ascendants':<22} {elapsed / samples * 1e6:8.3f} us/chart  {samples / elapsed:14,.0f} charts/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("verify", help="compare against swisseph on random charts")
+    check.add_argument("--samples", type=int, default=100000)
+    check.add_argument("--seed", type=int, default=0)
+    check.add_argument("--max-latitude", type=float, default=66.0)
+    bench = commands.add_parser("bench", help="single-chart and vectorized throughput")
+    bench.add_argument("--samples", type=int, default=1000000)
+    boundaries = commands.add_parser("boundaries", help="lagna sign changes during a local day")
+    boundaries.add_argument("date", help="YYYY-MM-DD")
+    boundaries.add_argument("--latitude", type=float, required=True)
+    boundaries.add_argument("--longitude", type=float, required=True)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from .charts import EPHE_PATH
+    if EPHE_PATH:
+        swe.set_ephe_path(EPHE_PATH)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+
+    if args.command == "verify":
+        errors = verify(args.samples, args.seed, args.max_latitude)
+        for name, error in errors.items():
+            print(f"{name:<18} max {error:.4f}\"")
+        if max(errors.values()) > LAGNA_ERROR_BOUND_ARCSEC:
+            print(f"FAILED: error bound is {LAGNA_ERROR_BOUND_ARCSEC}\"")
+            sys.exit(1)
+        print(f"OK: within {LAGNA_ERROR_BOUND_ARCSEC}\"")
+    elif args.command == "bench":
+        get_lagna_tables()
+        _bench(args.samples)
+    else:
+        result = query_lagna_boundaries(args.date, args.latitude, args.longitude)
+        print(f"{result['start_utc']} UTC  {result['start_sign']}")
+        for boundary in result["boundaries"]:
+            print(f"{boundary['utc']} UTC  {boundary['sign']}")
+
+
+if __name__ == "__main__":
+    main()
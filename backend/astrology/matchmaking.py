@@ -0,0 +1,412 @@
+"""
+Ashtakoota (Guna Milan) matchmaking: one profile scored against many.
+
+Every koota depends only on the two Moons' nakshatra padas: the pada gives
+the nakshatra (pada // 4) and the Moon sign (pada // 9). So every koota,
+and the 36-point total, is precomputed once as a 108 x 108 table indexed by
+[groom pada, bride pada]. Scoring a pair is one lookup. Scoring a profile
+against N candidates is one fancy-index of a table row (or column) with
+the candidates' pada array. Top-K uses argpartition instead of a full sort.
+
+Points are stored doubled as uint8 (half points occur in Vashya, Tara and
+Graha Maitri), so the total table is 11 KB and fits in L1 cache.
+
+Vashya splits Sagittarius and Capricorn at 15 degrees, which falls inside
+a pada. That pada is classified by where it starts.
+
+The candidate store is a memory-mapped file with only what scoring needs:
+a candidate ID (int64) and the Moon pada index (uint8) per candidate.
+
+    python -m astrology.matchmaking build --input candidates.csv --out candidates.bin
+    python -m astrology.matchmaking bench --candidates 1000000 --top-k 100
+
+Configuration:
+    MATCH_CANDIDATE_STORE_PATH  candidate store served by /match
+"""
+import argparse
+import csv
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch import BATCH_BODIES, calculate_d1_charts_batch
+from .charts import NAKSHATRAS, PLANET_NUMBERS, ZODIAC_SIGNS, birth_julian_day
+from .ephemeris import PlanetSnapshot
+
+logger = logging.getLogger(__name__)
+
+MATCH_CANDIDATE_STORE_PATH = os.getenv('MATCH_CANDIDATE_STORE_PATH')
+
+PADAS = 108
+PADA_SPAN = 360.0 / PADAS
+MAX_POINTS = 36
+
+KOOTAS = ["varna", "vashya", "tara", "yoni", "graha_maitri", "gana", "bhakoot", "nadi"]
+KOOTA_MAX = {"varna": 1, "vashya": 2, "tara": 3, "yoni": 4, "graha_maitri": 5, "gana": 6, "bhakoot": 7, "nadi": 8}
+
+# --- Koota rules ---
+
+# Varna by Moon sign: water signs Brahmin (3), fire Kshatriya (2),
+# earth Vaishya (1), air Shudra (0)
+_SIGN_VARNA = [2, 1, 0, 3, 2, 1, 0, 3, 2, 1, 0, 3]
+
+# Vashya groups: 0 quadruped, 1 human, 2 water, 3 wild, 4 insect.
+# (first half, second half) of each sign
+_SIGN_VASHYA = [
+    (0, 0), (0, 0), (1, 1), (2, 2), (3, 3), (1, 1),
+    (1, 1), (4, 4), (1, 0), (0, 2), (1, 1), (2, 2),
+]
+_VASHYA_POINTS = [
+    [2.0, 1.0, 1.0, 0.5, 1.0],
+    [1.0, 2.0, 0.5, 0.0, 1.0],
+    [1.0, 0.5, 2.0, 1.0, 1.0],
+    [0.5, 0.0, 1.0, 2.0, 0.0],
+    [1.0, 1.0, 1.0, 0.0, 2.0],
+]
+
+# Yoni animal per nakshatra: 0 horse, 1 elephant, 2 sheep, 3 serpent, 4 dog,
+# 5 cat, 6 rat, 7 cow, 8 buffalo, 9 tiger, 10 deer, 11 monkey, 12 mongoose, 13 lion
+_NAKSHATRA_YONI = [0, 1, 2, 3, 3, 4, 5, 2, 5, 6, 6, 7, 8, 9, 8, 9, 10, 10, 4, 11, 12, 11, 13, 0, 13, 7, 1]
+_YONI_POINTS = [
+    [4, 2, 2, 3, 2, 2, 2, 1, 0, 1, 3, 3, 2, 1],
+    [2, 4, 3, 3, 2, 2, 2, 2, 3, 1, 2, 3, 2, 0],
+    [2, 3, 4, 2, 1, 2, 1, 3, 3, 1, 2, 0, 3, 1],
+    [3, 3, 2, 4, 2, 1, 1, 1, 1, 2, 2, 2, 0, 2],
+    [2, 2, 1, 2, 4, 2, 1, 2, 2, 1, 0, 2, 1, 1],
+    [2, 2, 2, 1, 2, 4, 0, 2, 2, 1, 3, 3, 2, 1],
+    [2, 2, 1, 1, 1, 0, 4, 2, 2, 2, 2, 2, 1, 2],
+    [1, 2, 3, 1, 2, 2, 2, 4, 3, 0, 3, 2, 2, 1],
+    [0, 3, 3, 1, 2, 2, 2, 3, 4, 1, 2, 2, 2, 1],
+    [1, 1, 1, 2, 1, 1, 2, 0, 1, 4, 1, 1, 2, 1],
+    [3, 2, 2, 2, 0, 3, 2, 3, 2, 1, 4, 2, 2, 1],
+    [3, 3, 0, 2, 2, 3, 2, 2, 2, 1, 2, 4, 3, 2],
+    [2, 2, 3, 0, 1, 2, 1, 2, 2, 2, 2, 3, 4, 2],
+    [1, 0, 1, 2, 1, 1, 2, 1, 1, 1, 1, 2, 2, 4],
+]
+
+# Sign lords and their natural relationships (1 friend, 0 neutral, -1 enemy)
+_SIGN_LORD = ['Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
+              'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter']
+_FRIENDS = {
+    'Sun': ({'Moon', 'Mars', 'Jupiter'}, {'Venus', 'Saturn'}),
+    'Moon': ({'Sun', 'Mercury'}, set()),
+    'Mars': ({'Sun', 'Moon', 'Jupiter'}, {'Mercury'}),
+    'Mercury': ({'Sun', 'Venus'}, {'Moon'}),
+    'Jupiter': ({'Sun', 'Moon', 'Mars'}, {'Mercury', 'Venus'}),
+    'Venus': ({'Mercury', 'Saturn'}, {'Sun', 'Moon'}),
+    'Saturn': ({'Mercury', 'Venus'}, {'Sun', 'Moon', 'Mars'}),
+}
+# Points by the pair of relationships, as a sorted tuple
+_MAITRI_POINTS = {(1, 1): 5.0, (0, 1): 4.0, (0, 0): 3.0, (-1, 1): 1.0, (-1, 0): 0.5, (-1, -1): 0.0}
+
+# Gana per nakshatra: 0 deva, 1 manushya, 2 rakshasa; points [groom][bride]
+_NAKSHATRA_GANA = [0, 1, 2, 1, 0, 1, 0, 0, 2, 2, 1, 1, 0, 2, 0, 2, 0, 2, 2, 1, 1, 0, 2, 2, 1, 1, 0]
+_GANA_POINTS = [
+    [6, 6, 1],
+    [5, 6, 0],
+    [1, 0, 6],
+]
+
+# Nadi per nakshatra: Adi, Madhya, Antya, Antya, Madhya, Adi, ...
+_NAKSHATRA_NADI = [(0, 1, 2, 2, 1, 0)[n % 6] for n in range(27)]
+
+
+def _relationship(lord: str, other: str) -> int:
+    friends, enemies = _FRIENDS[lord]
+    return 1 if other in friends else -1 if other in enemies else 0
+
+
+def _tara_points(from_nakshatra: int, to_nakshatra: int) -> float:
+    # Counted inclusively; the 3rd, 5th and 7th of every nine are inauspicious
+    return 0.0 if ((to_nakshatra - from_nakshatra) % 27 + 1) % 9 in (3, 5, 7) else 1.5
+
+
+def _koota_points(groom: int, bride: int) -> Dict[str, float]:
+    """Points of every koota for a groom and bride Moon pada index."""
+    g_nak, b_nak = groom // 4, bride // 4
+    g_sign, b_sign = groom // 9, bride // 9
+    g_half, b_half = int(groom % 9 * PADA_SPAN >= 15), int(bride % 9 * PADA_SPAN >= 15)
+
+    if g_sign == b_sign or _SIGN_LORD[g_sign] == _SIGN_LORD[b_sign]:
+        maitri = 5.0
+    else:
+        g_lord, b_lord = _SIGN_LORD[g_sign], _SIGN_LORD[b_sign]
+        maitri = _MAITRI_POINTS[tuple(sorted((_relationship(g_lord, b_lord), _relationship(b_lord, g_lord))))]
+
+    # Bride's sign counted to the groom's: 2/12, 5/9 and 6/8 are doshas
+    distance = (g_sign - b_sign) % 12 + 1
+    return {
+        "varna": 1.0 if _SIGN_VARNA[g_sign] >= _SIGN_VARNA[b_sign] else 0.0,
+        "vashya": _VASHYA_POINTS[_SIGN_VASHYA[g_sign][g_half]][_SIGN_VASHYA[b_sign][b_half]],
+        "tara": _tara_points(b_nak, g_nak) + _tara_points(g_nak, b_nak),
+        "yoni": float(_YONI_POINTS[_NAKSHATRA_YONI[g_nak]][_NAKSHATRA_YONI[b_nak]]),
+        "graha_maitri": maitri,
+        "gana": float(_GANA_POINTS[_NAKSHATRA_GANA[g_nak]][_NAKSHATRA_GANA[b_nak]]),
+        "bhakoot": 0.0 if distance in (2, 12, 5, 9, 6, 8) else 7.0,
+        "nadi": 0.0 if _NAKSHATRA_NADI[g_nak] == _NAKSHATRA_NADI[b_nak] else 8.0,
+    }
+
+
+def _build_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Per-koota and total tables of doubled points, indexed [groom pada, bride pada]."""
+    kootas = np.zeros((len(KOOTAS), PADAS, PADAS), dtype=np.uint8)
+    for groom in range(PADAS):
+        for bride in range(PADAS):
+            points = _koota_points(groom, bride)
+            for k, koota in enumerate(KOOTAS):
+                kootas[k, groom, bride] = int(points[koota] * 2)
+    return kootas, kootas.sum(axis=0, dtype=np.uint8)
+
+
+KOOTA_TABLES, TOTAL_TABLE = _build_tables()
+# Bride-major copy so that scoring a bride also reads one contiguous row
+TOTAL_TABLE_BY_BRIDE = np.ascontiguousarray(TOTAL_TABLE.T)
+
+
+def moon_pada_index(moon_longitude: float) -> int:
+    """0-107 pada index of a sidereal Moon longitude (nakshatra * 4 + pada - 1)."""
+    return int((moon_longitude % 360.0) // PADA_SPAN)
+
+
+def _check_role(role: str) -> None:
+    if role not in ("groom", "bride"):
+        raise ValueError("role must be 'groom' or 'bride'")
+
+
+def score_pair(groom_pada: int, bride_pada: int) -> Dict[str, Any]:
+    """Koota breakdown and total for one couple."""
+    kootas = {koota: float(KOOTA_TABLES[k, groom_pada, bride_pada]) / 2 for k, koota in enumerate(KOOTAS)}
+    return {
+        "total": float(TOTAL_TABLE[groom_pada, bride_pada]) / 2,
+        "max": MAX_POINTS,
+        "kootas": kootas
+    }
+
+
+def score_candidates(pada: int, role: str, candidate_padas: np.ndarray) -> np.ndarray:
+    """Doubled total points (uint8) of one profile against every candidate."""
+    _check_role(role)
+    row = TOTAL_TABLE[pada] if role == "groom" else TOTAL_TABLE_BY_BRIDE[pada]
+    return row[candidate_padas]
+
+
+def top_matches(pada: int, role: str, candidate_padas: np.ndarray, k: int = 10,
+                min_score: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and points of the k best candidates, best first.
+
+    Ties are broken by candidate position (earlier first), so results are
+    deterministic.
+    """
+    scores = score_candidates(pada, role, candidate_padas)
+    count = len(scores)
+    if count == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    # One unique int64 key per candidate: score first, then earlier position
+    keys = scores.astype(np.int64) << 32
+    keys -= np.arange(count, dtype=np.int64)
+    k = min(k, count)
+    best = np.argpartition(keys, count - k)[count - k:]
+    best = best[np.argsort(keys[best])[::-1]]
+    points = scores[best] / 2
+    keep = points >= min_score
+    return best[keep], points[keep]
+
+
+# --- Candidate store ---
+
+_MAGIC = b'VEDMAT01'
+_HEADER = struct.Struct('<8sIQ')  # magic, version, candidate count
+_FORMAT_VERSION = 1
+
+
+class CandidateStoreUnavailableError(RuntimeError):
+    """MATCH_CANDIDATE_STORE_PATH is unset or points at a missing file."""
+
+
+class CandidateStore:
+    """Memory-mapped candidate IDs and Moon pada indices."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {_FORMAT_VERSION} candidate store")
+        offset = _HEADER.size + (-_HEADER.size) % 8
+        self.ids = np.frombuffer(self._mmap, dtype='<i8', count=self.count, offset=offset)
+        self.padas = np.frombuffer(self._mmap, dtype='u1', count=self.count, offset=offset + self.count * 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def top_matches(self, pada: int, role: str, k: int = 10, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """The k best candidates with their koota breakdown."""
+        index, points = top_matches(pada, role, self.padas, k, min_score)
+        matches = []
+        for i, total in zip(index.tolist(), points.tolist()):
+            candidate_pada = int(self.padas[i])
+            groom, bride = (pada, candidate_pada) if role == "groom" else (candidate_pada, pada)
+            matches.append({
+                "id": int(self.ids[i]),
+                "total": total,
+                "moon_nakshatra": NAKSHATRAS[candidate_pada // 4],
+                "moon_pada": candidate_pada % 4 + 1,
+                "moon_sign": ZODIAC_SIGNS[candidate_pada // 9],
+                "kootas": score_pair(groom, bride)["kootas"]
+            })
+        return matches
+
+
+def write_candidate_store(path: str, ids: Sequence[int], padas: Sequence[int]) -> None:
+    ids = np.ascontiguousarray(ids, dtype='<i8')
+    padas = np.ascontiguousarray(padas, dtype='u1')
+    if len(ids) != len(padas):
+        raise ValueError("ids and padas must have the same length")
+    if len(padas) and padas.max() >= PADAS:
+        raise ValueError("Pada indices must be below 108")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(ids)))
+        f.write(b'\0' * ((-f.tell()) % 8))
+        f.write(ids.tobytes())
+        f.write(padas.tobytes())
+    os.replace(tmp_path, path)
+
+
+def _read_rows(path: str) -> Iterable[Dict[str, str]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def build_candidate_store(input_path: str, out_path: str, chunk_size: int = 10000) -> int:
+    """
+    Build a store from a CSV with columns id and either moon_longitude or
+    dob, tob, latitude, longitude (Moon computed with the batch engine).
+    """
+    moon = BATCH_BODIES.index('Moon')
+    ids: List[int] = []
+    padas: List[np.ndarray] = []
+    chunk: List[Dict[str, str]] = []
+
+    def flush():
+        ids.extend(int(row['id']) for row in chunk)
+        if 'moon_longitude' in chunk[0]:
+            longitudes = np.array([float(row['moon_longitude']) for row in chunk])
+        else:
+            batch = calculate_d1_charts_batch(
+                [row['dob'] for row in chunk], [row['tob'] for row in chunk],
+                [float(row['latitude']) for row in chunk], [float(row['longitude']) for row in chunk]
+            )
+            longitudes = batch['longitudes'][:, moon]
+        padas.append((np.mod(longitudes, 360.0) // PADA_SPAN).astype(np.uint8))
+        chunk.clear()
+
+    for row in _read_rows(input_path):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            flush()
+    if chunk:
+        flush()
+    write_candidate_store(out_path, ids, np.concatenate(padas) if padas else [])
+    return len(ids)
+
+
+_store: Optional[CandidateStore] = None
+_store_lock = threading.Lock()
+
+
+def candidate_store_configured() -> bool:
+    """Whether MATCH_CANDIDATE_STORE_PATH names an existing file."""
+    return bool(MATCH_CANDIDATE_STORE_PATH) and os.path.exists(MATCH_CANDIDATE_STORE_PATH)
+
+
+def get_candidate_store() -> CandidateStore:
+    """Process-wide candidate store from MATCH_CANDIDATE_STORE_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if not candidate_store_configured():
+                    raise CandidateStoreUnavailableError("No candidate store; set MATCH_CANDIDATE_STORE_PATH")
+                _store = CandidateStore(MATCH_CANDIDATE_STORE_PATH)
+                logger.info(f"Loaded {len(_store)} match candidates from {MATCH_CANDIDATE_STORE_PATH}")
+    return _store
+
+
+def query_matches(dob: str, tob: str, latitude: float, longitude: float, role: str,
+                  top_k: int = 10, min_score: float = 0.0) -> Dict[str, Any]:
+    """Best candidates in the store for one profile's birth data."""
+    _check_role(role)
+    jd = birth_julian_day(dob, tob, latitude, longitude)
+    pada = moon_pada_index(PlanetSnapshot.compute(jd, {'Moon': PLANET_NUMBERS['Moon']}).longitude('Moon'))
+    store = get_candidate_store()
+    return {
+        "role": role,
+        "moon_nakshatra": NAKSHATRAS[pada // 4],
+        "moon_pada": pada % 4 + 1,
+        "moon_sign": ZODIAC_SIGNS[pada // 9],
+        "candidates": len(store),
+        "matches": store.top_matches(pada, role, top_k, min_score)
+    }
+
+
+def _bench(candidates: int, top_k: int, repeats: int) -> None:
+    rng = np.random.default_rng(0)
+    padas = rng.integers(0, PADAS, candidates).astype(np.uint8)
+    profiles = rng.integers(0, PADAS, repeats).tolist()
+
+    started = time.perf_counter()
+    for pada in profiles:
+        score_candidates(pada, "groom", padas)
+    score_time = (time.perf_counter() - started) / repeats
+
+    started = time.perf_counter()
+    for i, pada in enumerate(profiles):
+        top_matches(pada, "groom" if i % 2 else "bride", padas, top_k)
+    top_time = (time.perf_counter() - started) / repeats
+
+    started = time.perf_counter()
+    for pada in profiles:
+        scores = score_candidates(pada, "groom", padas)
+        np.argsort(-scores.astype(np.int64), kind="stable")[:top_k]
+    sort_time = (time.perf_counter() - started) / repeats
+
+    print(f"candidates:              {candidates:,}")
+    print(f"score all:               {score_time * 1e3:8.2f} ms")
+    print(f"score + top-{top_k} (argpartition): {top_time * 1e3:8.2f} ms")
+    print(f"score + full sort:       {sort_time * 1e3:8.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a match candidate store or benchmark scoring.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write a candidate store from a CSV")
+    build.add_argument("--input", required=True, help="CSV with id and moon_longitude, or id, dob, tob, latitude, longitude")
+    build.add_argument("--out", required=True)
+    bench = sub.add_parser("bench", help="time 1-vs-N scoring on random candidates")
+    bench.add_argument("--candidates", type=int, default=1000000)
+    bench.add_argument("--top-k", type=int, default=100)
+    bench.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_candidate_store(args.input, args.out)
+        print(f"Wrote {args.out} ({count} candidates, {os.path.getsize(args.out) / 1e6:.1f} MB)")
+        return 0
+    _bench(args.candidates, args.top_k, args.repeats)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
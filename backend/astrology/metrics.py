@@ -0,0 +1,245 @@
+"""
+Per-stage latency histograms for the chart and report pipeline.
+
+Code marks a stage with a timer:
+
+    with timed("ephemeris"):
+        snapshot = compute_planet_snapshot(jd)
+
+Stages: geocode (get_coordinates_from_location, with nominatim for the
+fallback inside it), timezone (convert_to_utc), ephemeris (planet snapshot
+and houses), chart (signs, houses, aspects), dasha, strengths, prompt and
+llm, plus chart_task for a whole chart worker round trip.
+
+Inside a collect_stage_timings() block (one per HTTP request, set up by
+ServerTimingMiddleware, and one per chart worker task in the pipeline)
+timings are summed per stage into a StageTimings object instead. Worker
+timings are sent back with the task result and merged into the request,
+so the request's Server-Timing header covers work done in other processes.
+When the block ends its totals go into the histograms, one observation
+per stage per request. Timers that run outside any block are observed
+directly.
+
+GET /api/v1/metrics renders the histograms (and the cache counters) in the
+Prometheus text format.
+
+Configuration:
+    METRICS_ENABLED   "0" turns every timer into a no-op
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') not in ('0', 'false', 'no')
+
+# Histogram bucket upper bounds in seconds
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class MetricsRegistry:
+    """Stage histograms of one process, and extra collectors rendered with them."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a function returning extra exposition lines."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        with self._lock:
+            copies = {}
+            for stage, histogram in self._histograms.items():
+                copy = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.count = histogram.count
+                copy.sum = histogram.sum
+                copies[stage] = copy
+            return copies
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP vedic_stage_duration_seconds Time spent per pipeline stage per request.",
+            "# TYPE vedic_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'vedic_stage_duration_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'vedic_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'vedic_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum:.9f}')
+            lines.append(f'vedic_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry."""
+    return _registry
+
+
+class StageTimings:
+    """Seconds per stage summed inside one collect_stage_timings() block."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def merge(self, stages: Dict[str, float]) -> None:
+        for stage, seconds in stages.items():
+            self.add(stage, seconds)
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        entries = [f"{stage};dur={seconds * 1e3:.2f}" for stage, seconds in self.stages.items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1e3:.2f}")
+        return ", ".join(entries)
+
+
+_stage_timings: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Add a stage duration to the current block, or straight to the histograms."""
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+    else:
+        _registry.observe(stage, seconds)
+
+
+def merge_stage_timings(stages: Dict[str, float]) -> None:
+    """Merge timings measured elsewhere (a chart worker) into the current block."""
+    timings = _stage_timings.get()
+    if timings is not None:
+        timings.merge(stages)
+    else:
+        for stage, seconds in stages.items():
+            _registry.observe(stage, seconds)
+
+
+@contextmanager
+def collect_stage_timings(observe: bool = True) -> Iterator[StageTimings]:
+    """
+    Sum the stage timings of the current request (or task). With observe,
+    the totals are added to the histograms when the block ends; a chart
+    worker passes False and returns them to the parent instead.
+    """
+    timings = StageTimings()
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+        if observe:
+            for stage, seconds in timings.stages.items():
+                _registry.observe(stage, seconds)
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "_StageTimer":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        record_stage(self.stage, perf_counter() - self.start)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoTimer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timed(stage: str):
+    """Context manager timing one stage (a no-op when METRICS_ENABLED is off)."""
+    return _StageTimer(stage) if METRICS_ENABLED else _NO_TIMER
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: collects the stage timings of each HTTP request into
+    the histograms and reports them in a Server-Timing response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        with collect_stage_timings() as timings:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    value = timings.server_timing(perf_counter() - start)
+                    message = dict(message, headers=list(message.get("headers", [])) + [
+                        (SERVER_TIMING_HEADER, value.encode("latin-1"))
+                    ])
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -34,6 +34,18 @@ class PlanetStrength(BaseModel):
     combust: bool
     strength: float
     condition: str
+    shadbala: Optional[float] = Field(None, description="Shadbala in rupas (classical planets only)")
+    shadbala_ratio: Optional[float] = Field(None, description="Shadbala over the required minimum; 1 or more is strong")
+
+class VargaChart(BaseModel):
+    name: str
+    ascendant: str
+    planets: Dict[str, str]
+    houses: List[Dict[str, str]]
+
+class AshtakavargaInfo(BaseModel):
+    bhinnashtakavarga: Dict[str, List[int]] = Field(..., description="Bindus per sign (Aries first) for each planet")
+    sarvashtakavarga: List[int] = Field(..., description="Sum of the seven tables per sign (Aries first)")
 
 class ChartResponse(BaseModel):
     name: str
@@ -43,9 +55,225 @@ class ChartResponse(BaseModel):
     dasha: DashaInfo
     planet_strengths: Optional[Dict[str, PlanetStrength]] = None
     aspects: Dict[str, List[str]]
+    ashtakavarga: Optional[AshtakavargaInfo] = None
+    vargas: Optional[Dict[str, VargaChart]] = None
 
 class ChartRequest(BaseModel):
     name: str = Field(..., description="Full name of the person")
     dob: str = Field(..., description="Date of birth in YYYY-MM-DD format")
     tob: str = Field(..., description="Time of birth in HH:MM format (24-hour)")
-    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')") 
\ No newline at end of file
+    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')") 
+    vargas: Optional[List[str]] = Field(None, description="Divisional charts to include, e.g. [\"D9\", \"D10\"]")
+
+class BatchChartRequest(BaseModel):
+    dob: List[str] = Field(..., description="Dates of birth in YYYY-MM-DD format")
+    tob: List[str] = Field(..., description="Times of birth in HH:MM format (24-hour)")
+    latitude: List[float] = Field(..., description="Birth latitudes in degrees")
+    longitude: List[float] = Field(..., description="Birth longitudes in degrees")
+
+class BatchChartResponse(BaseModel):
+    count: int
+    bodies: List[str]
+    sign_names: List[str]
+    nakshatra_names: List[str]
+    dasha_lord_names: List[str]
+    jd_ut: List[float]
+    ascendant: List[float]
+    ascendant_sign: List[int]
+    longitudes: Dict[str, List[float]]
+    speeds: Dict[str, List[float]]
+    signs: Dict[str, List[int]]
+    houses: Dict[str, List[int]]
+    nakshatras: Dict[str, List[int]]
+    padas: Dict[str, List[int]]
+    dasha_lord: List[int]
+    dasha_balance_years: List[float]
+
+class DashaPeriodsRequest(BaseModel):
+    dob: str = Field(..., description="Date of birth in YYYY-MM-DD format")
+    tob: str = Field(..., description="Time of birth in HH:MM format (24-hour)")
+    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')")
+    level: int = Field(2, ge=1, le=5, description="1=maha, 2=antar, 3=pratyantar, 4=sookshma, 5=prana")
+    start: Optional[str] = Field(None, description="Window start (YYYY-MM-DD or ISO datetime, UTC)")
+    end: Optional[str] = Field(None, description="Window end (YYYY-MM-DD or ISO datetime, UTC)")
+    cursor: Optional[float] = Field(None, description="next_cursor from the previous page")
+    limit: int = Field(100, ge=1, le=1000, description="Periods per page")
+
+class DashaActiveRequest(BaseModel):
+    dob: str = Field(..., description="Date of birth in YYYY-MM-DD format")
+    tob: str = Field(..., description="Time of birth in HH:MM format (24-hour)")
+    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')")
+    at: Optional[str] = Field(None, description="Date to query (YYYY-MM-DD or ISO datetime, UTC); default now")
+    depth: int = Field(5, ge=1, le=5, description="Number of levels to return")
+
+class DashaPeriodInfo(BaseModel):
+    level: str
+    lord: str
+    lords: List[str]
+    start_jd: float
+    end_jd: float
+    start: str
+    end: str
+
+class DashaPeriodsResponse(BaseModel):
+    level: str
+    birth_jd: float
+    balance_years: float
+    periods: List[DashaPeriodInfo]
+    next_cursor: Optional[float] = None
+
+class DashaActiveResponse(BaseModel):
+    jd: float
+    birth_jd: float
+    balance_years: float
+    periods: List[DashaPeriodInfo]
+
+class TransitRequest(BaseModel):
+    start: str = Field(..., description="Window start (YYYY-MM-DD or ISO datetime, UTC)")
+    end: str = Field(..., description="Window end (YYYY-MM-DD or ISO datetime, UTC)")
+    bodies: Optional[List[str]] = Field(None, description="Bodies to follow (default all, including Ketu)")
+    events: Optional[List[str]] = Field(None, description="sign_ingress, nakshatra_change, station_retrograde, station_direct, natal_transit")
+    dob: Optional[str] = Field(None, description="Date of birth for natal transits (YYYY-MM-DD)")
+    tob: Optional[str] = Field(None, description="Time of birth for natal transits (HH:MM, 24-hour)")
+    location: Optional[str] = Field(None, description="Place of birth for natal transits")
+    limit: int = Field(1000, ge=1, le=100000, description="Maximum events returned")
+
+class TransitEventInfo(BaseModel):
+    jd: float
+    datetime: str
+    body: str
+    event: str
+    # "from" is a Python keyword
+    from_: str = Field(..., alias="from")
+    to: str
+    longitude: float
+    retrograde: bool
+    natal_point: Optional[str] = None
+    bindus: Optional[int] = Field(None, description="Natal BAV bindus of the body in its sign (needs birth data)")
+    sarva_bindus: Optional[int] = Field(None, description="Natal SAV bindus of that sign (needs birth data)")
+
+class TransitResponse(BaseModel):
+    start_jd: float
+    end_jd: float
+    count: int
+    truncated: bool
+    natal_points: Optional[Dict[str, float]] = None
+    events: List[TransitEventInfo]
+
+class TransitNextResponse(BaseModel):
+    jd: float
+    event: Optional[TransitEventInfo] = None
+
+class LagnaBoundary(BaseModel):
+    sign: str
+    jd: float
+    utc: str
+
+class LagnaBoundariesResponse(BaseModel):
+    date: str
+    start_utc: str
+    end_utc: str
+    start_sign: str
+    boundaries: List[LagnaBoundary]
+
+class PanchangaSpan(BaseModel):
+    name: str
+    number: int
+    end: str
+
+class PanchangaDay(BaseModel):
+    date: str
+    weekday: str
+    vara: str
+    vara_lord: str
+    sunrise: str
+    sunset: str
+    tithi: List[PanchangaSpan]
+    nakshatra: List[PanchangaSpan]
+    yoga: List[PanchangaSpan]
+    karana: List[PanchangaSpan]
+
+class PanchangaResponse(BaseModel):
+    timezone: str
+    latitude: float
+    longitude: float
+    count: int
+    days: List[PanchangaDay]
+
+class RectificationRequest(BaseModel):
+    dob: str = Field(..., description="Date of birth in YYYY-MM-DD format")
+    tob: str = Field(..., description="Approximate time of birth in HH:MM format (24-hour)")
+    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')")
+    window_minutes: int = Field(60, ge=1, le=720, description="Minutes either side of tob to search")
+
+class RectificationSegment(BaseModel):
+    start_local: str
+    end_local: str
+    start_utc: str
+    end_utc: str
+    start_jd: float
+    end_jd: float
+    duration_minutes: float
+    dob: str
+    tob: str
+    lagna: str
+    navamsa_lagna: str
+    moon_sign: str
+    nakshatra: str
+    pada: int
+    houses: Dict[str, int]
+
+class RectificationResponse(BaseModel):
+    dob: str
+    tob: str
+    window_minutes: int
+    timezone: str
+    start_local: str
+    end_local: str
+    count: int
+    segments: List[RectificationSegment]
+
+class ShadbalaRequest(BaseModel):
+    dob: str = Field(..., description="Date of birth in YYYY-MM-DD format")
+    tob: str = Field(..., description="Time of birth in HH:MM format (24-hour)")
+    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')")
+
+class ShadbalaPlanet(BaseModel):
+    sthana: float = Field(..., description="Positional strength, in virupas")
+    dig: float = Field(..., description="Directional strength, in virupas")
+    kala: float = Field(..., description="Temporal strength including yuddha bala, in virupas")
+    cheshta: float = Field(..., description="Motional strength, in virupas")
+    naisargika: float = Field(..., description="Natural strength, in virupas")
+    drik: float = Field(..., description="Aspectual strength, in virupas")
+    total: float = Field(..., description="Sum of the six, in virupas")
+    rupas: float = Field(..., description="Total in rupas (60 virupas)")
+    required_rupas: float
+    ratio: float = Field(..., description="Total over the required minimum")
+
+class ShadbalaResponse(BaseModel):
+    planets: Dict[str, ShadbalaPlanet]
+    strongest: str
+
+class MatchRequest(BaseModel):
+    dob: str = Field(..., description="Date of birth in YYYY-MM-DD format")
+    tob: str = Field(..., description="Time of birth in HH:MM format (24-hour)")
+    location: str = Field(..., description="Place of birth (e.g., 'New Delhi, India')")
+    role: str = Field(..., description="'groom' or 'bride'; candidates take the other role")
+    top_k: int = Field(10, ge=1, le=1000, description="Number of matches to return")
+    min_score: float = Field(0.0, ge=0, le=36, description="Minimum Guna Milan points (out of 36)")
+
+class MatchInfo(BaseModel):
+    id: int
+    total: float
+    moon_nakshatra: str
+    moon_pada: int
+    moon_sign: str
+    kootas: Dict[str, float]
+
+class MatchResponse(BaseModel):
+    role: str
+    moon_nakshatra: str
+    moon_pada: int
+    moon_sign: str
+    candidates: int
+    matches: List[MatchInfo]
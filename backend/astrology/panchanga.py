@@ -0,0 +1,400 @@
+"""
+Panchanga engine: vara, tithi, nakshatra, yoga and karana for each day at
+a place, with sunrise, sunset and the exact end time of every element.
+
+A panchanga day runs from sunrise to the next sunrise. Sunrise and sunset
+come from swe.rise_trans and are cached in an LRU keyed on the local date
+and a grid cell of PANCHANGA_GRID_DEGREES (default 0.01, about 1 km); the
+times are computed for the centre of the cell, so every point in a cell
+shares them.
+
+The elements are floors of three monotonic functions of the sidereal Sun
+and Moon:
+
+    tithi       (Moon - Sun) / 12 deg      30 per lunar month
+    karana      (Moon - Sun) / 6 deg       60, on a fixed cycle
+    nakshatra   Moon / 13 deg 20'          27
+    yoga        (Moon + Sun) / 13 deg 20'  27
+
+Positions and speeds of the Sun and Moon are computed once per sunrise;
+each sample is shared by the day that it starts and the day before, so a
+range of N days costs N + 3 samples of each body and N + 3 sunrises (the
+last element of a day can end up to 27 hours after the next sunrise).
+Between two sunrises each function is the cubic Hermite interpolant of
+its values and rates at both ends, and every boundary inside the
+interval is solved on it by Newton's method, all at once with NumPy. The
+interpolant follows the Moon to well within PANCHANGA_ERROR_BOUND_SECONDS
+of the swisseph root; `python -m astrology.panchanga verify` checks this
+on random dates and exits non-zero if the bound is exceeded.
+
+Times are local to the place's timezone.
+
+Configuration:
+    PANCHANGA_GRID_DEGREES       sunrise cache cell size in degrees
+    PANCHANGA_SUN_CACHE_SIZE     (date, cell) entries kept in the cache
+    PANCHANGA_SUNRISE            "apparent" (default: upper limb with
+                                 refraction) or "hindu" (centre of the
+                                 disc, no refraction)
+
+    python -m astrology.panchanga day 2024-01-15 --latitude 28.6139 --longitude 77.209
+    python -m astrology.panchanga verify --samples 2000
+    python -m astrology.panchanga bench
+"""
+from datetime import date as Date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+import argparse
+import logging
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pytz
+import swisseph as swe
+
+from .charts import NAKSHATRAS
+from .dasha import jd_to_datetime
+from .ephemeris import _record_call
+from .timezones import get_timezone_resolver
+from .transits import _position_source, hermite_crossings
+
+logger = logging.getLogger(__name__)
+
+PANCHANGA_GRID_DEGREES = float(os.getenv('PANCHANGA_GRID_DEGREES', '0.01'))
+PANCHANGA_SUN_CACHE_SIZE = int(os.getenv('PANCHANGA_SUN_CACHE_SIZE', '65536'))
+PANCHANGA_SUNRISE = os.getenv('PANCHANGA_SUNRISE', 'apparent').lower()
+
+PANCHANGA_ERROR_BOUND_SECONDS = 5.0
+MAX_PANCHANGA_DAYS = 366
+
+# Extra sunrises sampled after the last day, for the end of its last elements
+_TRAILING_SAMPLES = 3
+_HERMITE_ITERATIONS = 8
+
+# (weekday, vara, lord) by date.weekday(): Monday first
+VARAS = [
+    ("Monday", "Somavara", "Moon"), ("Tuesday", "Mangalavara", "Mars"),
+    ("Wednesday", "Budhavara", "Mercury"), ("Thursday", "Guruvara", "Jupiter"),
+    ("Friday", "Shukravara", "Venus"), ("Saturday", "Shanivara", "Saturn"),
+    ("Sunday", "Ravivara", "Sun"),
+]
+
+_TITHI_NAMES = [
+    "Pratipada", "Dwitiya", "Tritiya", "Chaturthi", "Panchami", "Shashthi", "Saptami",
+    "Ashtami", "Navami", "Dashami", "Ekadashi", "Dwadashi", "Trayodashi", "Chaturdashi",
+]
+TITHIS = ([f"Shukla {name}" for name in _TITHI_NAMES] + ["Purnima"]
+          + [f"Krishna {name}" for name in _TITHI_NAMES] + ["Amavasya"])
+
+YOGAS = [
+    "Vishkambha", "Priti", "Ayushman", "Saubhagya", "Shobhana", "Atiganda", "Sukarma",
+    "Dhriti", "Shula", "Ganda", "Vriddhi", "Dhruva", "Vyaghata", "Harshana", "Vajra",
+    "Siddhi", "Vyatipata", "Variyana", "Parigha", "Shiva", "Siddha", "Sadhya", "Shubha",
+    "Shukla", "Brahma", "Indra", "Vaidhriti",
+]
+
+_MOVABLE_KARANAS = ["Bava", "Balava", "Kaulava", "Taitila", "Gara", "Vanija", "Vishti"]
+KARANAS = (["Kimstughna"] + [_MOVABLE_KARANAS[i % 7] for i in range(56)]
+           + ["Shakuni", "Chatushpada", "Naga"])
+
+# (element, function, span in degrees, names)
+_ELEMENTS = (
+    ("tithi", "elongation", 12.0, TITHIS),
+    ("nakshatra", "moon", 40.0 / 3, NAKSHATRAS),
+    ("yoga", "sum", 40.0 / 3, YOGAS),
+    ("karana", "elongation", 6.0, KARANAS),
+)
+
+_RISE_FLAGS = {
+    'apparent': swe.CALC_RISE,
+    'hindu': swe.CALC_RISE | swe.BIT_HINDU_RISING,
+}
+_SET_FLAGS = {
+    'apparent': swe.CALC_SET,
+    'hindu': swe.CALC_SET | swe.BIT_HINDU_RISING,
+}
+
+_UNIX_EPOCH_JD = 2440587.5
+
+# UTC offsets are looked up at every this many times and filled in between
+# unless two lookups differ (clocks change at most a few times a year)
+_OFFSET_PROBE_STRIDE = 7
+
+
+def _grid_cell(latitude: float, longitude: float) -> Tuple[float, float]:
+    if PANCHANGA_GRID_DEGREES <= 0:
+        return latitude, longitude
+    return (math.floor(latitude / PANCHANGA_GRID_DEGREES),
+            math.floor(longitude / PANCHANGA_GRID_DEGREES))
+
+
+@lru_cache(maxsize=PANCHANGA_SUN_CACHE_SIZE)
+def _cell_sun_times(day: int, cell_lat: float, cell_lon: float) -> Tuple[float, float]:
+    """(sunrise, sunset) Julian days (UT) of a date (ordinal) at the centre of a grid cell."""
+    if PANCHANGA_GRID_DEGREES > 0:
+        latitude = (cell_lat + 0.5) * PANCHANGA_GRID_DEGREES
+        longitude = (cell_lon + 0.5) * PANCHANGA_GRID_DEGREES
+    else:
+        latitude, longitude = cell_lat, cell_lon
+    geopos = (longitude, latitude, 0.0)
+    # Search from local mean midnight, so the events found belong to this date
+    midnight = Date.fromordinal(day).toordinal() + 1721424.5 - longitude / 360.0
+    result, rise = swe.rise_trans(midnight, swe.SUN, _RISE_FLAGS[PANCHANGA_SUNRISE], geopos)
+    _record_call()
+    if result != 0:
+        raise ValueError(f"The Sun does not rise on {Date.fromordinal(day)} at latitude {latitude:.2f}")
+    result, set_ = swe.rise_trans(rise[0], swe.SUN, _SET_FLAGS[PANCHANGA_SUNRISE], geopos)
+    _record_call()
+    if result != 0:
+        raise ValueError(f"The Sun does not set on {Date.fromordinal(day)} at latitude {latitude:.2f}")
+    return rise[0], set_[0]
+
+
+def sun_times(day: Date, latitude: float, longitude: float) -> Tuple[float, float]:
+    """Cached (sunrise, sunset) Julian days (UT) of a local date at a place."""
+    return _cell_sun_times(day.toordinal(), *_grid_cell(latitude, longitude))
+
+
+def sun_cache_stats() -> Dict[str, int]:
+    """Counters of the sunrise LRU in this process."""
+    info = _cell_sun_times.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+def _boundaries(t: np.ndarray, values: np.ndarray, rates: np.ndarray,
+                span: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Times at which an increasing unwrapped function sampled at t crosses a
+    multiple of span, and the multiple entered (k for k * span).
+    """
+    first = np.floor(values[:-1] / span).astype(np.int64) + 1
+    last = np.floor(values[1:] / span).astype(np.int64)
+    counts = np.maximum(last - first + 1, 0)
+    interval = np.repeat(np.arange(len(t) - 1), counts)
+    offsets = np.cumsum(counts) - counts
+    k = first[interval] + np.arange(len(interval)) - offsets[interval]
+    jd = hermite_crossings(t[interval], t[interval + 1], values[interval], values[interval + 1],
+                           rates[interval], rates[interval + 1], k * span, _HERMITE_ITERATIONS)
+    return jd, k
+
+
+def _unwrap(longitudes: np.ndarray) -> np.ndarray:
+    return longitudes[0] + np.concatenate([[0.0], np.cumsum(np.mod(np.diff(longitudes), 360.0))])
+
+
+class _LocalClock:
+    """Formats sorted arrays of Julian days (UT) as local times in one zone."""
+
+    def __init__(self, zone):
+        self.zone = zone
+
+    def _offset(self, jd: float) -> float:
+        utc = pytz.UTC.localize(jd_to_datetime(jd))
+        return utc.astimezone(self.zone).utcoffset().total_seconds() / 86400.0
+
+    def offsets(self, jd: np.ndarray) -> np.ndarray:
+        """UTC offsets in days, looked up at every _OFFSET_PROBE_STRIDE-th time and where they change."""
+        probes = np.unique(np.append(np.arange(0, len(jd), _OFFSET_PROBE_STRIDE), len(jd) - 1))
+        probe_offsets = np.array([self._offset(float(jd[i])) for i in probes])
+        offsets = np.repeat(probe_offsets[:-1], np.diff(probes))
+        offsets = np.append(offsets, probe_offsets[-1])
+        for i in np.flatnonzero(probe_offsets[:-1] != probe_offsets[1:]).tolist():
+            for j in range(probes[i] + 1, probes[i + 1]):
+                offsets[j] = self._offset(float(jd[j]))
+        return offsets
+
+    def format(self, jd: np.ndarray) -> List[str]:
+        seconds = np.rint((jd + self.offsets(jd) - _UNIX_EPOCH_JD) * 86400.0).astype(np.int64)
+        return np.datetime_as_string(seconds.astype("datetime64[s]"), unit="s").tolist()
+
+
+def _sample(dates: List[Date], latitude: float, longitude: float):
+    """Sunrises, sunsets and the three panchanga functions (values, rates) at each sunrise."""
+    times = np.array([sun_times(day, latitude, longitude) for day in dates])
+    sunrise, sunset = times[:, 0], times[:, 1]
+
+    source = _position_source(float(sunrise[0]), float(sunrise[-1]), 'auto')
+    sun, sun_speed = source.positions('Sun', sunrise)
+    moon, moon_speed = source.positions('Moon', sunrise)
+    functions = {
+        "elongation": (_unwrap(np.mod(moon - sun, 360.0)), moon_speed - sun_speed),
+        "moon": (_unwrap(moon), moon_speed),
+        "sum": (_unwrap(np.mod(moon + sun, 360.0)), moon_speed + sun_speed),
+    }
+    return sunrise, sunset, functions
+
+
+def panchanga_days(start: Date, days: int, latitude: float, longitude: float,
+                   timezone_str: str) -> List[Dict[str, Any]]:
+    """Panchanga of consecutive local dates at a place."""
+    if not 0 < days <= MAX_PANCHANGA_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_PANCHANGA_DAYS}")
+    dates = [start + timedelta(days=i) for i in range(days + _TRAILING_SAMPLES)]
+    sunrise, sunset, functions = _sample(dates, latitude, longitude)
+
+    clock = _LocalClock(get_timezone_resolver().zone(timezone_str))
+    sunrise_local = clock.format(sunrise[:days])
+    sunset_local = clock.format(sunset[:days])
+
+    elements = {}
+    for name, function, span, names in _ELEMENTS:
+        values, rates = functions[function]
+        jd, k = _boundaries(sunrise, values, rates, span)
+        # An event at jd[j] ends the element before the multiple k[j]
+        index = ((k - 1) % len(names)).tolist()
+        spans = [{"name": names[i], "number": i + 1, "end": end} for i, end in zip(index, clock.format(jd))]
+        # Day d: from the first event after its sunrise to the first after the next sunrise
+        bounds = np.searchsorted(jd, sunrise[:days + 1], side="right").tolist()
+        elements[name] = (spans, bounds)
+
+    result = []
+    for d, day in enumerate(dates[:days]):
+        weekday, vara, lord = VARAS[day.weekday()]
+        entry = {
+            "date": day.isoformat(),
+            "weekday": weekday,
+            "vara": vara,
+            "vara_lord": lord,
+            "sunrise": sunrise_local[d],
+            "sunset": sunset_local[d],
+        }
+        for name, (spans, bounds) in elements.items():
+            entry[name] = spans[bounds[d]:bounds[d + 1] + 1]
+        result.append(entry)
+    return result
+
+
+def query_panchanga(date: str, latitude: float, longitude: float, days: int = 1) -> Dict[str, Any]:
+    """Panchanga of one or more local dates (YYYY-MM-DD) at a place."""
+    try:
+        try:
+            start = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError(f"Invalid date: {date}. Use YYYY-MM-DD")
+        timezone_str = get_timezone_resolver().timezone_at(latitude, longitude)
+        if not timezone_str:
+            raise ValueError(f"Could not determine timezone for coordinates: {latitude}, {longitude}")
+        result = panchanga_days(start, days, latitude, longitude, timezone_str)
+        logger.info(f"Computed panchanga for {days} days from {date} at {latitude}, {longitude}")
+        return {"timezone": timezone_str, "latitude": latitude, "longitude": longitude,
+                "count": len(result), "days": result}
+    except Exception as e:
+        logger.error(f"Error computing panchanga: {str(e)}")
+        raise
+
+
+def query_panchanga_year(year: int, latitude: float, longitude: float) -> Dict[str, Any]:
+    """Panchanga of every day of a calendar year at a place."""
+    days = (Date(year + 1, 1, 1) - Date(year, 1, 1)).days
+    return query_panchanga(f"{year:04d}-01-01", latitude, longitude, days)
+
+
+# --- Verification and benchmarks ---
+
+def _reference_value(function: str, jd: float) -> Tuple[float, float]:
+    """A panchanga function and its rate at jd from swisseph, as charts compute them."""
+    ayanamsa = swe.get_ayanamsa_ut(jd)
+    sun = swe.calc_ut(jd, swe.SUN, swe.FLG_SWIEPH | swe.FLG_SPEED)[0]
+    moon = swe.calc_ut(jd, swe.MOON, swe.FLG_SWIEPH | swe.FLG_SPEED)[0]
+    if function == "elongation":
+        return moon[0] - sun[0], moon[3] - sun[3]
+    if function == "moon":
+        return moon[0] - ayanamsa, moon[3]
+    return moon[0] + sun[0] - 2 * ayanamsa, moon[3] + sun[3]
+
+
+def verify(samples: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Largest difference in seconds between the interpolated end times and
+    the swisseph roots (Newton's method on swisseph), per element, over
+    samples random 30-day ranges at random places.
+    """
+    rng = np.random.default_rng(seed)
+    worst = {name: 0.0 for name, _, _, _ in _ELEMENTS}
+    for _ in range(samples):
+        start = Date(1900, 1, 1) + timedelta(days=int(rng.integers(0, 73000)))
+        latitude, longitude = float(rng.uniform(-60, 60)), float(rng.uniform(-180, 180))
+        sunrise, _, functions = _sample([start + timedelta(days=i) for i in range(30)], latitude, longitude)
+        for name, function, span, _ in _ELEMENTS:
+            values, rates = functions[function]
+            jd, k = _boundaries(sunrise, values, rates, span)
+            for t, multiple in zip(jd.tolist(), k.tolist()):
+                root = t
+                for _ in range(6):
+                    value, rate = _reference_value(function, root)
+                    root -= ((value - multiple * span + 180.0) % 360.0 - 180.0) / rate
+                worst[name] = max(worst[name], abs(t - root) * 86400.0)
+    return worst
+
+
+def _bench(cities: int, rounds: int) -> None:
+    rng = np.random.default_rng(1)
+    places = [(float(rng.uniform(-50, 60)), float(rng.uniform(-180, 180))) for _ in range(cities)]
+    zones = [get_timezone_resolver().timezone_at(lat, lon) or "UTC" for lat, lon in places]
+    start = Date(2024, 1, 1)
+    panchanga_days(start, 5, *places[0], zones[0])
+
+    cold, warm = [], []
+    for _ in range(rounds):
+        _cell_sun_times.cache_clear()
+        for (latitude, longitude), zone in zip(places, zones):
+            began = time.perf_counter()
+            panchanga_days(start, 366, latitude, longitude, zone)
+            cold.append(time.perf_counter() - began)
+            began = time.perf_counter()
+            panchanga_days(start, 366, latitude, longitude, zone)
+            warm.append(time.perf_counter() - began)
+    print(f"year for one city, cold sunrise cache: median {np.median(cold) * 1e3:7.1f} ms, "
+          f"max {max(cold) * 1e3:7.1f} ms")
+    print(f"year for one city, warm sunrise cache: median {np.median(warm) * 1e3:7.1f} ms, "
+          f"max {max(warm) * 1e3:7.1f} ms")
+    print(f"sunrise cache: {sun_cache_stats()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    day = commands.add_parser("day", help="panchanga of one or more days at a place")
+    day.add_argument("date", help="YYYY-MM-DD")
+    day.add_argument("--latitude", type=float, required=True)
+    day.add_argument("--longitude", type=float, required=True)
+    day.add_argument("--days", type=int, default=1)
+    check = commands.add_parser("verify", help="compare end times against swisseph roots")
+    check.add_argument("--samples", type=int, default=200)
+    check.add_argument("--seed", type=int, default=0)
+    bench = commands.add_parser("bench", help="time a year of panchanga for one city")
+    bench.add_argument("--cities", type=int, default=20)
+    bench.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    from .charts import EPHE_PATH
+    if EPHE_PATH:
+        swe.set_ephe_path(EPHE_PATH)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+
+    if args.command == "day":
+        result = query_panchanga(args.date, args.latitude, args.longitude, args.days)
+        for entry in result["days"]:
+            print(f"{entry['date']} {entry['vara']} ({entry['vara_lord']})  "
+                  f"sunrise {entry['sunrise'][11:]}  sunset {entry['sunset'][11:]}")
+            for name, _, _, _ in _ELEMENTS:
+                spans = ", then ".join(f"{span['name']} until {span['end'].replace('T', ' ')}"
+                                       for span in entry[name])
+                print(f"  {name:<10} {spans}")
+    elif args.command == "verify":
+        errors = verify(args.samples, args.seed)
+        for name, error in errors.items():
+            print(f"{name:<10} max {error:.3f} s")
+        if max(errors.values()) > PANCHANGA_ERROR_BOUND_SECONDS:
+            print(f"FAILED: error bound is {PANCHANGA_ERROR_BOUND_SECONDS} s")
+            sys.exit(1)
+        print(f"OK: within {PANCHANGA_ERROR_BOUND_SECONDS} s")
+    else:
+        _bench(args.cities, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Execution model for the API handlers.
+
+The handlers are async, so nothing that blocks may run on the event loop:
+
+  - geocoding and LLM calls are network bound and go to a bounded thread
+    pool (run_io), as do reads and writes of the SQLite tiers of the chart
+    and report caches;
+  - chart maths is CPU bound and swisseph holds the GIL and keeps its
+    settings (set_ephe_path, set_sid_mode) per thread, so it runs in a
+    process pool whose initializer sets swisseph up once per worker
+    (run_chart_task). With CHART_WORKERS=0 it runs in the thread pool
+    instead, still off the event loop; its threads are set up the same way.
+
+Each stage also has its own concurrency limit, so that a burst of slow
+Gemini calls cannot take every thread and starve geocoding, and chart
+requests queue in front of the process pool instead of inside it. The chart
+and report caches are checked in the server process before anything is sent
+to a worker or to Gemini.
+
+Stage timings (metrics.py) follow the work: thread pool calls run in a copy
+of the caller's context, so they add to the request's timings, and chart
+workers send theirs back with the result to be merged in.
+
+Configuration:
+    CHART_WORKERS            chart worker processes (0 runs charts in threads)
+    IO_WORKERS               threads for geocoding, LLM and cache calls
+    GEOCODE_CONCURRENCY      concurrent geocoding lookups
+    CACHE_CONCURRENCY        concurrent SQLite cache reads and writes
+    CHART_CONCURRENCY        concurrent chart computations
+    LLM_CONCURRENCY          concurrent LLM calls
+    CHART_WORKER_LOG_LEVEL   log level inside chart workers
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+
+from .cache import get_chart_cache
+from .chart_model import Chart, compute_chart
+from .ephemeris import count_ephemeris_calls
+from .llm_query import GEMINI_MODEL, build_report_prompt, generate_report_text, stream_astrology_report
+from .metrics import collect_stage_timings, merge_stage_timings, timed
+from .report_cache import get_report_cache
+from .shadbala import chart_shadbala
+
+logger = logging.getLogger(__name__)
+
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', '2'))
+IO_WORKERS = int(os.getenv('IO_WORKERS', '16'))
+CHART_WORKER_LOG_LEVEL = os.getenv('CHART_WORKER_LOG_LEVEL', 'INFO').upper()
+
+STAGE_LIMITS = {
+    'geocode': int(os.getenv('GEOCODE_CONCURRENCY', '8')),
+    'cache': int(os.getenv('CACHE_CONCURRENCY', '8')),
+    'chart': int(os.getenv('CHART_CONCURRENCY', str(max(CHART_WORKERS, 1) * 4))),
+    'llm': int(os.getenv('LLM_CONCURRENCY', '4')),
+}
+
+
+def _configure_swisseph() -> None:
+    """Ephemeris path and Lahiri ayanamsa for the calling thread."""
+    import swisseph as swe
+    from . import charts
+
+    if charts.EPHE_PATH:
+        swe.set_ephe_path(charts.EPHE_PATH)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+
+
+def _init_chart_worker() -> None:
+    """Process pool initializer: configure swisseph and warm the shared resources."""
+    from .geocoding import get_gazetteer
+    from .lagna import preload_lagna_tables
+    from .timezones import get_timezone_resolver
+    from .transit_calendar import preload_transit_calendar
+
+    _configure_swisseph()
+    get_gazetteer()
+    get_timezone_resolver()
+    preload_transit_calendar()
+    preload_lagna_tables()
+    logging.getLogger("astrology").setLevel(CHART_WORKER_LOG_LEVEL)
+    logger.info(f"Chart worker {os.getpid()} ready")
+
+
+def _counted(func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, int, Dict[str, float]]:
+    """Run func and return its result with the ephemeris calls it made and its stage timings."""
+    with collect_stage_timings(observe=False) as timings, count_ephemeris_calls() as ephemeris_calls:
+        result = func(*args, **kwargs)
+    return result, ephemeris_calls.calls, timings.stages
+
+
+class Pipeline:
+    """Thread pool, chart process pool and per-stage semaphores."""
+
+    def __init__(self, chart_workers: int = CHART_WORKERS, io_workers: int = IO_WORKERS,
+                 stage_limits: Optional[Dict[str, int]] = None):
+        self.chart_workers = chart_workers
+        self.stage_limits = dict(STAGE_LIMITS, **(stage_limits or {}))
+        # swisseph settings are thread-local: without the initializer charts
+        # computed here (CHART_WORKERS=0) would use the default ayanamsa
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io",
+                                          initializer=_configure_swisseph)
+        self.chart_pool: Executor = self.io_pool
+        if chart_workers > 0:
+            self.chart_pool = ProcessPoolExecutor(
+                max_workers=chart_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chart_worker
+            )
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _limit(self, stage: str) -> asyncio.Semaphore:
+        # Created on first use so that they belong to the running event loop
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            semaphore = self._semaphores[stage] = asyncio.Semaphore(self.stage_limits[stage])
+        return semaphore
+
+    async def run_io(self, stage: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking network or disk call in the thread pool under the stage's limit."""
+        async with self._limit(stage):
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self.io_pool, partial(context.run, func, *args, **kwargs))
+
+    async def stream_io(self, stage: str, func: Callable[..., Iterable[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Consume a blocking iterator, func(*args, **kwargs), in the thread pool
+        and yield its items on the event loop as they arrive. Closing the
+        async iterator early (e.g. the client disconnected) tells the thread
+        to stop consuming before the next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        finished = object()
+
+        def deliver(item: Any, error: Optional[BaseException] = None) -> None:
+            if not stopped.is_set():
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+                except RuntimeError:  # event loop already closed
+                    stopped.set()
+
+        def produce() -> None:
+            try:
+                for item in func(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    deliver(item)
+            except Exception as e:
+                deliver(finished, e)
+            else:
+                deliver(finished)
+
+        async with self._limit(stage):
+            loop.run_in_executor(self.io_pool, contextvars.copy_context().run, produce)
+            try:
+                while True:
+                    item, error = await queue.get()
+                    if item is finished:
+                        if error is not None:
+                            raise error
+                        return
+                    yield item
+            finally:
+                stopped.set()
+
+    async def run_chart_task(self, func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, int]:
+        """
+        Run chart maths in a worker. func must be a picklable module-level
+        function. Returns (result, ephemeris calls made in the worker); the
+        worker's stage timings are merged into the caller's.
+        """
+        with timed("chart_task"):
+            async with self._limit('chart'):
+                loop = asyncio.get_running_loop()
+                result, calls, stages = await loop.run_in_executor(
+                    self.chart_pool, partial(_counted, func, *args, **kwargs)
+                )
+        merge_stage_timings(stages)
+        return result, calls
+
+    async def warm_up(self) -> None:
+        """Start every chart worker so the first requests do not pay for it."""
+        if self.chart_workers > 0:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[
+                loop.run_in_executor(self.chart_pool, os.getpid) for _ in range(self.chart_workers)
+            ])
+
+    def shutdown(self) -> None:
+        if self.chart_pool is not self.io_pool:
+            self.chart_pool.shutdown(wait=True)
+        self.io_pool.shutdown(wait=True)
+
+
+_pipeline: Optional[Pipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> Pipeline:
+    """Process-wide pipeline, created on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = Pipeline()
+    return _pipeline
+
+
+def configure_pipeline(**kwargs) -> Pipeline:
+    """Replace the process-wide pipeline with one built from Pipeline(**kwargs)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.shutdown()
+        _pipeline = Pipeline(**kwargs)
+    return _pipeline
+
+
+async def start_pipeline() -> Pipeline:
+    """Create the pools and start the chart workers (called at startup)."""
+    pipeline = get_pipeline()
+    await pipeline.warm_up()
+    logger.info(f"Pipeline ready ({pipeline.chart_workers} chart workers, limits {pipeline.stage_limits})")
+    return pipeline
+
+
+def stop_pipeline() -> None:
+    """Shut the pools down (called at shutdown)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.shutdown()
+            _pipeline = None
+
+
+async def get_chart(dob: str, tob: str, latitude: float, longitude: float) -> Tuple[Chart, int]:
+    """
+    Chart for this birth data from the cache, or computed in a chart worker
+    and cached. Returns (chart, ephemeris calls made); only the compact
+    Chart crosses the process boundary, and callers expand it with
+    to_dict()/to_response().
+    """
+    cache = get_chart_cache()
+    chart = cache.lookup_memory(dob, tob, latitude, longitude)
+    if chart is None and cache.disk is not None:
+        # The SQLite tier blocks, so it is read in the thread pool
+        chart = await get_pipeline().run_io('cache', cache.lookup_disk, dob, tob, latitude, longitude)
+    if chart is not None:
+        return chart, 0
+
+    chart, calls = await get_pipeline().run_chart_task(
+        compute_chart, dob=dob, tob=tob, latitude=latitude, longitude=longitude
+    )
+    if cache.disk is not None:
+        await get_pipeline().run_io('cache', cache.store, dob, tob, latitude, longitude, chart)
+    else:
+        cache.store(dob, tob, latitude, longitude, chart)
+    return chart, calls
+
+
+async def get_report_chart_data(chart: Chart, name: str, latitude: float,
+                                longitude: float) -> Tuple[Dict[str, Any], int]:
+    """
+    chart.to_dict(name) with Shadbala in the planet strengths, for the
+    report prompt. Shadbala is computed in a chart worker from the chart's
+    own positions; returns (chart data, ephemeris calls made).
+    """
+    shadbala, calls = await get_pipeline().run_chart_task(
+        chart_shadbala, chart=chart, latitude=latitude, longitude=longitude
+    )
+    return chart.to_dict(name, shadbala=shadbala), calls
+
+
+async def get_report(chart_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Report for a chart from the report cache, from an identical generation
+    in flight, or from a new Gemini call in the thread pool.
+    """
+    with timed("prompt"):
+        prompt = build_report_prompt(chart_data)
+    text = await get_report_cache().get_or_generate(
+        prompt, GEMINI_MODEL, lambda: get_pipeline().run_io('llm', generate_report_text, prompt)
+    )
+    return {
+        "overall_analysis": text,
+        "chart_data": chart_data
+    }
+
+
+def stream_report(chart_data: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Report text for a chart in chunks, through the report cache: streamed
+    from Gemini, or in one chunk when cached or already being generated.
+    """
+    with timed("prompt"):
+        prompt = build_report_prompt(chart_data)
+    return get_report_cache().stream(
+        prompt, GEMINI_MODEL, lambda: get_pipeline().stream_io('llm', stream_astrology_report, chart_data)
+    )
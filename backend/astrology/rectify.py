@@ -0,0 +1,290 @@
+"""
+Birth-time rectification: the distinct chart segments inside a window of
+possible birth times.
+
+A segment is an interval over which the lagna sign, the Moon's nakshatra
+and pada and the navamsa (D9) lagna all stay the same. Both the lagna sign
+and the D9 lagna change exactly when the sidereal ascendant crosses a
+multiple of 3 deg 20' (a navamsa), and the Moon's pada changes when the
+Moon crosses a multiple of 3 deg 20', so the segment boundaries are the
+roots of two monotonic functions:
+
+  ascendant   lagna_boundaries() with a navamsa span: a scan with the
+              closed-form lagna engine, then bisection of every crossing
+              at once (no ephemeris calls)
+  Moon        the Moon's positions and speeds at both ends of the window,
+              then transits._find_crossings() for every pada boundary in
+              between: a cubic Hermite guess refined by safeguarded Newton,
+              typically one or two calc_ut calls per boundary
+
+Every other body is computed once, at the centre of the window, and moved
+linearly with its speed to each segment's midpoint for the house
+placements; over half a day even Mercury's speed changes too little for
+that to matter.
+
+Configuration:
+    RECTIFY_MAX_WINDOW_MINUTES   largest accepted half-window (default 720)
+
+    python -m astrology.rectify verify --windows 200
+    python -m astrology.rectify bench
+    python -m astrology.rectify segments 1990-05-15 14:30 --latitude 28.61 --longitude 77.21 --window 60
+"""
+from datetime import timedelta
+from typing import Any, Dict, List, Tuple
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pytz
+import swisseph as swe
+
+from .charts import NAKSHATRAS, ZODIAC_SIGNS, birth_julian_day, compute_planet_snapshot
+from .dasha import jd_to_datetime
+from .lagna import lagna_boundaries, sidereal_ascendants
+from .timezones import get_timezone_resolver
+from .transits import _find_crossings, _position_source
+from .vargas import varga_signs
+
+logger = logging.getLogger(__name__)
+
+RECTIFY_MAX_WINDOW_MINUTES = int(os.getenv('RECTIFY_MAX_WINDOW_MINUTES', '720'))
+
+# One navamsa, which is also one nakshatra pada
+NAVAMSA_SPAN = 30.0 / 9
+PADA_COUNT = 108
+
+
+def _moon_crossings(jd_start: float, jd_end: float) -> Tuple[int, np.ndarray]:
+    """Pada index (0..107) of the Moon at jd_start and the times it enters the next ones before jd_end."""
+    source = _position_source(jd_start, jd_end, 'auto')
+    lon, speed = source.positions('Moon', np.array([jd_start, jd_end]))
+    l_a = float(lon[0])
+    l_b = l_a + (float(lon[1]) - l_a) % 360.0
+    first = int(l_a // NAVAMSA_SPAN)
+    target = NAVAMSA_SPAN * np.arange(first + 1, int(l_b // NAVAMSA_SPAN) + 1)
+    if not len(target):
+        return first % PADA_COUNT, target
+    count = len(target)
+    jd, _, _ = _find_crossings(
+        source, 'Moon',
+        np.full(count, jd_start), np.full(count, jd_end),
+        np.full(count, l_a), np.full(count, l_b),
+        np.full(count, float(speed[0])), np.full(count, float(speed[1])),
+        target
+    )
+    return first % PADA_COUNT, np.sort(jd)
+
+
+def rectification_segments(jd_start: float, jd_end: float, latitude: float,
+                           longitude: float) -> List[Dict[str, Any]]:
+    """
+    Chart segments between two Julian days (UT): start and end jd, lagna,
+    navamsa lagna, Moon sign, nakshatra and pada, and whole-sign houses of
+    every body, in time order.
+    """
+    _, ascendant_changes = lagna_boundaries(jd_start, jd_end, latitude, longitude, span=NAVAMSA_SPAN)
+    first_pada, moon_changes = _moon_crossings(jd_start, jd_end)
+
+    edges = np.unique(np.concatenate([
+        [jd_start, jd_end], [jd for jd, _ in ascendant_changes], moon_changes
+    ]))
+    starts, ends = edges[:-1], edges[1:]
+    mids = (starts + ends) / 2
+
+    ascendant = sidereal_ascendants(mids, latitude, longitude)
+    lagna = (ascendant // 30).astype(np.int64)
+    navamsa_lagna = varga_signs(ascendant, ["D9"])[0]
+    pada = (first_pada + np.searchsorted(moon_changes, mids)) % PADA_COUNT
+
+    snapshot = compute_planet_snapshot(float((jd_start + jd_end) / 2))
+    bodies = [name for name in snapshot.longitudes if name != 'Moon']
+    body_signs = {
+        name: (np.mod(snapshot.longitudes[name] + snapshot.speeds[name] * (mids - snapshot.jd), 360.0) // 30)
+        .astype(np.int64)
+        for name in bodies
+    }
+    body_signs['Moon'] = pada // 9
+
+    segments = []
+    for i in range(len(mids)):
+        sign = int(lagna[i])
+        segments.append({
+            "start_jd": float(starts[i]),
+            "end_jd": float(ends[i]),
+            "lagna": ZODIAC_SIGNS[sign],
+            "navamsa_lagna": ZODIAC_SIGNS[int(navamsa_lagna[i])],
+            "moon_sign": ZODIAC_SIGNS[int(pada[i]) // 9],
+            "nakshatra": NAKSHATRAS[int(pada[i]) // 4],
+            "pada": int(pada[i]) % 4 + 1,
+            "houses": {name: (int(signs[i]) - sign) % 12 + 1 for name, signs in body_signs.items()}
+        })
+    return segments
+
+
+def query_rectification(dob: str, tob: str, latitude: float, longitude: float,
+                        window_minutes: int = 60) -> Dict[str, Any]:
+    """
+    The chart segments for birth times within window_minutes either side of
+    a local birth date and time, with local and UTC times for every segment.
+    """
+    try:
+        if not 0 < window_minutes <= RECTIFY_MAX_WINDOW_MINUTES:
+            raise ValueError(f"window_minutes must be between 1 and {RECTIFY_MAX_WINDOW_MINUTES}")
+        jd = birth_julian_day(dob, tob, latitude, longitude)
+        jd_start = jd - window_minutes / 1440.0
+        jd_end = jd + window_minutes / 1440.0
+        segments = rectification_segments(jd_start, jd_end, latitude, longitude)
+
+        resolver = get_timezone_resolver()
+        timezone_str = resolver.timezone_at(latitude, longitude)
+        zone = resolver.zone(timezone_str)
+
+        def to_utc(jd_ut: float):
+            # Nearest second, so that a window of whole minutes ends on a whole minute
+            return (jd_to_datetime(jd_ut) + timedelta(microseconds=500000)).replace(microsecond=0)
+
+        def local(jd_ut: float) -> str:
+            utc = pytz.UTC.localize(to_utc(jd_ut))
+            return utc.astimezone(zone).replace(tzinfo=None).isoformat()
+
+        def utc(jd_ut: float) -> str:
+            return to_utc(jd_ut).isoformat()
+
+        for segment in segments:
+            start, end = segment["start_jd"], segment["end_jd"]
+            middle = pytz.UTC.localize(jd_to_datetime((start + end) / 2)).astimezone(zone)
+            segment.update({
+                "start_local": local(start),
+                "end_local": local(end),
+                "start_utc": utc(start),
+                "end_utc": utc(end),
+                "duration_minutes": round((end - start) * 1440.0, 2),
+                "tob": middle.strftime("%H:%M"),
+                "dob": middle.strftime("%Y-%m-%d")
+            })
+
+        logger.info(f"Found {len(segments)} chart segments within {window_minutes} minutes of {dob} {tob}")
+        return {
+            "dob": dob,
+            "tob": tob,
+            "window_minutes": window_minutes,
+            "timezone": timezone_str,
+            "start_local": local(jd_start),
+            "end_local": local(jd_end),
+            "count": len(segments),
+            "segments": segments
+        }
+    except Exception as e:
+        logger.error(f"Error rectifying birth time: {str(e)}")
+        raise
+
+
+# --- Verification and benchmarks ---
+
+def _reference_state(jd: float, latitude: float, longitude: float) -> Tuple[int, int, int]:
+    """(lagna, D9 lagna, Moon pada index) from swe.houses and swe.calc_ut."""
+    ayanamsa = swe.get_ayanamsa_ut(jd)
+    ascendant = (swe.houses(jd, latitude, longitude)[0][0] - ayanamsa) % 360.0
+    moon = (swe.calc_ut(jd, swe.MOON)[0][0] - ayanamsa) % 360.0
+    return (int(ascendant // 30), int(varga_signs(ascendant, ["D9"])[0]), int(moon // NAVAMSA_SPAN))
+
+
+def verify(windows: int, seed: int = 0, window_minutes: int = 120,
+           margin_seconds: float = 0.05) -> Dict[str, int]:
+    """
+    Check segments of random windows against swisseph: the state just inside
+    both ends of every segment must match the segment, and the states either
+    side of every boundary must differ.
+    """
+    rng = np.random.default_rng(seed)
+    margin = margin_seconds / 86400.0
+    checked = mismatches = 0
+    for _ in range(windows):
+        jd = rng.uniform(2415020.5, 2488069.5)
+        latitude, longitude = rng.uniform(-60.0, 60.0), rng.uniform(-180.0, 180.0)
+        segments = rectification_segments(jd, jd + window_minutes / 1440.0, latitude, longitude)
+        for segment in segments:
+            expected = (ZODIAC_SIGNS.index(segment["lagna"]), ZODIAC_SIGNS.index(segment["navamsa_lagna"]),
+                        NAKSHATRAS.index(segment["nakshatra"]) * 4 + segment["pada"] - 1)
+            span = segment["end_jd"] - segment["start_jd"]
+            for t in (segment["start_jd"] + min(margin, span / 2), segment["end_jd"] - min(margin, span / 2)):
+                checked += 1
+                if _reference_state(t, latitude, longitude) != expected:
+                    mismatches += 1
+        for before, after in zip(segments, segments[1:]):
+            checked += 1
+            if all(before[key] == after[key] for key in ("lagna", "navamsa_lagna", "nakshatra", "pada")):
+                mismatches += 1
+    return {"windows": windows, "checked": checked, "mismatches": mismatches}
+
+
+def _bench(windows: int, window_minutes: int) -> None:
+    from .chart_model import compute_chart
+
+    rng = np.random.default_rng(1)
+    cases = [(float(rng.uniform(2433282.5, 2466154.5)), float(rng.uniform(-50, 60)), float(rng.uniform(-180, 180)))
+             for _ in range(windows)]
+    start = time.perf_counter()
+    segments = sum(len(rectification_segments(jd - window_minutes / 1440.0, jd + window_minutes / 1440.0, lat, lon))
+                   for jd, lat, lon in cases)
+    elapsed = (time.perf_counter() - start) / windows
+    print(f"root-finding: {elapsed * 1e3:8.2f} ms per +/-{window_minutes} min window "
+          f"({segments / windows:.1f} segments)")
+
+    # What resubmitting /charts once a minute costs (charts are computed from local time)
+    jd, lat, lon = cases[0]
+    dt = jd_to_datetime(jd)
+    charts = 2 * window_minutes + 1
+    start = time.perf_counter()
+    for minute in range(-window_minutes, window_minutes + 1):
+        local = dt + timedelta(minutes=minute)
+        compute_chart(local.strftime("%Y-%m-%d"), local.strftime("%H:%M"), lat, lon)
+    sampled = time.perf_counter() - start
+    print(f"minute sampling: {sampled * 1e3:8.2f} ms per window ({charts} compute_chart calls, "
+          f"{elapsed and sampled / elapsed:.0f}x slower)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("verify", help="compare segments against swisseph")
+    check.add_argument("--windows", type=int, default=200)
+    check.add_argument("--seed", type=int, default=0)
+    check.add_argument("--window-minutes", type=int, default=120)
+    bench = commands.add_parser("bench", help="root-finding against minute-by-minute charts")
+    bench.add_argument("--windows", type=int, default=200)
+    bench.add_argument("--window-minutes", type=int, default=60)
+    segments = commands.add_parser("segments", help="chart segments around a local birth time")
+    segments.add_argument("dob", help="YYYY-MM-DD")
+    segments.add_argument("tob", help="HH:MM")
+    segments.add_argument("--latitude", type=float, required=True)
+    segments.add_argument("--longitude", type=float, required=True)
+    segments.add_argument("--window", type=int, default=60, help="minutes either side")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    from .charts import EPHE_PATH
+    if EPHE_PATH:
+        swe.set_ephe_path(EPHE_PATH)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+
+    if args.command == "verify":
+        result = verify(args.windows, args.seed, args.window_minutes)
+        print(f"{result['windows']} windows, {result['checked']} checks, {result['mismatches']} mismatches")
+        if result["mismatches"]:
+            sys.exit(1)
+    elif args.command == "bench":
+        _bench(args.windows, args.window_minutes)
+    else:
+        result = query_rectification(args.dob, args.tob, args.latitude, args.longitude, args.window)
+        print(f"{result['start_local']} .. {result['end_local']} ({result['timezone']})")
+        for segment in result["segments"]:
+            print(f"{segment['start_local']} - {segment['end_local']}  {segment['lagna']:<12}"
+                  f"D9 {segment['navamsa_lagna']:<12}{segment['nakshatra']} {segment['pada']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Report cache and request coalescing for Gemini calls.
+
+The report prompt is built deterministically from chart data, so the
+generated text is cached under a hash of the final prompt plus the model
+name. It reuses the LRU and SQLite tiers from cache.py; the SQLite tier is
+read and written in the pipeline's thread pool. The prompt includes
+the name and the time-dependent dasha fields, so an entry naturally stops
+matching once those change.
+
+Concurrent requests for the same key are coalesced (single flight): the
+first one starts the Gemini call and the others wait for its result instead
+of starting their own. Generation runs as its own task, so a waiting request
+that goes away does not cancel it for the others.
+
+Streamed reports take part too: the first stream for a key passes Gemini's
+chunks through as they arrive, and other requests for the key (streamed or
+not) wait for it and get the whole text. A stream is driven by its client,
+so if that client goes away the waiting requests start a generation of
+their own.
+
+Configuration:
+    REPORT_CACHE_SIZE         in-process entries (0 disables the memory tier)
+    REPORT_CACHE_TTL          seconds an entry stays valid
+    REPORT_CACHE_SQLITE_PATH  enables the SQLite tier at this path
+    REPORT_CACHE_SQLITE_SIZE  maximum rows kept in the SQLite tier
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+
+from .cache import LRUCache, SQLiteCache
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_SIZE = int(os.getenv('REPORT_CACHE_SIZE', '1024'))
+REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL', str(24 * 3600)))
+REPORT_CACHE_SQLITE_PATH = os.getenv('REPORT_CACHE_SQLITE_PATH')
+REPORT_CACHE_SQLITE_SIZE = int(os.getenv('REPORT_CACHE_SQLITE_SIZE', '10000'))
+
+
+def report_cache_key(prompt: str, model: str) -> str:
+    """Hash of the model name and the final prompt text."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class ReportMetrics:
+    """Counters for cache hits, coalesced waits and Gemini calls."""
+
+    __slots__ = ("hits", "misses", "coalesced_waits", "gemini_calls", "gemini_errors")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced_waits = 0
+        self.gemini_calls = 0
+        self.gemini_errors = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        metrics = {name: getattr(self, name) for name in self.__slots__}
+        metrics["gemini_calls_avoided"] = self.hits + self.coalesced_waits
+        return metrics
+
+
+class ReportCache:
+    """Two-tier cache of generated report text with single-flight generation."""
+
+    def __init__(self, max_size: int = REPORT_CACHE_SIZE, ttl: float = REPORT_CACHE_TTL,
+                 sqlite_path: Optional[str] = REPORT_CACHE_SQLITE_PATH,
+                 sqlite_size: int = REPORT_CACHE_SQLITE_SIZE):
+        self.memory = LRUCache(max_size, ttl)
+        self.disk = SQLiteCache(sqlite_path, sqlite_size, ttl, table="report_cache") if sqlite_path else None
+        self.metrics = ReportMetrics()
+        self._in_flight: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached text for a key. The SQLite tier is read in the thread pool."""
+        text = self.memory.get(key)
+        if text is None and self.disk is not None:
+            text = await _run_io(self._get_disk, key)
+        if text is None:
+            self.metrics.misses += 1
+        else:
+            self.metrics.hits += 1
+        return text
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        text = self.disk.get(key)
+        if text is not None:
+            self.memory.put(key, text)
+        return text
+
+    async def put(self, key: str, text: str) -> None:
+        """Cache text under a key. The SQLite tier is written in the thread pool."""
+        self.memory.put(key, text)
+        await self._put_disk(key, text)
+
+    async def _put_disk(self, key: str, text: str) -> None:
+        if self.disk is not None:
+            await _run_io(self.disk.put, key, text)
+
+    async def _generate(self, key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        self.metrics.gemini_calls += 1
+        try:
+            text = await generate()
+        except Exception:
+            self.metrics.gemini_errors += 1
+            raise
+        await self.put(key, text)
+        return text
+
+    def _track(self, key: str, future: "asyncio.Future[Optional[str]]") -> None:
+        self._in_flight[key] = future
+
+        def done(_) -> None:
+            self._in_flight.pop(key, None)
+            if not future.cancelled():
+                future.exception()  # raised to the waiters; don't log it as unretrieved
+
+        future.add_done_callback(done)
+
+    async def get_or_generate(self, prompt: str, model: str,
+                              generate: Callable[[], Awaitable[str]]) -> str:
+        """
+        Report text for this prompt from the cache, from an identical
+        generation already in flight, or from a new call to generate().
+        """
+        key = report_cache_key(prompt, model)
+        while True:
+            text = await self.get(key)
+            if text is not None:
+                return text
+
+            task = self._in_flight.get(key)
+            if task is not None:
+                self.metrics.coalesced_waits += 1
+            else:
+                task = asyncio.ensure_future(self._generate(key, generate))
+                self._track(key, task)
+            text = await asyncio.shield(task)
+            if text is not None:
+                return text
+            # The stream generating it was abandoned by its client
+
+    async def stream(self, prompt: str, model: str,
+                     open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Report text for this prompt in chunks. Cached text, or text from an
+        identical generation already in flight, comes as one chunk; otherwise
+        the chunks of open_stream() are passed through and the assembled text
+        is cached. Closing the iterator early stops the generation.
+        """
+        key = report_cache_key(prompt, model)
+        while True:
+            text = await self.get(key)
+            if text is None:
+                waiting = self._in_flight.get(key)
+                if waiting is None:
+                    break
+                self.metrics.coalesced_waits += 1
+                text = await asyncio.shield(waiting)
+            if text is not None:
+                yield text
+                return
+
+        result: "asyncio.Future[Optional[str]]" = asyncio.get_running_loop().create_future()
+        self._track(key, result)
+        self.metrics.gemini_calls += 1
+        parts: List[str] = []
+        complete = False
+        tokens = open_stream()
+        try:
+            async for text in tokens:
+                parts.append(text)
+                yield text
+            complete = True
+        except Exception as e:
+            self.metrics.gemini_errors += 1
+            result.set_exception(e)
+            raise
+        finally:
+            if not result.done():
+                text = "".join(parts) if complete else None
+                if text is not None:
+                    # In memory before the waiters are released, so no new request misses it
+                    self.memory.put(key, text)
+                result.set_result(text)
+            await tokens.aclose()
+        await self._put_disk(key, "".join(parts))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "memory": dict(self.memory.stats.as_dict(), size=len(self.memory)),
+            "in_flight": len(self._in_flight),
+            **self.metrics.as_dict()
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats.as_dict()
+        return stats
+
+
+async def _run_io(func: Callable[..., Any], *args) -> Any:
+    """Run a blocking SQLite call in the pipeline's thread pool."""
+    # Imported here: the pipeline imports this module
+    from .pipeline import get_pipeline
+    return await get_pipeline().run_io('cache', func, *args)
+
+
+_report_cache: Optional[ReportCache] = None
+_report_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """Process-wide report cache configured from the environment."""
+    global _report_cache
+    if _report_cache is None:
+        with _report_cache_lock:
+            if _report_cache is None:
+                _report_cache = ReportCache()
+    return _report_cache
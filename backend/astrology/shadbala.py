@@ -0,0 +1,554 @@
+"""
+Shadbala: the six-fold strength of the seven classical planets, in
+virupas (60 virupas = 1 rupa).
+
+    sthana      uchcha, saptavargaja (D1 D2 D3 D7 D9 D12 D30), ojhayugma,
+                kendradi and drekkana bala
+    dig         distance from the point opposite the planet's strongest
+                angle (lagna, MC, descendant or IC)
+    kala        nathonnatha, paksha, tribhaga, abda, masa, vara, hora and
+                ayana bala, then yuddha bala for planets at war
+    cheshta     from the cheshta kendra (seeghrochcha minus the mean of the
+                mean and true longitudes); the Sun takes its ayana bala and
+                the Moon its paksha bala
+    naisargika  fixed
+    drik        a quarter of the benefic minus the malefic aspect values
+
+Everything the six components share is computed once per chart into a
+ShadbalaContext: the Vedic day (sunrise, sunset, next sunrise; sunrise
+comes from the panchanga LRU), the day/night split, the vara, hora and
+tribhaga lords, the lords of the year and month (the weekdays of the last
+Mesha and solar sign ingresses, cached per ingress), the signs of every
+planet in the seven vargas, the compound relationships between them,
+declinations and the MC. The components are NumPy expressions over
+(charts, planets) arrays, so shadbala_batch() scores many charts at once
+and calculate_shadbala() is the same code for one.
+
+Planet positions are the chart's own, but the Vedic day and the year and
+month lords cost swisseph calls of their own: rise_trans for sunrise and
+sunset of two dates (cached per date and grid cell) and about eight
+calc_ut/get_ayanamsa_ut pairs for each of two Sun ingresses (cached per
+ingress), so a chart in a new place and month makes ten or more extra
+calls. Shadbala is therefore not part of compute_chart: /shadbala, the
+report prompt and calculate_planet_strengths(shadbala=True) ask for it.
+Mean longitudes for the cheshta kendra come from their J2000 mean motions.
+
+    python -m astrology.shadbala chart 1990-05-15 14:30 --latitude 28.61 --longitude 77.21
+    python -m astrology.shadbala verify --charts 500
+    python -m astrology.shadbala bench --charts 2000
+"""
+from datetime import date as Date
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import argparse
+import logging
+import math
+import sys
+import time
+
+import numpy as np
+import swisseph as swe
+
+from .charts import compute_planet_snapshot
+from .ephemeris import PlanetSnapshot, calc_ut, get_ayanamsa_ut
+from .lagna import ascendant as tropical_ascendant, mean_obliquity, midheavens
+from .metrics import timed
+from .panchanga import sun_times
+from .vargas import varga_signs
+
+logger = logging.getLogger(__name__)
+
+SHADBALA_PLANETS = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn']
+SUN, MOON, MARS, MERCURY, JUPITER, VENUS, SATURN = range(7)
+COMPONENTS = ['sthana', 'dig', 'kala', 'cheshta', 'naisargika', 'drik']
+
+# Minimum total for a planet to count as strong, in virupas
+REQUIRED_VIRUPAS = np.array([390.0, 360.0, 300.0, 420.0, 390.0, 330.0, 300.0])
+
+NAISARGIKA = np.array([60.0, 51.43, 17.14, 25.71, 34.29, 42.86, 8.57])
+
+# Deep exaltation points (sidereal longitude)
+EXALTATION_POINTS = np.array([10.0, 33.0, 298.0, 165.0, 95.0, 357.0, 200.0])
+
+# Lord of each sign, Aries first
+SIGN_LORDS = np.array([MARS, VENUS, MERCURY, MOON, SUN, MERCURY, VENUS, MARS, JUPITER, SATURN, SATURN, JUPITER])
+
+# Moolatrikona (sign, from degree, to degree)
+MOOLATRIKONA = np.array([(4, 0, 20), (1, 3, 30), (0, 0, 12), (5, 15, 20), (8, 0, 10), (6, 0, 15), (10, 0, 20)])
+
+# Natural relationship of row planet to column planet: friend 1, neutral 0, enemy -1
+NATURAL_RELATIONS = np.array([
+    [0, 1, 1, 0, 1, -1, -1],
+    [1, 0, 0, 1, 0, 0, 0],
+    [1, 1, 0, -1, 1, 0, 0],
+    [1, -1, 0, 0, 0, 1, 0],
+    [1, 1, 1, -1, 0, -1, 0],
+    [-1, -1, 0, 1, 0, 0, 1],
+    [-1, -1, -1, 1, 0, 1, 0],
+])
+# Saptavargaja virupas by compound relationship (-2 great enemy .. 2 great friend)
+RELATION_VIRUPAS = np.array([1.875, 3.75, 7.5, 15.0, 22.5])
+SAPTAVARGAS = ["D1", "D2", "D3", "D7", "D9", "D12", "D30"]
+
+# Strongest direction: 0 lagna, 1 MC, 2 descendant, 3 IC
+DIG_POINTS = np.array([1, 3, 1, 0, 0, 3, 2])
+
+# Odd (1) or even (0) signs and navamsas give ojhayugma bala
+OJHA_PARITY = np.array([1, 0, 1, 1, 1, 0, 1])
+# Drekkana (0, 1, 2) that gives drekkana bala: male, hermaphrodite, female
+DREKKANA_PART = np.array([0, 2, 0, 1, 0, 2, 1])
+
+# Ayana bala: sign of the declination that strengthens (0: either)
+AYANA_DIRECTION = np.array([1.0, -1.0, 1.0, 0.0, 1.0, 1.0, -1.0])
+DAY_PLANETS = np.array([True, False, False, False, True, True, False])
+NATURAL_BENEFICS = np.array([False, False, False, True, True, True, False])
+
+WEEKDAY_LORDS = np.array([MOON, MARS, MERCURY, JUPITER, VENUS, SATURN, SUN])  # Monday first
+CHALDEAN_ORDER = np.array([SATURN, JUPITER, MARS, SUN, VENUS, MERCURY, MOON])
+_CHALDEAN_POSITION = np.argsort(CHALDEAN_ORDER)
+# Temporal friend (1) in the 2nd-4th and 10th-12th signs from a planet, else enemy (-1)
+_TEMPORAL_RELATIONS = np.array([-1, 1, 1, 1, -1, -1, -1, -1, -1, 1, 1, 1])
+DAY_TRIBHAGA_LORDS = np.array([MERCURY, SUN, SATURN])
+NIGHT_TRIBHAGA_LORDS = np.array([MOON, VENUS, MARS])
+
+# Tropical mean longitudes at J2000 and per Julian century (Sun geocentric,
+# the planets heliocentric), for the cheshta kendra
+MEAN_LONGITUDES = np.array([280.46646, 0.0, 355.43300, 252.25091, 34.35152, 181.97980, 50.07744])
+MEAN_MOTIONS = np.array([36000.76983, 0.0, 19140.29930, 149472.67464, 3034.90566, 58517.81568, 1222.11385])
+INFERIOR_PLANETS = np.array([False, False, False, True, False, True, False])
+CHESHTA_PLANETS = np.array([False, False, True, True, True, True, True])
+
+_J2000 = 2451545.0
+_SIDEREAL_YEAR = 365.256363
+# A Mesha sankranti (the sidereal Sun entering Aries), 2000-04-13
+_MESHA_SANKRANTI_2000 = 2451647.8
+_INGRESS_TOLERANCE_DEG = 1e-6
+
+
+def _wrap180(angle: np.ndarray) -> np.ndarray:
+    return np.mod(angle + 180.0, 360.0) - 180.0
+
+
+def _distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Angular distance in degrees (0..180)."""
+    return np.abs(_wrap180(a - b))
+
+
+@lru_cache(maxsize=4096)
+def _sun_ingress(sign: int, cycle: int) -> float:
+    """Julian day (UT) at which the sidereal Sun enters a sign in the given sidereal year from 2000."""
+    jd = _MESHA_SANKRANTI_2000 + (cycle + sign / 12.0) * _SIDEREAL_YEAR
+    for _ in range(8):
+        position = calc_ut(jd, swe.SUN)[0]
+        error = ((position[0] - get_ayanamsa_ut(jd) - 30.0 * sign + 180.0) % 360.0) - 180.0
+        jd -= error / position[3]
+        if abs(error) < _INGRESS_TOLERANCE_DEG:
+            break
+    return jd
+
+
+def _last_ingress(jd: float, sun: float, sign: int) -> float:
+    """The last time before jd that the sidereal Sun (at longitude sun) entered sign."""
+    estimate = jd - ((sun - 30.0 * sign) % 360.0) / 0.9856
+    cycle = int(round((estimate - _MESHA_SANKRANTI_2000) / _SIDEREAL_YEAR - sign / 12.0))
+    return _sun_ingress(sign, cycle)
+
+
+def _weekday_at(jd: float, longitude: float) -> int:
+    """Weekday (Monday 0) of the local mean date containing jd."""
+    return int(math.floor(jd + 0.5 + longitude / 360.0)) % 7
+
+
+def _vedic_day(jd: float, latitude: float, longitude: float) -> Tuple[int, float, float, float]:
+    """
+    (weekday, sunrise, sunset, next sunrise) of the day, counted from
+    sunrise, that contains jd. Where the Sun does not rise or set, 06:00 and
+    18:00 local mean time stand in for sunrise and sunset.
+    """
+    day = int(math.floor(jd + 0.5 + longitude / 360.0)) - 1721425
+
+    def times(ordinal: int) -> Tuple[float, float]:
+        try:
+            return sun_times(Date.fromordinal(ordinal), latitude, longitude)
+        except ValueError:
+            midnight = ordinal + 1721424.5 - longitude / 360.0
+            return midnight + 0.25, midnight + 0.75
+
+    sunrise, sunset = times(day)
+    if jd < sunrise:
+        next_sunrise = sunrise
+        day -= 1
+        sunrise, sunset = times(day)
+    else:
+        next_sunrise = times(day + 1)[0]
+    return (day - 1) % 7, sunrise, sunset, next_sunrise
+
+
+class ShadbalaContext:
+    """Per-chart intermediates shared by the six components, as (charts, ...) arrays."""
+
+    def __init__(self, jd: np.ndarray, latitudes: np.ndarray, geo_longitudes: np.ndarray,
+                 planet_longitudes: np.ndarray, planet_speeds: np.ndarray,
+                 ascendants: np.ndarray, ayanamsas: np.ndarray):
+        self.jd = np.asarray(jd, dtype=np.float64)
+        count = len(self.jd)
+        latitudes = np.broadcast_to(np.asarray(latitudes, dtype=np.float64), (count,))
+        geo_longitudes = np.broadcast_to(np.asarray(geo_longitudes, dtype=np.float64), (count,))
+        self.longitudes = np.asarray(planet_longitudes, dtype=np.float64)
+        self.speeds = np.asarray(planet_speeds, dtype=np.float64)
+        self.ascendants = np.asarray(ascendants, dtype=np.float64)
+        self.ayanamsas = np.asarray(ayanamsas, dtype=np.float64)
+        self.signs = (self.longitudes // 30).astype(np.intp)
+        self.asc_signs = (self.ascendants // 30).astype(np.intp)
+
+        # Vedic day, day/night split and the lords of the year, month, day and hour
+        self.is_day = np.empty(count, dtype=bool)
+        self.day_fraction = np.empty(count)      # of the day or night part elapsed
+        self.part_length = np.empty(count)       # of the day or night part, in days
+        self.noon_distance = np.empty(count)     # from noon (day) or midnight (night), in parts
+        lords = np.empty((count, 4), dtype=np.intp)  # abda, masa, vara, hora
+        for i, (t, lat, lon) in enumerate(zip(self.jd.tolist(), latitudes.tolist(), geo_longitudes.tolist())):
+            weekday, sunrise, sunset, next_sunrise = _vedic_day(t, lat, lon)
+            day = t < sunset
+            start, end = (sunrise, sunset) if day else (sunset, next_sunrise)
+            fraction = (t - start) / (end - start)
+            self.is_day[i] = day
+            self.day_fraction[i] = fraction
+            self.noon_distance[i] = abs(fraction - 0.5)
+            vara = WEEKDAY_LORDS[weekday]
+            hour = int(fraction * 12) + (0 if day else 12)
+            sun = float(self.longitudes[i, SUN])
+            lords[i] = (
+                WEEKDAY_LORDS[_weekday_at(_last_ingress(t, sun, 0), lon)],
+                WEEKDAY_LORDS[_weekday_at(_last_ingress(t, sun, int(sun // 30)), lon)],
+                vara,
+                CHALDEAN_ORDER[(_CHALDEAN_POSITION[vara] + hour) % 7],
+            )
+        self.kala_lords = lords
+
+        self.elongation = np.mod(self.longitudes[:, MOON] - self.longitudes[:, SUN], 360.0)
+        self.varga_signs = varga_signs(self.longitudes, SAPTAVARGAS)
+
+        # Compound relationships: natural plus temporal (2nd-4th and 10th-12th from the planet)
+        offset = (self.signs[:, None, :] - self.signs[:, :, None]) % 12
+        self.relations = NATURAL_RELATIONS[None] + _TEMPORAL_RELATIONS[offset]
+
+        tropical = np.radians(self.longitudes + self.ayanamsas[:, None])
+        obliquity = np.radians(mean_obliquity(self.jd))
+        self.declinations = np.degrees(np.arcsin(np.sin(obliquity)[:, None] * np.sin(tropical)))
+        self.tropical = np.degrees(tropical)
+        self.midheavens = np.mod(midheavens(self.jd, geo_longitudes) - self.ayanamsas, 360.0)
+
+
+def _sthana_bala(ctx: ShadbalaContext) -> np.ndarray:
+    lon, signs = ctx.longitudes, ctx.signs
+    uchcha = _distance(lon, EXALTATION_POINTS + 180.0) / 3.0
+
+    # Saptavargaja: own sign 30, moolatrikona 45 (rasi only), else by compound relationship
+    count = len(lon)
+    lords = SIGN_LORDS[ctx.varga_signs]
+    planet = np.arange(7)
+    relation = ctx.relations[np.arange(count)[None, :, None], planet[None, None, :], lords]
+    saptavargaja = np.where(lords == planet, 30.0, RELATION_VIRUPAS[relation + 2])
+    degrees = lon - 30.0 * signs
+    moolatrikona = ((signs == MOOLATRIKONA[:, 0]) & (degrees >= MOOLATRIKONA[:, 1])
+                    & (degrees < MOOLATRIKONA[:, 2]))
+    saptavargaja[0] = np.where(moolatrikona, 45.0, saptavargaja[0])
+
+    navamsa = ctx.varga_signs[SAPTAVARGAS.index("D9")]
+    ojhayugma = (15.0 * ((signs + 1) % 2 == OJHA_PARITY) + 15.0 * ((navamsa + 1) % 2 == OJHA_PARITY))
+
+    house = (signs - ctx.asc_signs[:, None]) % 12
+    kendradi = np.choose(house % 3, (60.0, 30.0, 15.0))
+    drekkana = 15.0 * ((degrees // 10).astype(np.intp) == DREKKANA_PART)
+    return uchcha + saptavargaja.sum(axis=0) + ojhayugma + kendradi + drekkana
+
+
+def _dig_bala(ctx: ShadbalaContext) -> np.ndarray:
+    points = np.stack([ctx.ascendants, ctx.midheavens, ctx.ascendants + 180.0, ctx.midheavens + 180.0], axis=1)
+    strongest = points[:, DIG_POINTS]
+    return _distance(ctx.longitudes, strongest + 180.0) / 3.0
+
+
+def _paksha_bala(ctx: ShadbalaContext) -> np.ndarray:
+    angle = _distance(ctx.elongation, 0.0)[:, None]
+    benefic = np.where(NATURAL_BENEFICS | (np.arange(7) == MOON), angle / 3.0, 60.0 - angle / 3.0)
+    benefic[:, MOON] *= 2.0
+    return benefic
+
+
+def _ayana_bala(ctx: ShadbalaContext) -> np.ndarray:
+    declination = np.where(AYANA_DIRECTION == 0.0, np.abs(ctx.declinations), ctx.declinations * AYANA_DIRECTION)
+    ayana = (24.0 + declination) / 48.0 * 60.0
+    ayana[:, SUN] *= 2.0
+    return ayana
+
+
+def _kala_bala(ctx: ShadbalaContext) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(kala bala without yuddha bala, paksha bala, ayana bala)."""
+    count = len(ctx.jd)
+    rows = np.arange(count)
+
+    # Nathonnatha: day planets 60 at noon, night planets 60 at midnight, Mercury always
+    toward_noon = np.where(ctx.is_day, 1.0 - ctx.noon_distance, ctx.noon_distance)
+    nathonnatha = np.where(DAY_PLANETS, 60.0 * toward_noon[:, None], 60.0 * (1.0 - toward_noon[:, None]))
+    nathonnatha[:, MERCURY] = 60.0
+
+    tribhaga = np.zeros((count, 7))
+    part = np.minimum((ctx.day_fraction * 3).astype(np.intp), 2)
+    tribhaga[rows, np.where(ctx.is_day, DAY_TRIBHAGA_LORDS[part], NIGHT_TRIBHAGA_LORDS[part])] = 60.0
+    tribhaga[:, JUPITER] += 60.0
+
+    lords = np.zeros((count, 7))
+    for column, virupas in enumerate((15.0, 30.0, 45.0, 60.0)):
+        lords[rows, ctx.kala_lords[:, column]] += virupas
+
+    paksha = _paksha_bala(ctx)
+    ayana = _ayana_bala(ctx)
+    return nathonnatha + paksha + tribhaga + lords + ayana, paksha, ayana
+
+
+def _cheshta_bala(ctx: ShadbalaContext, paksha: np.ndarray, ayana: np.ndarray) -> np.ndarray:
+    centuries = (ctx.jd - _J2000) / 36525.0
+    mean = np.mod(MEAN_LONGITUDES + MEAN_MOTIONS * centuries[:, None], 360.0)
+    mean_sun = mean[:, SUN:SUN + 1]
+    seeghrochcha = np.where(INFERIOR_PLANETS, mean, mean_sun)
+    madhya = np.where(INFERIOR_PLANETS, mean_sun, mean)
+    average = madhya + _wrap180(ctx.tropical - madhya) / 2.0
+    cheshta = np.where(CHESHTA_PLANETS, _distance(seeghrochcha, average) / 3.0, 0.0)
+    # The Sun's cheshta bala is its ayana bala and the Moon's its paksha bala (before doubling)
+    cheshta[:, SUN] = ayana[:, SUN] / 2.0
+    cheshta[:, MOON] = paksha[:, MOON] / 2.0
+    return cheshta
+
+
+# Aspect value (0..60) cast across an angle (aspected minus aspecting): piecewise linear
+_DRISHTI_ANGLES = np.array([0.0, 30.0, 60.0, 90.0, 120.0, 150.0, 180.0, 300.0, 360.0])
+_DRISHTI_VALUES = np.array([0.0, 0.0, 15.0, 45.0, 30.0, 0.0, 60.0, 0.0, 0.0])
+
+
+# Special aspects get full value: (planet, from, to) in degrees of separation
+_SPECIAL_ASPECTS = ((MARS, 90, 120), (MARS, 210, 240), (JUPITER, 120, 150), (JUPITER, 240, 270),
+                    (SATURN, 60, 90), (SATURN, 270, 300))
+
+
+def _drik_bala(ctx: ShadbalaContext) -> np.ndarray:
+    # angle[n, j, i]: from aspecting planet j to aspected planet i
+    angle = np.mod(ctx.longitudes[:, None, :] - ctx.longitudes[:, :, None], 360.0)
+    value = np.interp(angle, _DRISHTI_ANGLES, _DRISHTI_VALUES)
+    for planet, start, end in _SPECIAL_ASPECTS:
+        special = (angle[:, planet] >= start) & (angle[:, planet] < end)
+        value[:, planet] = np.where(special, 60.0, value[:, planet])
+    value[:, np.arange(7), np.arange(7)] = 0.0
+    # Benefics add, malefics subtract; the Moon is benefic while waxing
+    benefic = np.broadcast_to(NATURAL_BENEFICS, (len(ctx.jd), 7)).copy()
+    benefic[:, MOON] = ctx.elongation < 180.0
+    sign = np.where(benefic, 1.0, -1.0)
+    return (value * sign[:, :, None]).sum(axis=1) / 4.0
+
+
+def _yuddha_bala(ctx: ShadbalaContext, subtotal: np.ndarray) -> np.ndarray:
+    """Planets (Mars to Saturn) within a degree of each other: the stronger takes the difference."""
+    lon = ctx.longitudes[:, MARS:]
+    war = _distance(lon[:, :, None], lon[:, None, :]) < 1.0
+    war &= ~np.eye(lon.shape[1], dtype=bool)
+    yuddha = np.zeros_like(subtotal)
+    if war.any():
+        strength = subtotal[:, MARS:]
+        yuddha[:, MARS:] = np.where(war, strength[:, :, None] - strength[:, None, :], 0.0).sum(axis=2)
+    return yuddha
+
+
+def shadbala_components(ctx: ShadbalaContext) -> Dict[str, np.ndarray]:
+    """The six components and their total in virupas, each a (charts, 7) array."""
+    sthana = _sthana_bala(ctx)
+    dig = _dig_bala(ctx)
+    kala, paksha, ayana = _kala_bala(ctx)
+    kala = kala + _yuddha_bala(ctx, sthana + dig + kala)
+    components = {
+        "sthana": sthana,
+        "dig": dig,
+        "kala": kala,
+        "cheshta": _cheshta_bala(ctx, paksha, ayana),
+        "naisargika": np.broadcast_to(NAISARGIKA, sthana.shape),
+        "drik": _drik_bala(ctx),
+    }
+    components["total"] = sum(components[name] for name in COMPONENTS)
+    return components
+
+
+def shadbala_batch(jd: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray,
+                   planet_longitudes: np.ndarray, planet_speeds: np.ndarray,
+                   ascendants: np.ndarray, ayanamsas: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Shadbala for many charts: sidereal longitudes and speeds of
+    SHADBALA_PLANETS as (charts, 7) arrays, sidereal ascendants and
+    ayanamsas as (charts,) arrays. Returns (charts, 7) arrays in virupas.
+    """
+    ctx = ShadbalaContext(jd, latitudes, longitudes, planet_longitudes, planet_speeds, ascendants, ayanamsas)
+    return shadbala_components(ctx)
+
+
+def snapshot_shadbala(jd: float, latitude: float, longitude: float, snapshot: PlanetSnapshot,
+                      ascendant: float) -> Dict[str, np.ndarray]:
+    """shadbala_batch for one chart's snapshot and sidereal ascendant; arrays of shape (1, 7)."""
+    return shadbala_batch(
+        np.array([jd]), latitude, longitude,
+        np.array([[snapshot.longitude(name) for name in SHADBALA_PLANETS]]),
+        np.array([[snapshot.speeds[name] for name in SHADBALA_PLANETS]]),
+        np.array([ascendant]), np.array([snapshot.ayanamsa])
+    )
+
+
+def calculate_shadbala(jd_ut: float, latitude: float, longitude: float,
+                       snapshot: Optional[PlanetSnapshot] = None,
+                       ascendant: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+    """Shadbala of one chart: per planet the six components, total, rupas, required rupas and ratio."""
+    try:
+        if snapshot is None:
+            snapshot = compute_planet_snapshot(jd_ut)
+        if ascendant is None:
+            ascendant = (tropical_ascendant(jd_ut, latitude, longitude) - snapshot.ayanamsa) % 360
+        with timed("shadbala"):
+            components = snapshot_shadbala(jd_ut, latitude, longitude, snapshot, ascendant)
+        result = {}
+        for i, name in enumerate(SHADBALA_PLANETS):
+            total = float(components["total"][0, i])
+            entry = {component: round(float(components[component][0, i]), 2) for component in COMPONENTS}
+            entry.update({
+                "total": round(total, 2),
+                "rupas": round(total / 60.0, 2),
+                "required_rupas": round(REQUIRED_VIRUPAS[i] / 60.0, 2),
+                "ratio": round(total / REQUIRED_VIRUPAS[i], 2),
+            })
+            result[name] = entry
+        return result
+    except Exception as e:
+        logger.error(f"Error calculating shadbala: {str(e)}")
+        raise
+
+
+def chart_shadbala(chart, latitude: float, longitude: float) -> Dict[str, Dict[str, float]]:
+    """calculate_shadbala for a chart_model.Chart, reusing its positions and ascendant."""
+    snapshot = PlanetSnapshot(
+        chart.jd, get_ayanamsa_ut(chart.jd),
+        {name: chart.longitude(name) for name in SHADBALA_PLANETS},
+        {name: chart.speed(name) for name in SHADBALA_PLANETS}
+    )
+    return calculate_shadbala(chart.jd, latitude, longitude, snapshot, chart.ascendant)
+
+
+def query_shadbala(dob: str, tob: str, latitude: float, longitude: float) -> Dict[str, Any]:
+    """Shadbala of a birth chart, for the API."""
+    from .charts import birth_julian_day
+
+    jd = birth_julian_day(dob, tob, latitude, longitude)
+    planets = calculate_shadbala(jd, latitude, longitude)
+    return {"planets": planets, "strongest": max(planets, key=lambda name: planets[name]["ratio"])}
+
+
+# --- Verification and benchmarks ---
+
+def _sample_inputs(charts: int):
+    """(jd, latitude, longitude, snapshot, sidereal ascendant) for random birth records."""
+    from .charts import birth_julian_day
+    from benchmarks.bench_batch import make_records
+
+    inputs = []
+    for dob, tob, lat, lon in zip(*make_records(charts)):
+        jd = birth_julian_day(dob, tob, lat, lon)
+        snapshot = compute_planet_snapshot(jd)
+        inputs.append((jd, lat, lon, snapshot, (tropical_ascendant(jd, lat, lon) - snapshot.ayanamsa) % 360))
+    return inputs
+
+
+def _batch_arrays(inputs):
+    return (
+        np.array([item[0] for item in inputs]),
+        np.array([item[1] for item in inputs]),
+        np.array([item[2] for item in inputs]),
+        np.array([[item[3].longitude(name) for name in SHADBALA_PLANETS] for item in inputs]),
+        np.array([[item[3].speeds[name] for name in SHADBALA_PLANETS] for item in inputs]),
+        np.array([item[4] for item in inputs]),
+        np.array([item[3].ayanamsa for item in inputs]),
+    )
+
+
+def _verify(charts: int) -> bool:
+    """Batch results equal one-chart results, and every total is in a plausible range."""
+    inputs = _sample_inputs(charts)
+    batch = shadbala_batch(*_batch_arrays(inputs))
+    worst = 0.0
+    for n, (t, lat, lon, snapshot, asc) in enumerate(inputs):
+        single = snapshot_shadbala(t, lat, lon, snapshot, asc)
+        for name in COMPONENTS + ["total"]:
+            worst = max(worst, float(np.abs(single[name][0] - batch[name][n]).max()))
+    totals = batch["total"]
+    print(f"{charts} charts: batch vs single max difference {worst:.2e} virupas; "
+          f"totals {totals.min():.1f} .. {totals.max():.1f} virupas")
+    for i, name in enumerate(SHADBALA_PLANETS):
+        print(f"  {name:<8} mean {totals[:, i].mean() / 60:5.2f} rupas, "
+              f"strong in {(totals[:, i] >= REQUIRED_VIRUPAS[i]).mean() * 100:5.1f}% of charts")
+    return worst < 1e-9 and totals.min() > 0
+
+
+def _bench(charts: int) -> None:
+    inputs = _sample_inputs(charts)
+    for t, lat, lon, snapshot, asc in inputs:
+        snapshot_shadbala(t, lat, lon, snapshot, asc)   # warm the sunrise and ingress caches
+    start = time.perf_counter()
+    for t, lat, lon, snapshot, asc in inputs:
+        snapshot_shadbala(t, lat, lon, snapshot, asc)
+    single = (time.perf_counter() - start) / charts
+    print(f"one chart at a time (caches warm): {single * 1e3:7.3f} ms per chart")
+
+    _sun_ingress.cache_clear()
+    from .panchanga import _cell_sun_times
+    _cell_sun_times.cache_clear()
+    start = time.perf_counter()
+    for t, lat, lon, snapshot, asc in inputs:
+        snapshot_shadbala(t, lat, lon, snapshot, asc)
+    cold = (time.perf_counter() - start) / charts
+    print(f"one chart at a time (caches cold): {cold * 1e3:7.3f} ms per chart")
+
+    arrays = _batch_arrays(inputs)
+    start = time.perf_counter()
+    shadbala_batch(*arrays)
+    batch = (time.perf_counter() - start) / charts
+    print(f"batch of {charts}:{'':>{16 - len(str(charts))}}{batch * 1e3:7.3f} ms per chart ({1 / batch:,.0f} charts/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    chart = commands.add_parser("chart", help="shadbala of one birth chart")
+    chart.add_argument("dob", help="YYYY-MM-DD")
+    chart.add_argument("tob", help="HH:MM")
+    chart.add_argument("--latitude", type=float, required=True)
+    chart.add_argument("--longitude", type=float, required=True)
+    verify = commands.add_parser("verify", help="batch against one-chart results")
+    verify.add_argument("--charts", type=int, default=500)
+    bench = commands.add_parser("bench", help="per-chart time, one at a time and batched")
+    bench.add_argument("--charts", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    from .charts import EPHE_PATH
+    if EPHE_PATH:
+        swe.set_ephe_path(EPHE_PATH)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+
+    if args.command == "chart":
+        result = query_shadbala(args.dob, args.tob, args.latitude, args.longitude)
+        print(f"{'':<8}" + "".join(f"{name:>11}" for name in COMPONENTS + ["total", "rupas", "ratio"]))
+        for name, entry in result["planets"].items():
+            print(f"{name:<8}" + "".join(f"{entry[key]:>11.2f}" for key in COMPONENTS + ["total", "rupas", "ratio"]))
+        print(f"strongest: {result['strongest']}")
+    elif args.command == "verify":
+        sys.exit(0 if _verify(args.charts) else 1)
+    else:
+        _bench(args.charts)
+
+
+if __name__ == "__main__":
+    main()
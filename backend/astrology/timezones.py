@@ -0,0 +1,168 @@
+"""
+Shared timezone resolution.
+
+Constructing a TimezoneFinder loads its polygon data, which costs far more
+than the rest of a chart. TimezoneResolver holds one finder per process
+(created at startup by preload_timezone_resolver) and adds two caches:
+
+  - a grid cache of zone names: coordinates are snapped to a grid cell of
+    TIMEZONE_GRID_RESOLUTION degrees (default 0.01, about 1 km). Checking a
+    cell costs five finder calls, so the first point in a cell is looked up
+    directly and the cell is only checked when a second point lands in it.
+    A cell is cached with a zone when its four corners and centre all
+    resolve to that zone; cells a border passes through are marked mixed
+    and points in them are resolved exactly. This is sampling, not a
+    polygon test: a border that enters and leaves a cell through the same
+    edge between two samples goes unnoticed, and points beyond it get the
+    cell's zone. At the default resolution such a sliver is under 1 km
+    wide. Set the resolution to 0 to disable the grid.
+  - an LRU of pytz zone objects.
+
+resolve_many resolves whole arrays of coordinates for the batch paths with
+the same rule: cells holding several records of the batch, or seen before,
+go through the grid cache, and the other records are looked up directly.
+
+Configuration:
+    TIMEZONE_IN_MEMORY          "true" loads the polygon data into memory
+                                instead of memory-mapping it
+    TIMEZONE_GRID_RESOLUTION    grid cell size in degrees
+    TIMEZONE_GRID_CACHE_SIZE    grid cells kept in the cache
+"""
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Set, Tuple
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+import pytz
+
+logger = logging.getLogger(__name__)
+
+TIMEZONE_IN_MEMORY = os.getenv('TIMEZONE_IN_MEMORY', 'false').lower() == 'true'
+TIMEZONE_GRID_RESOLUTION = float(os.getenv('TIMEZONE_GRID_RESOLUTION', '0.01'))
+TIMEZONE_GRID_CACHE_SIZE = int(os.getenv('TIMEZONE_GRID_CACHE_SIZE', '65536'))
+TIMEZONE_ZONE_CACHE_SIZE = 512
+
+# Grid cache value for cells that a zone border passes through
+_MIXED_CELL = "<mixed>"
+
+
+class TimezoneResolver:
+    """Process-wide coordinate-to-timezone lookup with grid and zone caches."""
+
+    def __init__(self, in_memory: bool = TIMEZONE_IN_MEMORY,
+                 grid_resolution: float = TIMEZONE_GRID_RESOLUTION,
+                 grid_cache_size: int = TIMEZONE_GRID_CACHE_SIZE):
+        from timezonefinder import TimezoneFinder
+
+        self.in_memory = in_memory
+        self.grid_resolution = grid_resolution
+        self._finder = TimezoneFinder(in_memory=in_memory)
+        self._finder_lock = threading.Lock()
+        self._cell_zone = lru_cache(maxsize=grid_cache_size)(self._lookup_cell)
+        # Cells visited once; the grid cache is only filled on a second visit
+        self._seen_cells: Set[Tuple[int, int]] = set()
+        self._seen_limit = grid_cache_size
+        self.zone = lru_cache(maxsize=TIMEZONE_ZONE_CACHE_SIZE)(pytz.timezone)
+
+    def _finder_zone(self, latitude: float, longitude: float) -> Optional[str]:
+        # TimezoneFinder is not documented as thread-safe
+        with self._finder_lock:
+            return self._finder.timezone_at(lat=latitude, lng=longitude)
+
+    def _lookup_cell(self, cell_lat: int, cell_lon: int) -> Optional[str]:
+        """Zone shared by the corners and centre of a grid cell, or _MIXED_CELL."""
+        step = self.grid_resolution
+        zones = set()
+        for lat_offset, lon_offset in ((0, 0), (0, 1), (1, 0), (1, 1), (0.5, 0.5)):
+            latitude = min(90.0, (cell_lat + lat_offset) * step)
+            longitude = ((cell_lon + lon_offset) * step + 180.0) % 360.0 - 180.0
+            zones.add(self._finder_zone(latitude, longitude))
+            if len(zones) > 1:
+                return _MIXED_CELL
+        return zones.pop()
+
+    def _first_visit(self, cell: Tuple[int, int]) -> bool:
+        """Record a visit to a cell; True if it had not been visited before."""
+        if cell in self._seen_cells:
+            return False
+        if len(self._seen_cells) >= self._seen_limit:
+            self._seen_cells.clear()
+        self._seen_cells.add(cell)
+        return True
+
+    def timezone_at(self, latitude: float, longitude: float) -> Optional[str]:
+        """Zone name for a coordinate, or None if it cannot be determined."""
+        if self.grid_resolution <= 0:
+            return self._finder_zone(latitude, longitude)
+        cell = (math.floor(latitude / self.grid_resolution), math.floor(longitude / self.grid_resolution))
+        if self._first_visit(cell):
+            return self._finder_zone(latitude, longitude)
+        zone = self._cell_zone(*cell)
+        if zone is _MIXED_CELL:
+            return self._finder_zone(latitude, longitude)
+        return zone
+
+    def resolve_many(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """
+        Zone names for arrays of coordinates, as an object array (None where
+        a zone cannot be determined). One grid lookup per cell shared by
+        several records or seen before, plus one finder call per record in a
+        mixed cell or alone in a new cell.
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if self.grid_resolution <= 0:
+            zones = np.empty(len(latitudes), dtype=object)
+            for i, (lat, lon) in enumerate(zip(latitudes.tolist(), longitudes.tolist())):
+                zones[i] = self._finder_zone(lat, lon)
+            return zones
+
+        cells = np.stack([np.floor(latitudes / self.grid_resolution),
+                          np.floor(longitudes / self.grid_resolution)], axis=1).astype(np.int64)
+        unique_cells, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+        cell_zones = np.full(len(unique_cells), _MIXED_CELL, dtype=object)
+        for i, (cell_lat, cell_lon) in enumerate(unique_cells.tolist()):
+            if self._first_visit((cell_lat, cell_lon)) and counts[i] == 1:
+                continue
+            cell_zones[i] = self._cell_zone(cell_lat, cell_lon)
+
+        zones = cell_zones[inverse.reshape(-1)]
+        for i in np.flatnonzero(np.equal(zones, _MIXED_CELL)).tolist():
+            zones[i] = self._finder_zone(float(latitudes[i]), float(longitudes[i]))
+        return zones
+
+    def stats(self) -> Dict[str, int]:
+        grid = self._cell_zone.cache_info()
+        zone = self.zone.cache_info()
+        return {
+            "grid_hits": grid.hits,
+            "grid_misses": grid.misses,
+            "grid_size": grid.currsize,
+            "zone_hits": zone.hits,
+            "zone_misses": zone.misses
+        }
+
+
+_resolver: Optional[TimezoneResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_timezone_resolver() -> TimezoneResolver:
+    """Process-wide timezone resolver, created on first use."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = TimezoneResolver()
+    return _resolver
+
+
+def preload_timezone_resolver() -> TimezoneResolver:
+    """Create the resolver ahead of the first request (called at startup)."""
+    resolver = get_timezone_resolver()
+    logger.info(f"Timezone resolver ready (in_memory={resolver.in_memory}, "
+                f"grid={resolver.grid_resolution} deg)")
+    return resolver
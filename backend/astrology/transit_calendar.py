@@ -0,0 +1,358 @@
+"""
+Precomputed calendar of global transit events ("transit calendar").
+
+Sign ingresses, nakshatra changes and stations are the same for everyone,
+so an offline build finds them all once with the transit engine on live
+swisseph and writes them to one binary file, sorted by time. Only natal
+transits still have to be computed per request.
+
+The file is column oriented: Julian days, longitudes, speeds and one byte
+each for body, event type and from/to index. A second section holds each
+(body, event type) pair's Julian days and row numbers as separate sorted
+runs. At runtime the file is memory-mapped and searched with bisect:
+
+    calendar.events_between(jd_a, jd_b)            events in [jd_a, jd_b)
+    calendar.next_event('Jupiter', 'sign_ingress', jd)
+
+Both take a few microseconds and make no swisseph calls.
+
+Enable it by building the file; TRANSIT_CALENDAR_PATH points at it.
+
+    python -m astrology.transit_calendar build --start-year 1900 --end-year 2100
+    python -m astrology.transit_calendar verify --samples 2000 --windows 3
+    python -m astrology.transit_calendar bench
+"""
+import argparse
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import swisseph as swe
+
+from .charts import PLANET_NUMBERS
+from .transits import EVENT_TYPES, NAKSHATRA_SPAN, SIGN_SPAN, TRANSIT_BODIES, TransitEvent, find_transit_events
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR_PATH = os.getenv(
+    'TRANSIT_CALENDAR_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ephe', 'transit_calendar.bin')
+)
+
+CALENDAR_EVENT_TYPES = [kind for kind in EVENT_TYPES if kind != "natal_transit"]
+
+# Allowed timing errors in verify, in seconds. A station is where the speed
+# passes slowly through zero, so its time is far less well conditioned than
+# a crossing's (a 1e-7 deg/day change in Uranus's speed moves it ~10 s).
+VERIFY_TOLERANCE_SECONDS = 1.0
+VERIFY_STATION_TOLERANCE_SECONDS = 60.0
+
+_MAGIC = b'VEDTEV01'
+_HEADER = struct.Struct('<8sIQddII')   # magic, version, event count, jd start, jd end, key count, names length
+_KEY_ENTRY = struct.Struct('<BB6xQQ')  # body, event type, first position in the key section, count
+_FORMAT_VERSION = 1
+
+# Column name, dtype; laid out in this order after the header
+_COLUMNS = [
+    ('jd', '<f8'),
+    ('longitude', '<f8'),
+    ('speed', '<f4'),
+    ('body', 'u1'),
+    ('event', 'u1'),
+    ('from', 'u1'),
+    ('to', 'u1'),
+]
+
+
+class TransitCalendar:
+    """Memory-mapped, time-sorted transit events with bisect lookups."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, self.jd_start, self.jd_end, key_count, names_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {_FORMAT_VERSION} transit calendar")
+
+        offset = _HEADER.size
+        bodies, event_types = bytes(self._mmap[offset:offset + names_length]).decode('ascii').split('\n')
+        self.bodies = bodies.split(',')
+        self.event_types = event_types.split(',')
+        offset += names_length
+        offset += (-offset) % 8
+
+        keys = []
+        for i in range(key_count):
+            keys.append(_KEY_ENTRY.unpack_from(self._mmap, offset + i * _KEY_ENTRY.size))
+        offset += key_count * _KEY_ENTRY.size
+
+        buffer = memoryview(self._mmap)
+        self.count = count
+        self._columns: Dict[str, np.ndarray] = {}
+        for name, dtype in _COLUMNS:
+            if name == 'jd':
+                # Scalar view for bisect, which is faster than numpy on one value
+                self._jd = buffer[offset:offset + count * 8].cast('d')
+            self._columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            offset += count * np.dtype(dtype).itemsize
+            offset += (-offset) % 8
+
+        key_jd = buffer[offset:offset + count * 8].cast('d')
+        offset += count * 8
+        key_row = buffer[offset:offset + count * 4].cast('I')
+        self._keys: Dict[Tuple[str, str], Tuple[memoryview, memoryview]] = {}
+        for body, event, first, length in keys:
+            self._keys[(self.bodies[body], self.event_types[event])] = (
+                key_jd[first:first + length], key_row[first:first + length]
+            )
+
+        self._body_codes = {name: i for i, name in enumerate(self.bodies)}
+        self._event_codes = {name: i for i, name in enumerate(self.event_types)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def covers(self, jd_start: float, jd_end: float) -> bool:
+        return self.jd_start <= jd_start and jd_end <= self.jd_end
+
+    def event(self, row: int) -> TransitEvent:
+        columns = self._columns
+        return TransitEvent(
+            self._jd[row],
+            self.bodies[columns['body'][row]],
+            self.event_types[columns['event'][row]],
+            int(columns['from'][row]),
+            int(columns['to'][row]),
+            float(columns['longitude'][row]),
+            float(columns['speed'][row])
+        )
+
+    def events_between(self, jd_start: float, jd_end: float, bodies: Optional[Sequence[str]] = None,
+                       event_types: Optional[Sequence[str]] = None) -> List[TransitEvent]:
+        """Events with jd_start <= jd < jd_end, sorted by time."""
+        first = bisect_left(self._jd, jd_start)
+        last = bisect_left(self._jd, jd_end)
+        rows = np.arange(first, last)
+        if bodies:
+            codes = [self._body_codes[body] for body in bodies if body in self._body_codes]
+            rows = rows[np.isin(self._columns['body'][first:last], codes)]
+        if event_types:
+            codes = [self._event_codes[kind] for kind in event_types if kind in self._event_codes]
+            rows = rows[np.isin(self._columns['event'][rows], codes)]
+        return [self.event(row) for row in rows.tolist()]
+
+    def next_event(self, body: str, event_type: str, jd: float) -> Optional[TransitEvent]:
+        """The first event of this type for this body strictly after jd."""
+        run = self._keys.get((body, event_type))
+        if run is None:
+            return None
+        key_jd, key_row = run
+        index = bisect_right(key_jd, jd)
+        return self.event(key_row[index]) if index < len(key_jd) else None
+
+    def next_ingress(self, body: str, jd: float) -> Optional[TransitEvent]:
+        return self.next_event(body, "sign_ingress", jd)
+
+
+_calendar = None
+_calendar_loaded = False
+
+
+def get_transit_calendar() -> Optional[TransitCalendar]:
+    """Return the process-wide calendar, or None if the file is unavailable."""
+    global _calendar, _calendar_loaded
+    if not _calendar_loaded:
+        _calendar_loaded = True
+        if os.path.exists(DEFAULT_CALENDAR_PATH):
+            _calendar = TransitCalendar(DEFAULT_CALENDAR_PATH)
+            logger.info(f"Loaded transit calendar from {DEFAULT_CALENDAR_PATH} ({len(_calendar)} events)")
+        else:
+            logger.info(f"No transit calendar at {DEFAULT_CALENDAR_PATH}; transits are computed live")
+    return _calendar
+
+
+def preload_transit_calendar() -> None:
+    """Map the calendar file at startup instead of on the first request."""
+    get_transit_calendar()
+
+
+# --- Offline build ---
+
+def build_calendar(path: str, start_year: int, end_year: int) -> int:
+    """Find every global event with live swisseph and write the calendar file."""
+    jd_start = swe.julday(start_year, 1, 1, 0.0)
+    jd_end = swe.julday(end_year + 1, 1, 1, 0.0)
+
+    started = time.perf_counter()
+    events = find_transit_events(jd_start, jd_end, TRANSIT_BODIES, CALENDAR_EVENT_TYPES, engine='swisseph')
+    logger.info(f"Found {len(events)} events in {time.perf_counter() - started:.1f}s")
+
+    body_codes = {name: i for i, name in enumerate(TRANSIT_BODIES)}
+    event_codes = {name: i for i, name in enumerate(CALENDAR_EVENT_TYPES)}
+    columns = {
+        'jd': np.array([event.jd for event in events], dtype='<f8'),
+        'longitude': np.array([event.longitude for event in events], dtype='<f8'),
+        'speed': np.array([event.speed for event in events], dtype='<f4'),
+        'body': np.array([body_codes[event.body] for event in events], dtype='u1'),
+        'event': np.array([event_codes[event.event] for event in events], dtype='u1'),
+        'from': np.array([event.from_index for event in events], dtype='u1'),
+        'to': np.array([event.to_index for event in events], dtype='u1'),
+    }
+
+    # One time-sorted run per (body, event type)
+    key = columns['body'].astype(np.int64) * len(CALENDAR_EVENT_TYPES) + columns['event']
+    order = np.lexsort((columns['jd'], key))
+    key_entries = []
+    for code in np.unique(key).tolist():
+        positions = np.flatnonzero(key[order] == code)
+        body, event = divmod(code, len(CALENDAR_EVENT_TYPES))
+        key_entries.append(_KEY_ENTRY.pack(body, event, int(positions[0]), len(positions)))
+
+    names = f"{','.join(TRANSIT_BODIES)}\n{','.join(CALENDAR_EVENT_TYPES)}".encode('ascii')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(events), jd_start, jd_end, len(key_entries), len(names)))
+        f.write(names)
+        f.write(b'\0' * ((-f.tell()) % 8))
+        f.write(b''.join(key_entries))
+        for name, dtype in _COLUMNS:
+            f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+            f.write(b'\0' * ((-f.tell()) % 8))
+        f.write(np.ascontiguousarray(columns['jd'][order], dtype='<f8').tobytes())
+        f.write(np.ascontiguousarray(order, dtype='<u4').tobytes())
+    os.replace(tmp_path, path)
+    return len(events)
+
+
+def _sidereal(jd: float, body: str) -> Tuple[float, float]:
+    """Live sidereal longitude and speed (tropical minus the Lahiri ayanamsa and its rate)."""
+    position = swe.calc_ut(jd, int(PLANET_NUMBERS['Rahu' if body == 'Ketu' else body]), swe.FLG_SWIEPH | swe.FLG_SPEED)[0]
+    ayanamsa = swe.get_ayanamsa_ut(jd)
+    ayanamsa_rate = (swe.get_ayanamsa_ut(jd + 0.5) - swe.get_ayanamsa_ut(jd - 0.5))
+    longitude = (position[0] - ayanamsa + (180 if body == 'Ketu' else 0)) % 360
+    return longitude, position[3] - ayanamsa_rate
+
+
+def verify_calendar(calendar: TransitCalendar, samples: int, windows: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Spot-check the calendar against live swisseph.
+
+    Returns the worst timing error in seconds for crossings (longitude at
+    the stored time against the boundary, divided by the speed) and for
+    stations (speed at the stored time divided by its rate of change), plus the number
+    of events missing or extra in random one-year windows recomputed live.
+    """
+    rng = np.random.default_rng(seed)
+    tolerance = VERIFY_TOLERANCE_SECONDS / 86400
+    station_tolerance = VERIFY_STATION_TOLERANCE_SECONDS / 86400
+    worst = {"crossing_seconds": 0.0, "station_seconds": 0.0, "window_mismatches": 0.0}
+
+    for row in rng.integers(0, len(calendar), samples).tolist():
+        event = calendar.event(row)
+        if event.event.startswith("station"):
+            # Distance to the speed's zero, from its rate of change
+            before = _sidereal(event.jd - station_tolerance, event.body)[1]
+            after = _sidereal(event.jd + station_tolerance, event.body)[1]
+            rate = (after - before) / (2 * station_tolerance)
+            error = abs(_sidereal(event.jd, event.body)[1] / rate) * 86400 if rate else float('inf')
+            worst["station_seconds"] = max(worst["station_seconds"], error)
+            continue
+        width = SIGN_SPAN if event.event == "sign_ingress" else NAKSHATRA_SPAN
+        longitude, speed = _sidereal(event.jd, event.body)
+        offset = (longitude + width / 2) % width - width / 2
+        worst["crossing_seconds"] = max(worst["crossing_seconds"], abs(offset / speed) * 86400)
+
+    for start in rng.uniform(calendar.jd_start, calendar.jd_end - 366, windows).tolist():
+        live = find_transit_events(start, start + 365, TRANSIT_BODIES, CALENDAR_EVENT_TYPES, engine='swisseph')
+        stored = calendar.events_between(start, start + 365)
+        if len(live) != len(stored):
+            worst["window_mismatches"] += abs(len(live) - len(stored))
+            continue
+
+        def key(e):
+            return (e.body, e.event, e.jd)
+        for a, b in zip(sorted(live, key=key), sorted(stored, key=key)):
+            allowed = station_tolerance if a.event.startswith("station") else tolerance
+            if (a.body, a.event, a.to_index) != (b.body, b.event, b.to_index) or abs(a.jd - b.jd) > allowed:
+                worst["window_mismatches"] += 1
+    return worst
+
+
+def _bench(calendar: TransitCalendar, queries: int) -> None:
+    rng = np.random.default_rng(1)
+    jds = rng.uniform(calendar.jd_start, calendar.jd_end - 40, queries).tolist()
+    bodies = [TRANSIT_BODIES[i] for i in rng.integers(0, len(TRANSIT_BODIES), queries).tolist()]
+
+    started = time.perf_counter()
+    for body, jd in zip(bodies, jds):
+        calendar.next_ingress(body, jd)
+    next_time = (time.perf_counter() - started) / queries
+
+    started = time.perf_counter()
+    returned = 0
+    for jd in jds:
+        returned += len(calendar.events_between(jd, jd + 30))
+    window_time = (time.perf_counter() - started) / queries
+
+    started = time.perf_counter()
+    for jd in jds[:max(queries // 100, 1)]:
+        find_transit_events(jd, jd + 30, TRANSIT_BODIES, CALENDAR_EVENT_TYPES, engine='swisseph')
+    live_time = (time.perf_counter() - started) / max(queries // 100, 1)
+
+    print(f"events:                   {len(calendar)}")
+    print(f"next_ingress:             {next_time * 1e6:8.2f} us")
+    print(f"events_between (30 days): {window_time * 1e6:8.2f} us  ({returned / queries:.0f} events)")
+    print(f"live search (30 days):    {live_time * 1e6:8.2f} us  ({live_time / window_time:.0f}x slower)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the precomputed transit calendar.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="find every global transit event and write the calendar file")
+    build.add_argument("--start-year", type=int, default=1900)
+    build.add_argument("--end-year", type=int, default=2100)
+    build.add_argument("--out", default=DEFAULT_CALENDAR_PATH)
+    verify = sub.add_parser("verify", help="spot-check the calendar against live swisseph")
+    verify.add_argument("--samples", type=int, default=2000)
+    verify.add_argument("--windows", type=int, default=3, help="one-year windows recomputed in full")
+    verify.add_argument("--path", default=DEFAULT_CALENDAR_PATH)
+    bench = sub.add_parser("bench", help="time calendar queries against a live search")
+    bench.add_argument("--queries", type=int, default=20000)
+    bench.add_argument("--path", default=DEFAULT_CALENDAR_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_calendar(args.out, args.start_year, args.end_year)
+        print(f"Wrote {args.out} ({count} events, {os.path.getsize(args.out) / 1e6:.1f} MB)")
+        return 0
+
+    calendar = TransitCalendar(args.path)
+    if args.command == "bench":
+        _bench(calendar, args.queries)
+        return 0
+
+    worst = verify_calendar(calendar, args.samples, args.windows)
+    print(f"crossings: worst timing error {worst['crossing_seconds']:.4f} s")
+    print(f"stations:  worst timing error {worst['station_seconds']:.4f} s")
+    print(f"windows:   {int(worst['window_mismatches'])} events missing or extra")
+    if (worst['crossing_seconds'] > VERIFY_TOLERANCE_SECONDS
+            or worst['station_seconds'] > VERIFY_STATION_TOLERANCE_SECONDS or worst['window_mismatches']):
+        print(f"FAILED: calendar does not match swisseph within {VERIFY_TOLERANCE_SECONDS} s "
+              f"({VERIFY_STATION_TOLERANCE_SECONDS} s for stations)")
+        return 1
+    print(f"OK: crossings within {VERIFY_TOLERANCE_SECONDS} s and stations within "
+          f"{VERIFY_STATION_TOLERANCE_SECONDS} s of swisseph")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
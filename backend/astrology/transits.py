@@ -0,0 +1,456 @@
+"""
+Transit engine: sign ingresses, nakshatra changes, retrograde stations and
+transits over natal points, with exact event times.
+
+Each body is stepped through the date range on its own step size
+(STEP_DAYS): short for the Moon, long for the outer planets, and never long
+enough to hide a retrograde loop or to move more than 180 degrees. Each
+step reuses the positions and speeds at both of its ends:
+
+  1. A sign change in speed brackets a station. It is solved for speed = 0
+     with the Illinois (modified regula falsi) method, and the station is
+     inserted as an extra sample so that motion between samples is monotonic.
+  2. Boundaries between the unwrapped longitudes at the two ends are
+     crossed exactly once each. The first guess for each crossing time comes
+     from the cubic Hermite interpolant built from both ends' positions and
+     speeds.
+  3. The guess is refined by Newton's method using the body's speed, with
+     the bracket as a safeguard. Newton's error bound (dt^2 * |accel| / 2|v|)
+     decides when to stop, so most events need a single ephemeris call.
+
+Positions come from the precomputed ephemeris table (vectorized) when
+EPHEMERIS_ENGINE is "table" and the table covers the range, otherwise from
+swisseph. Sidereal longitudes use the same convention as the charts:
+tropical longitude minus the Lahiri ayanamsa.
+Stations are where the sidereal speed is zero, which for the slowest
+bodies can be a day or two away from the tropical station.
+
+With birth data, events of the seven classical planets are scored with
+the natal Ashtakavarga: the body's BAV bindus in the sign it is in (the
+sign entered, for an ingress) and that sign's SAV bindus.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import math
+
+import numpy as np
+
+from .ashtakavarga import ASHTAKAVARGA_PLANETS, CONTRIBUTORS, ashtakavarga, transit_bindus
+from .charts import PLANET_NUMBERS, ZODIAC_SIGNS, NAKSHATRAS, birth_julian_day
+from .dasha import _date_to_jd, datetime_to_jd, jd_to_datetime
+from .ephemeris import EPHEMERIS_ENGINE, PlanetSnapshot, _record_table_lookups, calc_ut, get_ayanamsa_ut
+from .ephemeris_tables import get_ephemeris_table
+from .lagna import ascendant
+
+logger = logging.getLogger(__name__)
+
+TRANSIT_BODIES = list(PLANET_NUMBERS) + ['Ketu']
+
+EVENT_TYPES = (
+    "sign_ingress",
+    "nakshatra_change",
+    "station_retrograde",
+    "station_direct",
+    "natal_transit",
+)
+
+SIGN_SPAN = 30.0
+NAKSHATRA_SPAN = 360.0 / 27
+
+# Sample spacing in days. The Moon moves up to ~15.4 deg/day; the planets
+# that station must not fit a whole retrograde loop (Mercury's is ~19 days)
+# into one step.
+STEP_DAYS = {
+    'Moon': 2.0,
+    'Mercury': 5.0,
+}
+DEFAULT_STEP_DAYS = 15.0
+
+# Bodies whose speed changes sign (the mean node is always retrograde)
+STATIONING_BODIES = {'Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto'}
+
+ROOT_TOLERANCE_DAYS = 1e-7
+STATION_TOLERANCE_DAYS = 1e-6
+MAX_ROOT_ITERATIONS = 30
+
+# Ayanamsa samples are interpolated between this spacing (days)
+_AYANAMSA_STEP = 30.0
+
+
+class TransitEvent(NamedTuple):
+    jd: float
+    body: str
+    event: str
+    from_index: int
+    to_index: int
+    longitude: float
+    speed: float
+    natal_point: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        names = NAKSHATRAS if self.event == "nakshatra_change" else ZODIAC_SIGNS
+        return {
+            "jd": self.jd,
+            "datetime": jd_to_datetime(self.jd).isoformat(timespec="seconds"),
+            "body": self.body,
+            "event": self.event,
+            "from": names[self.from_index],
+            "to": names[self.to_index],
+            "longitude": round(self.longitude, 6),
+            "retrograde": self.speed < 0,
+            "natal_point": self.natal_point
+        }
+
+
+class _SwissephSource:
+    """Sidereal positions from swisseph, one calc_ut call per sample."""
+
+    def __init__(self, jd_start: float, jd_end: float):
+        count = int(math.ceil((jd_end - jd_start) / _AYANAMSA_STEP)) + 2
+        self._ayanamsa_jd = jd_start - _AYANAMSA_STEP / 2 + _AYANAMSA_STEP * np.arange(count)
+        self._ayanamsa = np.array([get_ayanamsa_ut(float(jd)) for jd in self._ayanamsa_jd])
+        self._ayanamsa_rate = np.gradient(self._ayanamsa, self._ayanamsa_jd)
+
+    def positions(self, body: str, jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        number = int(PLANET_NUMBERS['Rahu' if body == 'Ketu' else body])
+        jd = np.asarray(jd, dtype=np.float64)
+        lon = np.empty(jd.shape)
+        speed = np.empty(jd.shape)
+        for i, t in enumerate(jd.tolist()):
+            position = calc_ut(t, number)[0]
+            lon[i] = position[0]
+            speed[i] = position[3]
+        lon -= np.interp(jd, self._ayanamsa_jd, self._ayanamsa)
+        speed -= np.interp(jd, self._ayanamsa_jd, self._ayanamsa_rate)
+        if body == 'Ketu':
+            lon += 180.0
+        return np.mod(lon, 360.0), speed
+
+
+class _TableSource:
+    """Sidereal positions interpolated from the precomputed ephemeris table."""
+
+    def __init__(self, table):
+        self._table = table
+
+    def positions(self, body: str, jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lon, speed = self._table.positions('Rahu' if body == 'Ketu' else body, np.asarray(jd, dtype=np.float64))
+        _record_table_lookups(len(lon))
+        if body == 'Ketu':
+            lon = np.mod(lon + 180.0, 360.0)
+        return lon, speed
+
+
+def _position_source(jd_start: float, jd_end: float, engine: str):
+    if engine not in ('auto', 'table', 'swisseph'):
+        raise ValueError(f"Unknown transit engine: {engine}")
+    if engine == 'table' or (engine == 'auto' and EPHEMERIS_ENGINE == 'table'):
+        table = get_ephemeris_table()
+        if table is not None and table.covers(jd_start) and table.covers(jd_end):
+            return _TableSource(table)
+        if engine == 'table':
+            raise ValueError("The ephemeris table does not cover the requested range")
+    return _SwissephSource(jd_start, jd_end)
+
+
+def _wrap180(angle: np.ndarray) -> np.ndarray:
+    return np.mod(angle + 180.0, 360.0) - 180.0
+
+
+def _find_stations(source, body: str, lo: np.ndarray, hi: np.ndarray,
+                   v_lo: np.ndarray, v_hi: np.ndarray) -> np.ndarray:
+    """Times where speed crosses zero inside [lo, hi], by the Illinois method."""
+    lo, hi, v_lo, v_hi = lo.copy(), hi.copy(), v_lo.copy(), v_hi.copy()
+    side = np.zeros(len(lo), dtype=np.int8)
+    t = lo
+    for _ in range(MAX_ROOT_ITERATIONS):
+        t = (lo * v_hi - hi * v_lo) / (v_hi - v_lo)
+        active = (hi - lo) > STATION_TOLERANCE_DAYS
+        if not active.any():
+            break
+        _, v = source.positions(body, t)
+        same_as_lo = np.sign(v) == np.sign(v_lo)
+        # Replace the endpoint on v's side; halve the other one if the same
+        # side was kept twice in a row (Illinois)
+        lo = np.where(same_as_lo, t, lo)
+        v_lo_new = np.where(same_as_lo, v, v_lo)
+        v_hi_new = np.where(~same_as_lo, v, v_hi)
+        hi = np.where(~same_as_lo, t, hi)
+        v_hi_new = np.where(same_as_lo & (side == 1), v_hi_new / 2, v_hi_new)
+        v_lo_new = np.where(~same_as_lo & (side == -1), v_lo_new / 2, v_lo_new)
+        side = np.where(same_as_lo, 1, -1).astype(np.int8)
+        v_lo, v_hi = v_lo_new, v_hi_new
+        converged = np.abs(v) < 1e-12
+        lo = np.where(converged, t, lo)
+        hi = np.where(converged, t, hi)
+    return t
+
+
+def hermite_crossings(t_a: np.ndarray, t_b: np.ndarray, l_a: np.ndarray, l_b: np.ndarray,
+                      v_a: np.ndarray, v_b: np.ndarray, target: np.ndarray,
+                      iterations: int = 4) -> np.ndarray:
+    """
+    Times in [t_a, t_b] where the cubic Hermite interpolant of the values
+    l and derivatives v at both ends equals target, by Newton's method on
+    the cubic in s = (t - t_a) / (t_b - t_a).
+    """
+    h = t_b - t_a
+    direction = np.where(l_b >= l_a, 1.0, -1.0)
+    span = np.where(l_b != l_a, l_b - l_a, 1.0)
+    s = np.clip((target - l_a) / span, 0.0, 1.0)
+    for _ in range(iterations):
+        s2, s3 = s * s, s * s * s
+        value = ((2 * s3 - 3 * s2 + 1) * l_a + (s3 - 2 * s2 + s) * h * v_a
+                 + (-2 * s3 + 3 * s2) * l_b + (s3 - s2) * h * v_b)
+        slope = ((6 * s2 - 6 * s) * l_a + (3 * s2 - 4 * s + 1) * h * v_a
+                 + (-6 * s2 + 6 * s) * l_b + (3 * s2 - 2 * s) * h * v_b)
+        safe_slope = np.where(np.abs(slope) > 1e-12, slope, direction * 1e-12)
+        s = np.clip(s - (value - target) / safe_slope, 0.0, 1.0)
+    return t_a + s * h
+
+
+def _find_crossings(source, body: str, t_a: np.ndarray, t_b: np.ndarray,
+                    l_a: np.ndarray, l_b: np.ndarray, v_a: np.ndarray, v_b: np.ndarray,
+                    target: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Times in [t_a, t_b] where the unwrapped longitude equals target, for
+    intervals with monotonic motion. Returns (jd, longitude, speed).
+    """
+    h = t_b - t_a
+    direction = np.where(l_b >= l_a, 1.0, -1.0)
+
+    # Cubic Hermite guess, refined on the ephemeris below
+    t = hermite_crossings(t_a, t_b, l_a, l_b, v_a, v_b, target)
+
+    # Safeguarded Newton on the ephemeris
+    lo, hi = t_a.copy(), t_b.copy()
+    accel = np.abs(v_b - v_a) / np.maximum(h, 1e-9)
+    lon = np.zeros(len(t))
+    speed = np.zeros(len(t))
+    pending = np.arange(len(t))
+    for _ in range(MAX_ROOT_ITERATIONS):
+        if not len(pending):
+            break
+        lon_p, speed_p = source.positions(body, t[pending])
+        lon[pending], speed[pending] = lon_p, speed_p
+        error = _wrap180(lon_p - target[pending])
+        ahead = error * direction[pending] > 0
+        hi[pending] = np.where(ahead, t[pending], hi[pending])
+        lo[pending] = np.where(ahead, lo[pending], t[pending])
+
+        safe_speed = np.where(np.abs(speed_p) > 1e-9, speed_p, direction[pending] * 1e-9)
+        dt = -error / safe_speed
+        t_new = t[pending] + dt
+        outside = (t_new <= lo[pending]) | (t_new >= hi[pending])
+        t_new = np.where(outside, (lo[pending] + hi[pending]) / 2, t_new)
+        bound = np.where(outside, hi[pending] - lo[pending],
+                         dt * dt * accel[pending] / (2 * np.abs(safe_speed)))
+        t[pending] = t_new
+        done = (bound < ROOT_TOLERANCE_DAYS) | (np.abs(error) < 1e-12)
+        lon[pending] = np.where(done, np.mod(target[pending], 360.0), lon[pending])
+        pending = pending[~done]
+    return t, lon, speed
+
+
+def _scan_body(source, body: str, jd_start: float, jd_end: float, event_types: set,
+               natal_points: Dict[str, float]) -> List[TransitEvent]:
+    step = STEP_DAYS.get(body, DEFAULT_STEP_DAYS)
+    count = max(int(math.ceil((jd_end - jd_start) / step)), 1)
+    t = np.linspace(jd_start, jd_end, count + 1)
+    lon, speed = source.positions(body, t)
+    events: List[TransitEvent] = []
+
+    if body in STATIONING_BODIES:
+        index = np.flatnonzero(np.sign(speed[:-1]) * np.sign(speed[1:]) < 0)
+        if len(index):
+            t_station = _find_stations(source, body, t[index], t[index + 1], speed[index], speed[index + 1])
+            lon_station, _ = source.positions(body, t_station)
+            if event_types & {"station_retrograde", "station_direct"}:
+                for k, i in enumerate(index.tolist()):
+                    sign = int(lon_station[k] // SIGN_SPAN)
+                    kind = "station_retrograde" if speed[i] > 0 else "station_direct"
+                    if kind in event_types:
+                        events.append(TransitEvent(float(t_station[k]), body, kind, sign, sign,
+                                                   float(lon_station[k]), 0.0))
+            # Stations become samples so that every interval is monotonic
+            t = np.insert(t, index + 1, t_station)
+            lon = np.insert(lon, index + 1, lon_station)
+            speed = np.insert(speed, index + 1, np.zeros(len(index)))
+
+    unwrapped = lon[0] + np.concatenate([[0.0], np.cumsum(_wrap180(np.diff(lon)))])
+
+    boundary_sets = []
+    if "sign_ingress" in event_types:
+        boundary_sets.append(("sign_ingress", SIGN_SPAN, 0.0, None))
+    if "nakshatra_change" in event_types:
+        boundary_sets.append(("nakshatra_change", NAKSHATRA_SPAN, 0.0, None))
+    if "natal_transit" in event_types:
+        for name, point in natal_points.items():
+            boundary_sets.append(("natal_transit", 360.0, point % 360.0, name))
+
+    for kind, width, offset, natal_name in boundary_sets:
+        cell = np.floor((unwrapped - offset) / width)
+        delta = np.diff(cell).astype(np.int64)
+        intervals = np.flatnonzero(delta)
+        if not len(intervals):
+            continue
+        crossings = np.abs(delta[intervals])
+        interval = np.repeat(intervals, crossings)
+        # k-th boundary crossed inside each interval, in the direction of motion
+        k = np.arange(len(interval)) - np.repeat(np.cumsum(crossings) - crossings, crossings)
+        forward = delta[interval] > 0
+        boundary_cell = np.where(forward, cell[interval] + 1 + k, cell[interval] - k)
+        target = offset + width * boundary_cell
+
+        jd, lon_x, speed_x = _find_crossings(
+            source, body, t[interval], t[interval + 1], unwrapped[interval], unwrapped[interval + 1],
+            speed[interval], speed[interval + 1], target
+        )
+        cells_per_circle = int(round(360.0 / width))
+        to_cell = np.where(forward, boundary_cell, boundary_cell - 1).astype(np.int64) % cells_per_circle
+        from_cell = np.where(forward, boundary_cell - 1, boundary_cell).astype(np.int64) % cells_per_circle
+        for i in range(len(jd)):
+            if natal_name is not None:
+                sign = int((offset % 360.0) // SIGN_SPAN)
+                events.append(TransitEvent(float(jd[i]), body, kind, sign, sign, float(lon_x[i]),
+                                           float(speed_x[i]), natal_name))
+            else:
+                events.append(TransitEvent(float(jd[i]), body, kind, int(from_cell[i]), int(to_cell[i]),
+                                           float(lon_x[i]), float(speed_x[i])))
+    return events
+
+
+def _selection(bodies: Optional[Sequence[str]], event_types: Optional[Sequence[str]]) -> Tuple[List[str], set]:
+    """Validated bodies and event types, defaulting to all of them."""
+    bodies = list(bodies) if bodies else TRANSIT_BODIES
+    unknown = [body for body in bodies if body not in TRANSIT_BODIES]
+    if unknown:
+        raise ValueError(f"Unknown transit bodies: {', '.join(unknown)}")
+    types = set(event_types) if event_types else set(EVENT_TYPES)
+    unknown = types - set(EVENT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown transit event types: {', '.join(sorted(unknown))}")
+    return bodies, types
+
+
+def find_transit_events(jd_start: float, jd_end: float, bodies: Optional[Sequence[str]] = None,
+                        event_types: Optional[Sequence[str]] = None,
+                        natal_points: Optional[Dict[str, float]] = None,
+                        engine: str = 'auto') -> List[TransitEvent]:
+    """
+    Transit events between two Julian days (UT), sorted by time.
+
+    Args:
+        bodies: subset of TRANSIT_BODIES (default all)
+        event_types: subset of EVENT_TYPES (default all)
+        natal_points: name -> sidereal longitude, for natal_transit events
+        engine: 'auto' (table when EPHEMERIS_ENGINE is "table" and it covers
+            the range), 'table' or 'swisseph'
+    """
+    try:
+        if jd_end <= jd_start:
+            raise ValueError("Transit range end must be after its start")
+        bodies, types = _selection(bodies, event_types)
+        source = _position_source(jd_start, jd_end, engine)
+        events: List[TransitEvent] = []
+        for body in bodies:
+            events.extend(event for event in _scan_body(source, body, jd_start, jd_end, types, natal_points or {})
+                          if jd_start <= event.jd < jd_end)
+        events.sort(key=lambda event: event.jd)
+        return events
+    except Exception as e:
+        logger.error(f"Error finding transit events: {str(e)}")
+        raise
+
+
+def natal_points_for_birth(dob: str, tob: str, latitude: float, longitude: float) -> Dict[str, float]:
+    """Sidereal natal longitudes of every body and the ascendant."""
+    jd = birth_julian_day(dob, tob, latitude, longitude)
+    snapshot = PlanetSnapshot.compute(jd, PLANET_NUMBERS)
+    points = dict(snapshot.longitudes)
+    points['Ascendant'] = (ascendant(jd, latitude, longitude) - snapshot.ayanamsa) % 360
+    return points
+
+
+def _scored_event(event: TransitEvent, natal_ashtakavarga: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    info = event.to_dict()
+    if natal_ashtakavarga is not None and event.body in ASHTAKAVARGA_PLANETS:
+        sign = event.to_index if event.event == "sign_ingress" else int(event.longitude // SIGN_SPAN) % 12
+        info["bindus"], info["sarva_bindus"] = transit_bindus(natal_ashtakavarga, event.body, sign)
+    return info
+
+
+def _get_transit_calendar():
+    from .transit_calendar import get_transit_calendar
+    return get_transit_calendar()
+
+
+def query_transits(start: str, end: str, bodies: Optional[List[str]] = None,
+                   event_types: Optional[List[str]] = None, dob: Optional[str] = None,
+                   tob: Optional[str] = None, latitude: Optional[float] = None,
+                   longitude: Optional[float] = None, limit: int = 1000) -> Dict[str, Any]:
+    """
+    Transit events in a date window, with natal transits when birth data is
+    given. Global events come from the transit calendar when it covers the
+    window; only natal transits are then computed live.
+    """
+    jd_start = _date_to_jd(start)
+    jd_end = _date_to_jd(end)
+    if jd_end <= jd_start:
+        raise ValueError("Transit range end must be after its start")
+    natal_points = natal_ashtakavarga = None
+    if dob and tob and latitude is not None and longitude is not None:
+        natal_points = natal_points_for_birth(dob, tob, latitude, longitude)
+        natal_ashtakavarga = ashtakavarga([int(natal_points[name] // SIGN_SPAN) for name in CONTRIBUTORS])
+    elif event_types and "natal_transit" in event_types:
+        raise ValueError("natal_transit events need birth data (dob, tob and location)")
+    bodies, types = _selection(bodies, event_types)
+    if natal_points is None:
+        types.discard("natal_transit")
+
+    global_types = sorted(types - {"natal_transit"})
+    calendar = _get_transit_calendar()
+    if global_types and calendar is not None and calendar.covers(jd_start, jd_end):
+        events = calendar.events_between(jd_start, jd_end, bodies, global_types)
+        if "natal_transit" in types:
+            events.extend(find_transit_events(jd_start, jd_end, bodies, ["natal_transit"], natal_points))
+            events.sort(key=lambda event: event.jd)
+    elif types:
+        events = find_transit_events(jd_start, jd_end, bodies, sorted(types), natal_points)
+    else:
+        events = []
+
+    return {
+        "start_jd": jd_start,
+        "end_jd": jd_end,
+        "count": len(events),
+        "truncated": len(events) > limit,
+        "natal_points": natal_points,
+        "events": [_scored_event(event, natal_ashtakavarga) for event in events[:limit]]
+    }
+
+
+def query_next_transit(body: str, event_type: str, after: Optional[str] = None,
+                       search_years: float = 30.0) -> Dict[str, Any]:
+    """
+    The next event of one type for one body after a date (default now): a
+    bisect in the transit calendar when it covers the date, otherwise a
+    live search over the following search_years.
+    """
+    _selection([body], [event_type])
+    if event_type == "natal_transit":
+        raise ValueError("Use /transits with birth data for natal transits")
+    jd = _date_to_jd(after) if after else datetime_to_jd(datetime.utcnow())
+
+    calendar = _get_transit_calendar()
+    event = None
+    if calendar is not None and calendar.covers(jd, jd):
+        event = calendar.next_event(body, event_type, jd)
+    if event is None:
+        events = [e for e in find_transit_events(jd, jd + search_years * 365.25, [body], [event_type]) if e.jd > jd]
+        event = events[0] if events else None
+    return {
+        "jd": jd,
+        "event": event.to_dict() if event is not None else None
+    }
@@ -1,12 +1,16 @@
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
 import logging
 
+from .geocoding import GeocoderUnavailableError, geocode_with_fallback
+from .metrics import timed
+
 logger = logging.getLogger(__name__)
 
 def get_coordinates_from_location(location: str) -> tuple[float, float]:
     """
     Convert a location string to latitude and longitude coordinates.
+
+    The local gazetteer is tried first; Nominatim is only queried for places
+    it does not know (see geocoding.py).
     
     Args:
         location (str): Location string (e.g., "New Delhi, India")
@@ -18,8 +22,8 @@ def get_coordinates_from_location(location: str) -> tuple[float, float]:
         ValueError: If location cannot be found or geocoding fails
     """
     try:
-        geolocator = Nominatim(user_agent="vedic-ai")
-        location_data = geolocator.geocode(location)
+        with timed("geocode"):
+            location_data = geocode_with_fallback(location)
         
         if location_data is None:
             raise ValueError(f"Could not find coordinates for location: {location}")
@@ -27,7 +31,7 @@ def get_coordinates_from_location(location: str) -> tuple[float, float]:
         logger.info(f"Found coordinates for {location}: {location_data.latitude}, {location_data.longitude}")
         return location_data.latitude, location_data.longitude
         
-    except (GeocoderTimedOut, GeocoderUnavailable) as e:
+    except GeocoderUnavailableError as e:
         logger.error(f"Geocoding error for {location}: {str(e)}")
         raise ValueError(f"Error geocoding location: {location}. Please try again.")
     except Exception as e:
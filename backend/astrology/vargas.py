@@ -0,0 +1,193 @@
+"""
+Divisional charts (vargas) D1 to D60 from one set of sidereal longitudes.
+
+Every varga divides each sign into parts and maps (sign, part) to a
+divisional sign. The rules (Parashara) are compiled once into one lookup
+table of shape (varga, sign, part). A position is then mapped with two
+array operations for any set of vargas and any number of charts:
+
+    part = floor(degrees_in_sign * PARTS[varga] / 30)
+    sign = VARGA_TABLE[varga, sign, part]
+
+D30 (trimsamsa) divides signs unequally at whole degrees, so its table has
+one column per degree instead of one per part. Varga charts need no extra
+ephemeris calls and cost microseconds on top of the D1.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from .charts import ZODIAC_SIGNS
+
+logger = logging.getLogger(__name__)
+
+VARGAS = ["D1", "D2", "D3", "D4", "D7", "D9", "D10", "D12", "D16",
+          "D20", "D24", "D27", "D30", "D40", "D45", "D60"]
+
+VARGA_NAMES = {
+    "D1": "Rashi",
+    "D2": "Hora",
+    "D3": "Drekkana",
+    "D4": "Chaturthamsa",
+    "D7": "Saptamsa",
+    "D9": "Navamsa",
+    "D10": "Dasamsa",
+    "D12": "Dwadasamsa",
+    "D16": "Shodasamsa",
+    "D20": "Vimsamsa",
+    "D24": "Chaturvimsamsa",
+    "D27": "Saptavimsamsa",
+    "D30": "Trimsamsa",
+    "D40": "Khavedamsa",
+    "D45": "Akshavedamsa",
+    "D60": "Shashtiamsa",
+}
+
+ARIES, TAURUS, GEMINI, CANCER, LEO, VIRGO, LIBRA, SCORPIO, SAGITTARIUS, CAPRICORN, AQUARIUS, PISCES = range(12)
+
+
+def _is_odd(sign: int) -> bool:
+    """Aries (index 0) is the first, odd sign."""
+    return sign % 2 == 0
+
+
+def _modality(sign: int) -> int:
+    """0 movable, 1 fixed, 2 dual."""
+    return sign % 3
+
+
+def _from_start(start: Callable[[int], int]) -> Callable[[int, int], int]:
+    """Rule for vargas whose parts are counted on from a starting sign."""
+    return lambda sign, part: (start(sign) + part) % 12
+
+
+def _hora(sign: int, part: int) -> int:
+    # Odd signs: Sun's hora (Leo) then Moon's (Cancer); even signs the reverse
+    return (LEO, CANCER)[part] if _is_odd(sign) else (CANCER, LEO)[part]
+
+
+# Trimsamsa: (end degree, sign) for odd and even signs
+_TRIMSAMSA_ODD = [(5, ARIES), (10, AQUARIUS), (18, SAGITTARIUS), (25, GEMINI), (30, LIBRA)]
+_TRIMSAMSA_EVEN = [(5, TAURUS), (12, VIRGO), (20, PISCES), (25, CAPRICORN), (30, SCORPIO)]
+
+
+def _trimsamsa(sign: int, degree: int) -> int:
+    for end, result in (_TRIMSAMSA_ODD if _is_odd(sign) else _TRIMSAMSA_EVEN):
+        if degree < end:
+            return result
+    raise ValueError(f"Degree out of range: {degree}")
+
+
+# varga -> (table columns per sign, rule(sign, column) -> divisional sign)
+_RULES = {
+    "D1": (1, lambda sign, part: sign),
+    "D2": (2, _hora),
+    "D3": (3, lambda sign, part: (sign + 4 * part) % 12),
+    "D4": (4, lambda sign, part: (sign + 3 * part) % 12),
+    "D7": (7, _from_start(lambda sign: sign if _is_odd(sign) else sign + 6)),
+    # Movable signs start from themselves, fixed from the 9th, dual from the 5th
+    "D9": (9, _from_start(lambda sign: (sign, sign + 8, sign + 4)[_modality(sign)])),
+    "D10": (10, _from_start(lambda sign: sign if _is_odd(sign) else sign + 8)),
+    "D12": (12, _from_start(lambda sign: sign)),
+    "D16": (16, _from_start(lambda sign: (ARIES, LEO, SAGITTARIUS)[_modality(sign)])),
+    "D20": (20, _from_start(lambda sign: (ARIES, SAGITTARIUS, LEO)[_modality(sign)])),
+    "D24": (24, _from_start(lambda sign: LEO if _is_odd(sign) else CANCER)),
+    # Fire, earth, air and water signs start from Aries, Cancer, Libra, Capricorn
+    "D27": (27, _from_start(lambda sign: (ARIES, CANCER, LIBRA, CAPRICORN)[sign % 4])),
+    "D30": (30, _trimsamsa),
+    "D40": (40, _from_start(lambda sign: ARIES if _is_odd(sign) else LIBRA)),
+    "D45": (45, _from_start(lambda sign: (ARIES, LEO, SAGITTARIUS)[_modality(sign)])),
+    "D60": (60, _from_start(lambda sign: sign)),
+}
+
+
+def _build_table():
+    columns = np.array([_RULES[varga][0] for varga in VARGAS], dtype=np.float64)
+    table = np.zeros((len(VARGAS), 12, int(columns.max())), dtype=np.int8)
+    for v, varga in enumerate(VARGAS):
+        count, rule = _RULES[varga]
+        for sign in range(12):
+            for column in range(count):
+                table[v, sign, column] = rule(sign, column)
+    return columns, table
+
+
+VARGA_COLUMNS, VARGA_TABLE = _build_table()
+VARGA_INDEX = {varga: i for i, varga in enumerate(VARGAS)}
+
+
+def parse_vargas(vargas: Optional[Sequence[str]]) -> List[str]:
+    """Normalize requested varga names ("d9", "D9", "9"); default all."""
+    if not vargas:
+        return list(VARGAS)
+    names = []
+    for varga in vargas:
+        name = str(varga).strip().upper()
+        if not name.startswith("D"):
+            name = f"D{name}"
+        if name not in VARGA_INDEX:
+            raise ValueError(f"Unknown varga: {varga}. Supported: {', '.join(VARGAS)}")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def varga_signs(longitudes, vargas: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Divisional sign indices (0 = Aries) for an array of sidereal longitudes.
+
+    Returns an int8 array of shape (len(vargas),) + longitudes.shape, so one
+    call maps every planet of many charts into every requested varga.
+    """
+    index = np.array([VARGA_INDEX[varga] for varga in parse_vargas(vargas)], dtype=np.intp)
+    longitudes = np.mod(np.asarray(longitudes, dtype=np.float64), 360.0)
+    sign = (longitudes // 30).astype(np.intp)
+    degrees = longitudes - 30 * sign
+
+    shape = (len(index),) + (1,) * longitudes.ndim
+    columns = VARGA_COLUMNS[index].reshape(shape)
+    part = np.minimum((degrees * columns / 30).astype(np.intp), columns.astype(np.intp) - 1)
+    return VARGA_TABLE[index.reshape(shape), sign, part]
+
+
+def calculate_vargas(longitudes: Dict[str, float], vargas: Optional[Sequence[str]] = None,
+                     ascendant: str = "Ascendant") -> Dict[str, Dict[str, Any]]:
+    """
+    Divisional charts for one chart's sidereal longitudes, which must
+    include the ascendant. Houses are whole-sign from the divisional
+    ascendant, in the same format as the D1 houses.
+    """
+    try:
+        names = parse_vargas(vargas)
+        bodies = list(longitudes)
+        signs = varga_signs([longitudes[body] for body in bodies], names).tolist()
+        asc_column = bodies.index(ascendant)
+
+        charts = {}
+        for varga, row in zip(names, signs):
+            asc_sign = row[asc_column]
+            house_planets: List[List[str]] = [[] for _ in range(12)]
+            planets = {}
+            for body, sign in zip(bodies, row):
+                if body == ascendant:
+                    continue
+                planets[body] = ZODIAC_SIGNS[sign]
+                house_planets[(sign - asc_sign) % 12].append(body)
+            charts[varga] = {
+                "name": VARGA_NAMES[varga],
+                "ascendant": ZODIAC_SIGNS[asc_sign],
+                "planets": planets,
+                "houses": [
+                    {
+                        "house": f"{i+1}st",
+                        "sign": ZODIAC_SIGNS[(asc_sign + i) % 12],
+                        "planets": ", ".join(house_planets[i])
+                    }
+                    for i in range(12)
+                ]
+            }
+        return charts
+    except Exception as e:
+        logger.error(f"Error calculating vargas: {str(e)}")
+        raise
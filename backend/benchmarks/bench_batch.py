@@ -0,0 +1,59 @@
+"""
+Compare calculate_d1_charts_batch against calling calculate_d1_chart once per
+record.
+
+The per-record loop is slow enough that it is timed on a sample of the
+records and extrapolated to the full batch size.
+
+    python -m benchmarks.bench_batch --records 10000 --sample 200
+"""
+import argparse
+import logging
+import random
+import time
+
+from astrology.charts import calculate_d1_chart
+from astrology.batch import calculate_d1_charts_batch
+
+
+def make_records(count: int, seed: int = 42, first_year: int = 1900, last_year: int = 2099):
+    rng = random.Random(seed)
+    dobs, tobs, lats, lons = [], [], [], []
+    for _ in range(count):
+        dobs.append(f"{rng.randint(first_year, last_year):04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+        tobs.append(f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}")
+        lats.append(round(rng.uniform(-45.0, 60.0), 4))
+        lons.append(round(rng.uniform(-120.0, 150.0), 4))
+    return dobs, tobs, lats, lons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=200, help="records timed through the per-record loop")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    dobs, tobs, lats, lons = make_records(args.records)
+
+    sample = min(args.sample, args.records)
+    start = time.perf_counter()
+    for i in range(sample):
+        calculate_d1_chart("bench", dobs[i], tobs[i], lats[i], lons[i])
+    per_record = (time.perf_counter() - start) / sample
+    loop_estimate = per_record * args.records
+
+    start = time.perf_counter()
+    calculate_d1_charts_batch(dobs, tobs, lats, lons)
+    batch_time = time.perf_counter() - start
+
+    print(f"records:              {args.records}")
+    print(f"per-record loop:      {per_record * 1e3:.3f} ms/chart "
+          f"(~{loop_estimate:.2f} s for all records, timed on {sample})")
+    print(f"batch:                {batch_time:.3f} s "
+          f"({batch_time / args.records * 1e6:.1f} us/chart, {args.records / batch_time:,.0f} charts/s)")
+    print(f"speedup:              {loop_estimate / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Memory and serialization cost of the compact Chart model against the nested
+dicts calculate_d1_chart used to carry through the cache and pipeline.
+
+Bytes per chart are measured with tracemalloc over a list of charts held in
+memory, plus the pickled size (what a chart worker sends back) and the size
+of the SQLite cache entry. Serialization is the /charts edge: the old path
+validates the dict into ChartResponse and runs jsonable_encoder and
+json.dumps, the new one calls json.dumps(chart.to_response(...)).
+
+    python -m benchmarks.bench_chart_model --charts 2000
+"""
+import argparse
+import json
+import logging
+import pickle
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from astrology.chart_model import compute_chart
+from astrology.models import ChartResponse
+from benchmarks.bench_batch import make_records
+
+
+def _held_bytes(build) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held / len(objects)
+
+
+def _per_chart(func, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def _old_response(chart_dict) -> str:
+    return json.dumps(jsonable_encoder(ChartResponse.model_validate(chart_dict)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    dobs, tobs, lats, lons = make_records(args.charts)
+    charts = [compute_chart(dobs[i], tobs[i], lats[i], lons[i]) for i in range(args.charts)]
+    states = [chart.to_state() for chart in charts]
+
+    # Cached dicts as the old cache tier stored them (without name and dasha)
+    dict_bytes = _held_bytes(lambda: [
+        {field: value for field, value in chart.to_dict("Bench").items() if field not in ("name", "dasha")}
+        for chart in charts
+    ])
+    chart_bytes = _held_bytes(lambda: [type(chart).from_state(state) for chart, state in zip(charts, states)])
+
+    dicts = [chart.to_dict("Bench") for chart in charts]
+    # Births with no current maha dasha do not validate as a ChartResponse
+    timed = [i for i, chart_dict in enumerate(dicts) if chart_dict["dasha"]["current_maha_dasha"] is not None]
+    dict_pickle = sum(len(pickle.dumps(chart_dict)) for chart_dict in dicts) / args.charts
+    chart_pickle = sum(len(pickle.dumps(chart)) for chart in charts) / args.charts
+    dict_json = sum(len(json.dumps(chart_dict)) for chart_dict in dicts) / args.charts
+    state_json = sum(len(json.dumps(state)) for state in states) / args.charts
+
+    old = _per_chart(_old_response, [dicts[i] for i in timed])
+    new = _per_chart(lambda chart: json.dumps(chart.to_response("Bench")), [charts[i] for i in timed])
+    assert all(_old_response(dicts[i]) == json.dumps(charts[i].to_response("Bench")) for i in timed[:50])
+
+    print(f"charts:                          {args.charts}")
+    print(f"bytes per chart, in memory:      dict {dict_bytes:8.0f}   Chart {chart_bytes:8.0f}  ({dict_bytes / chart_bytes:.1f}x)")
+    print(f"bytes per chart, pickled:        dict {dict_pickle:8.0f}   Chart {chart_pickle:8.0f}  ({dict_pickle / chart_pickle:.1f}x)")
+    print(f"bytes per chart, cache JSON:     dict {dict_json:8.0f}   Chart {state_json:8.0f}  ({dict_json / state_json:.1f}x)")
+    print(f"/charts serialization:           old {old * 1e6:8.1f} us   new {new * 1e6:8.1f} us  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
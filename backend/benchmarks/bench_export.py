@@ -0,0 +1,84 @@
+"""
+Rows per second and bytes per row of the columnar chart export against JSON.
+
+The chart computation is timed once (calculate_d1_charts_batch over the
+chunks); each format then encodes the same precomputed chunks, so the
+rows/s columns compare serialization alone. The JSON baseline is what
+copying through /charts costs: compute_chart(...).to_response() serialized
+per record, timed on a sample.
+
+    python -m benchmarks.bench_export --records 100000 --chunk-size 10000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from astrology.chart_model import compute_chart
+from astrology.export import chart_columns, chunked, open_writer
+from benchmarks.bench_batch import make_records
+
+# (label, format, compression)
+CASES = [
+    ("arrow", "arrow", None),
+    ("arrow + zstd", "arrow", "zstd"),
+    ("parquet (snappy)", "parquet", None),
+    ("parquet + zstd", "parquet", "zstd"),
+    ("jsonl columns", "jsonl", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--json-sample", type=int, default=500, help="records serialized through /charts JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    dobs, tobs, lats, lons = make_records(args.records)
+    records = [
+        {"id": str(i), "dob": dobs[i], "tob": tobs[i], "latitude": lats[i], "longitude": lons[i]}
+        for i in range(args.records)
+    ]
+
+    # Load the timezone polygons and ephemeris before timing
+    chart_columns(records[:100])
+
+    start = time.perf_counter()
+    chunks = [chart_columns(chunk) for chunk in chunked(records, args.chunk_size)]
+    compute = args.records / (time.perf_counter() - start)
+
+    print(f"records: {args.records}, chunk size {args.chunk_size}")
+    print(f"{'batch compute':<20} {compute:12,.0f} rows/s")
+    print(f"{'format':<20} {'encode rows/s':>19} {'bytes/row':>12} {'end-to-end rows/s':>20}")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, fmt, compression in CASES:
+            path = os.path.join(directory, f"charts.{fmt}")
+            start = time.perf_counter()
+            writer = open_writer(path, fmt, compression)
+            for columns in chunks:
+                writer.write(columns)
+            writer.close()
+            encode = args.records / (time.perf_counter() - start)
+            end_to_end = 1 / (1 / compute + 1 / encode)
+            size = os.path.getsize(path)
+            print(f"{label:<20} {encode:19,.0f} {size / args.records:12.1f} {end_to_end:20,.0f}")
+
+    sample = records[:min(args.json_sample, args.records)]
+    charts = [compute_chart(record["dob"], record["tob"], record["latitude"], record["longitude"]) for record in sample]
+    start = time.perf_counter()
+    size = sum(len(json.dumps(chart.to_response(record["id"]))) + 1 for chart, record in zip(charts, sample))
+    encode = len(sample) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for record in sample:
+        compute_chart(record["dob"], record["tob"], record["latitude"], record["longitude"])
+    chart_compute = len(sample) / (time.perf_counter() - start)
+    end_to_end = 1 / (1 / chart_compute + 1 / encode)
+    print(f"{'/charts JSON':<20} {encode:19,.0f} {size / len(sample):12.1f} {end_to_end:20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
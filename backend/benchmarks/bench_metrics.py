@@ -0,0 +1,63 @@
+"""
+Overhead of the per-stage timers on the chart-only path.
+
+Each round computes compute_chart(...).to_response() for the same records
+inside a collect_stage_timings() block per chart, as a request does, once
+with the timers on and once with METRICS_ENABLED switched off; the order
+alternates between rounds so drift affects both sides alike. Reported is
+the best round of each and the relative overhead, which should stay under
+--max-overhead.
+
+    python -m benchmarks.bench_metrics --charts 2000 --rounds 7
+"""
+import argparse
+import logging
+import sys
+import time
+
+from astrology import metrics
+from astrology.chart_model import compute_chart
+from benchmarks.bench_batch import make_records
+
+
+def _round(records) -> float:
+    start = time.perf_counter()
+    for dob, tob, lat, lon in records:
+        with metrics.collect_stage_timings():
+            compute_chart(dob, tob, lat, lon).to_response("bench")
+    return (time.perf_counter() - start) / len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--max-overhead", type=float, default=1.0, help="percent")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    records = list(zip(*make_records(args.charts)))
+    _round(records[:200])
+
+    timings = {True: [], False: []}
+    for i in range(args.rounds):
+        for enabled in ((False, True) if i % 2 else (True, False)):
+            metrics.METRICS_ENABLED = enabled
+            timings[enabled].append(_round(records))
+    metrics.METRICS_ENABLED = True
+
+    off, on = min(timings[False]), min(timings[True])
+    overhead = (on - off) / off * 100
+    print(f"charts: {args.charts}, rounds: {args.rounds}")
+    print(f"timers off: {off * 1e6:8.1f} us/chart")
+    print(f"timers on:  {on * 1e6:8.1f} us/chart")
+    print(f"overhead:   {overhead:8.2f} % (limit {args.max_overhead:.1f} %)")
+    stages = metrics.get_metrics().snapshot()
+    for stage, histogram in sorted(stages.items()):
+        print(f"  {stage:<10} {histogram.sum / histogram.count * 1e6:8.1f} us mean over {histogram.count} charts")
+    if overhead > args.max_overhead:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
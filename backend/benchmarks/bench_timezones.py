@@ -0,0 +1,78 @@
+"""
+Cost of timezone resolution per chart: a new TimezoneFinder for every call
+(what convert_to_utc used to do) against the shared TimezoneResolver, and
+resolve_many over a batch of coordinates.
+
+    python -m benchmarks.bench_timezones --charts 2000 --sample 20
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+
+import pytz
+from timezonefinder import TimezoneFinder
+
+from astrology.charts import convert_to_utc
+from astrology.timezones import TimezoneResolver, get_timezone_resolver
+from benchmarks.bench_batch import make_records
+
+
+def convert_with_new_finder(dt_local: datetime, latitude: float, longitude: float) -> datetime:
+    """convert_to_utc as it was before the shared resolver."""
+    tf = TimezoneFinder()
+    timezone_str = tf.timezone_at(lat=latitude, lng=longitude)
+    return pytz.timezone(timezone_str).localize(dt_local).astimezone(pytz.UTC)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=20, help="charts timed with a new TimezoneFinder each")
+    parser.add_argument("--in-memory", action="store_true", help="load the polygon data into memory")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    dobs, tobs, lats, lons = make_records(args.charts)
+    local_times = [datetime.strptime(f"{d} {t}", "%Y-%m-%d %H:%M") for d, t in zip(dobs, tobs)]
+
+    sample = min(args.sample, args.charts)
+    start = time.perf_counter()
+    for i in range(sample):
+        convert_with_new_finder(local_times[i], lats[i], lons[i])
+    before = (time.perf_counter() - start) / sample
+
+    start = time.perf_counter()
+    resolver = TimezoneResolver(in_memory=args.in_memory)
+    startup = time.perf_counter() - start
+
+    get_timezone_resolver()
+    start = time.perf_counter()
+    for i in range(args.charts):
+        convert_to_utc(local_times[i], lats[i], lons[i])
+    cold = (time.perf_counter() - start) / args.charts
+
+    # Grid cells are checked and cached on their second visit
+    for i in range(args.charts):
+        convert_to_utc(local_times[i], lats[i], lons[i])
+
+    start = time.perf_counter()
+    for i in range(args.charts):
+        convert_to_utc(local_times[i], lats[i], lons[i])
+    warm = (time.perf_counter() - start) / args.charts
+
+    start = time.perf_counter()
+    resolver.resolve_many(lats, lons)
+    bulk = (time.perf_counter() - start) / args.charts
+
+    print(f"charts:                         {args.charts}")
+    print(f"new TimezoneFinder per chart:   {before * 1e3:10.3f} ms/chart")
+    print(f"resolver startup (one-off):     {startup * 1e3:10.3f} ms")
+    print(f"shared resolver, cold grid:     {cold * 1e3:10.3f} ms/chart")
+    print(f"shared resolver, warm grid:     {warm * 1e3:10.3f} ms/chart")
+    print(f"resolve_many, cold grid:        {bulk * 1e3:10.3f} ms/chart")
+    print(f"speedup (cold / warm):          {before / cold:10.0f}x / {before / warm:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
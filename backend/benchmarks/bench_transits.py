@@ -0,0 +1,72 @@
+"""
+Transit search over a long window for every body, with each position
+source, and the agreement of event times between them.
+
+    python -m benchmarks.bench_transits --years 100
+    python -m benchmarks.bench_transits --years 100 --engine table
+"""
+import argparse
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+
+from astrology.dasha import datetime_to_jd
+from astrology.ephemeris import count_ephemeris_calls
+from astrology.transits import find_transit_events
+
+
+def run(engine: str, jd_start: float, jd_end: float):
+    with count_ephemeris_calls() as counter:
+        start = time.perf_counter()
+        events = find_transit_events(jd_start, jd_end, engine=engine)
+        elapsed = time.perf_counter() - start
+    return events, elapsed, counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start-year", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--engine", choices=["table", "swisseph", "both"], default="both")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    jd_start = datetime_to_jd(datetime(args.start_year, 1, 1))
+    jd_end = datetime_to_jd(datetime(args.start_year + args.years, 1, 1))
+    engines = ["table", "swisseph"] if args.engine == "both" else [args.engine]
+
+    results = {}
+    for engine in engines:
+        try:
+            events, elapsed, counter = run(engine, jd_start, jd_end)
+        except ValueError as e:
+            print(f"{engine}: {e}")
+            continue
+        results[engine] = events
+        print(f"{engine:9} {args.years} years: {elapsed:8.3f} s  {len(events)} events  "
+              f"{counter.calls} swisseph calls  {counter.table_lookups} table lookups  "
+              f"({elapsed / len(events) * 1e6:.1f} us/event)")
+
+    if results:
+        events = next(iter(results.values()))
+        for (body, event), count in sorted(Counter((e.body, e.event) for e in events).items()):
+            print(f"  {body:8} {event:20} {count:7}")
+
+    if len(results) == 2:
+        def key(e):
+            return (e.body, e.event, e.natal_point, e.jd)
+        table, live = sorted(results["table"], key=key), sorted(results["swisseph"], key=key)
+        if len(table) != len(live):
+            print(f"event counts differ: table {len(table)}, swisseph {len(live)}")
+        else:
+            worst = Counter()
+            for a, b in zip(table, live):
+                kind = "station" if a.event.startswith("station") else "crossing"
+                worst[kind] = max(worst[kind], abs(a.jd - b.jd) * 86400)
+            for kind, seconds in sorted(worst.items()):
+                print(f"max table/swisseph difference ({kind}): {seconds:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
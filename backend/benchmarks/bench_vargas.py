@@ -0,0 +1,58 @@
+"""
+Cost of divisional charts on top of the D1: all 16 vargas and a D9/D10
+pair per chart, and varga_signs over a whole batch of charts at once.
+
+    python -m benchmarks.bench_vargas --charts 2000
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from astrology.charts import calculate_d1_chart
+from astrology.vargas import VARGAS, calculate_vargas, varga_signs
+from benchmarks.bench_batch import make_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=2000)
+    parser.add_argument("--d1-sample", type=int, default=200, help="charts computed in full for the D1 baseline")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    dobs, tobs, lats, lons = make_records(args.charts)
+
+    sample = min(args.d1_sample, args.charts)
+    start = time.perf_counter()
+    charts = [calculate_d1_chart("Bench", dobs[i], tobs[i], lats[i], lons[i]) for i in range(sample)]
+    d1 = (time.perf_counter() - start) / sample
+
+    # Reuse the sampled longitudes to fill the rest of the batch
+    longitudes = [charts[i % sample]["longitudes"] for i in range(args.charts)]
+
+    start = time.perf_counter()
+    for chart_longitudes in longitudes:
+        calculate_vargas(chart_longitudes, ["D9", "D10"])
+    pair = (time.perf_counter() - start) / args.charts
+
+    start = time.perf_counter()
+    for chart_longitudes in longitudes:
+        calculate_vargas(chart_longitudes)
+    every = (time.perf_counter() - start) / args.charts
+
+    matrix = np.array([list(chart_longitudes.values()) for chart_longitudes in longitudes])
+    start = time.perf_counter()
+    signs = varga_signs(matrix)
+    bulk = (time.perf_counter() - start) / args.charts
+
+    print(f"charts:                          {args.charts} ({matrix.shape[1]} points each)")
+    print(f"D1 chart (baseline):             {d1 * 1e3:10.3f} ms/chart")
+    print(f"D9 + D10 charts:                 {pair * 1e3:10.3f} ms/chart  ({pair / d1:.1%} of the D1)")
+    print(f"all {len(VARGAS)} vargas:                   {every * 1e3:10.3f} ms/chart  ({every / d1:.1%} of the D1)")
+    print(f"varga_signs, whole batch:        {bulk * 1e6:10.3f} us/chart  (sign array {signs.shape})")
+
+
+if __name__ == "__main__":
+    main()
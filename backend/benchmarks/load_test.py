@@ -0,0 +1,87 @@
+"""
+Load test for the request pipeline: /charts throughput and latency as the
+number of chart worker processes grows.
+
+Requests are sent through the ASGI app in-process with httpx, so the numbers
+include routing, validation and serialization but no network. Every request
+has distinct birth data so the chart cache never hits, and the location is
+registered in the gazetteer so geocoding stays local.
+
+    python -m benchmarks.load_test --workers 0 1 2 4 --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from astrology.geocoding import get_gazetteer
+from astrology.pipeline import configure_pipeline
+from benchmarks.bench_batch import make_records
+
+LOCATION = "Load Test City"
+
+
+async def run_load(app, count: int, concurrency: int, seed: int):
+    # Births whose 120-year dasha cycle is still running
+    dobs, tobs, _, _ = make_records(count, seed=seed, first_year=1950, last_year=2015)
+    queue = asyncio.Queue()
+    for i in range(count):
+        queue.put_nowait(i)
+    latencies = []
+    errors = 0
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post("/api/v1/charts", json={
+                "name": f"load-{i}", "dob": dobs[i], "tob": tobs[i], "location": LOCATION
+            })
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies, errors
+
+
+async def main_async(args):
+    from run_api import app
+
+    get_gazetteer().add(LOCATION, 28.6139, 77.209, "Asia/Kolkata")
+    print(f"{'workers':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for seed, workers in enumerate(args.workers):
+        pipeline = configure_pipeline(chart_workers=workers)
+        await pipeline.warm_up()
+        elapsed, latencies, errors = await run_load(app, args.requests, args.concurrency, seed)
+        p50 = latencies[len(latencies) // 2] * 1e3
+        p95 = latencies[int(len(latencies) * 0.95)] * 1e3
+        print(f"{workers:>8} {args.requests / elapsed:>9.1f} {p50:>9.1f} {p95:>9.1f} {errors:>7}")
+        pipeline.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEOCODER_FALLBACK", "none")
+    os.environ.setdefault("CHART_WORKER_LOG_LEVEL", "WARNING")
+    logging.disable(logging.INFO)
+    print(f"cpus: {os.cpu_count()}")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Benchmark suite for the astrology core, with JSON results and regression
+gating against a stored baseline.
+
+    python -m benchmarks.suite run --out results.json [--cases d1_chart dasha ...] [--quick]
+    python -m benchmarks.suite compare baseline.json results.json [--threshold 10]
+    python -m benchmarks.suite list
+
+run times each case and writes one JSON document: the machine, the git
+commit and, per case, the median seconds per operation over the repeats
+(with min, max and the operation count). With --baseline it compares the
+new results straight away. compare exits non-zero when any case present
+in both files got slower than the baseline by more than --threshold
+percent; results are only comparable on the same machine.
+
+Cases:
+    d1_chart            calculate_d1_chart, one call per record
+    planet_strengths    calculate_planet_strengths
+    shadbala            snapshot_shadbala for one chart's snapshot (budget: 2 ms)
+    ashtakavarga        ashtakavarga (all 8 tables) for one chart's sign indices
+    vimshottari_dasha   calculate_vimshottari_dasha
+    nakshatra_pada      get_nakshatra_pada
+    convert_to_utc      convert_to_utc
+    panchanga_year      panchanga_days for a whole year at one place, sunrise cache cleared
+    charts_endpoint     POST /charts end to end, sequential
+    report_endpoint     POST /generate-report end to end with the LLM stubbed
+    bulk_1k, bulk_100k  calculate_d1_charts_batch over 1k / 100k records
+    http_concurrent     POST /charts under concurrent load (see load_test.py)
+
+HTTP cases run the ASGI app in-process with httpx. Geocoding is stubbed by
+a gazetteer entry with the Nominatim fallback off, the LLM by a function
+returning a fixed text, and every request has distinct birth data so the
+chart and report caches never hit. Charts run in the pipeline's thread pool
+(--chart-workers 0) unless told otherwise.
+
+Configuration:
+    BENCH_REGRESSION_THRESHOLD   default --threshold, in percent
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "10"))
+RESULTS_VERSION = 1
+LOCATION = "Benchmark City"
+STUB_REPORT = "Benchmark report text."
+
+
+def _summary(per_op: List[float], ops: int, **extra) -> Dict[str, Any]:
+    return dict(seconds=statistics.median(per_op), min=min(per_op), max=max(per_op),
+                repeats=len(per_op), ops=ops, **extra)
+
+
+def _measure(func: Callable[..., Any], inputs: Sequence[tuple], repeats: int) -> Dict[str, Any]:
+    """Seconds per call of func over inputs, one sample per repeat."""
+    func(*inputs[0])
+    per_op = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in inputs:
+            func(*item)
+        per_op.append((time.perf_counter() - start) / len(inputs))
+    return _summary(per_op, len(inputs))
+
+
+def _records(count: int, seed: int = 42):
+    from benchmarks.bench_batch import make_records
+    # Births whose 120-year dasha cycle is still running
+    return list(zip(*make_records(count, seed=seed, first_year=1950, last_year=2015)))
+
+
+# --- Function cases ---
+
+def bench_d1_chart(args) -> Dict[str, Any]:
+    from astrology.charts import calculate_d1_chart
+    inputs = [("bench",) + record for record in _records(args.records)]
+    return _measure(calculate_d1_chart, inputs, args.repeats)
+
+
+def bench_planet_strengths(args) -> Dict[str, Any]:
+    from astrology.charts import birth_julian_day, calculate_planet_strengths
+    inputs = [(birth_julian_day(*record), record[2], record[3]) for record in _records(args.records)]
+    return _measure(calculate_planet_strengths, inputs, args.repeats)
+
+
+def bench_shadbala(args) -> Dict[str, Any]:
+    from astrology.shadbala import _sample_inputs, snapshot_shadbala
+    return _measure(snapshot_shadbala, _sample_inputs(args.records), args.repeats)
+
+
+def bench_ashtakavarga(args) -> Dict[str, Any]:
+    from astrology.ashtakavarga import _random_signs, ashtakavarga
+    inputs = [(row,) for row in _random_signs(args.records * 20).tolist()]
+    return _measure(ashtakavarga, inputs, args.repeats)
+
+
+def bench_vimshottari_dasha(args) -> Dict[str, Any]:
+    from astrology.chart_model import compute_chart
+    from astrology.charts import calculate_vimshottari_dasha
+    inputs = [(compute_chart(*record).longitude('Moon'), record[0]) for record in _records(args.records)]
+    return _measure(calculate_vimshottari_dasha, inputs, args.repeats)
+
+
+def bench_nakshatra_pada(args) -> Dict[str, Any]:
+    from astrology.charts import get_nakshatra_pada
+    count = args.records * 20
+    inputs = [(i * 360.0 / count,) for i in range(count)]
+    return _measure(get_nakshatra_pada, inputs, args.repeats)
+
+
+def bench_convert_to_utc(args) -> Dict[str, Any]:
+    from astrology.charts import convert_to_utc
+    inputs = [
+        (datetime.strptime(f"{dob} {tob}", "%Y-%m-%d %H:%M"), lat, lon)
+        for dob, tob, lat, lon in _records(args.records)
+    ]
+    return _measure(convert_to_utc, inputs, args.repeats)
+
+
+def bench_panchanga_year(args) -> Dict[str, Any]:
+    from datetime import date
+    from astrology import panchanga
+    from astrology.timezones import get_timezone_resolver
+
+    def year(latitude, longitude, zone):
+        panchanga._cell_sun_times.cache_clear()
+        panchanga.panchanga_days(date(2024, 1, 1), 366, latitude, longitude, zone)
+
+    places = [(lat, lon) for _, _, lat, lon in _records(max(args.records // 50, 3))]
+    inputs = [(lat, lon, get_timezone_resolver().timezone_at(lat, lon) or "UTC") for lat, lon in places]
+    return _measure(year, inputs, args.repeats)
+
+
+def _bench_bulk(count: int, repeats: int) -> Dict[str, Any]:
+    import numpy as np
+    from astrology.batch import calculate_d1_charts_batch
+    dobs, tobs, lats, lons = (list(column) for column in zip(*_records(count)))
+    lats, lons = np.array(lats), np.array(lons)
+    calculate_d1_charts_batch(dobs[:100], tobs[:100], lats[:100], lons[:100])
+    per_op = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        calculate_d1_charts_batch(dobs, tobs, lats, lons)
+        per_op.append((time.perf_counter() - start) / count)
+    return _summary(per_op, count, charts_per_second=1 / statistics.median(per_op))
+
+
+def bench_bulk_1k(args) -> Dict[str, Any]:
+    return _bench_bulk(1000, args.repeats)
+
+
+def bench_bulk_100k(args) -> Dict[str, Any]:
+    return _bench_bulk(10000 if args.quick else 100000, 1)
+
+
+# --- HTTP cases ---
+
+def _app(args):
+    """The API with geocoding and the LLM stubbed and a fresh pipeline."""
+    from astrology import pipeline
+    from astrology.geocoding import get_gazetteer
+    from run_api import app
+
+    get_gazetteer().add(LOCATION, 28.6139, 77.209, "Asia/Kolkata")
+    pipeline.generate_report_text = lambda prompt: STUB_REPORT
+    pipeline.configure_pipeline(chart_workers=args.chart_workers)
+    return app
+
+
+async def _post_all(app, path: str, bodies: List[Dict[str, Any]], concurrency: int):
+    """(elapsed seconds, sorted latencies, errors) for posting every body."""
+    import httpx
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    latencies = []
+    errors = 0
+
+    async def client_loop(client):
+        nonlocal errors
+        while not queue.empty():
+            body = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies, errors
+
+
+def _bench_http(args, path: str, concurrency: int, count: int, repeats: int, seed_base: int) -> Dict[str, Any]:
+    from astrology.pipeline import get_pipeline, stop_pipeline
+    app = _app(args)
+
+    async def run():
+        await get_pipeline().warm_up()
+        per_op, latencies, errors = [], [], 0
+        # A different seed per case and round keeps the caches cold
+        for seed in range(repeats + 1):
+            bodies = [
+                {"name": f"bench-{i}", "dob": dob, "tob": tob, "location": LOCATION}
+                for i, (dob, tob, _, _) in enumerate(_records(count if seed else concurrency, seed=seed_base + seed))
+            ]
+            elapsed, round_latencies, round_errors = await _post_all(app, path, bodies, concurrency)
+            if seed:
+                per_op.append(elapsed / count)
+                latencies += round_latencies
+                errors += round_errors
+        return per_op, sorted(latencies), errors
+
+    try:
+        per_op, latencies, errors = asyncio.run(run())
+    finally:
+        stop_pipeline()
+    if errors:
+        raise RuntimeError(f"{errors} of {count * repeats} requests to {path} failed")
+    return _summary(per_op, count, concurrency=concurrency, requests_per_second=1 / statistics.median(per_op),
+                    p50_ms=latencies[len(latencies) // 2] * 1e3, p95_ms=latencies[int(len(latencies) * 0.95)] * 1e3)
+
+
+def bench_charts_endpoint(args) -> Dict[str, Any]:
+    return _bench_http(args, "/api/v1/charts", 1, args.requests, args.repeats, seed_base=1000)
+
+
+def bench_report_endpoint(args) -> Dict[str, Any]:
+    return _bench_http(args, "/api/v1/generate-report", 1, args.requests, args.repeats, seed_base=2000)
+
+
+def bench_http_concurrent(args) -> Dict[str, Any]:
+    return _bench_http(args, "/api/v1/charts", args.concurrency, args.requests * 2, args.repeats, seed_base=3000)
+
+
+CASES: Dict[str, Callable[[Any], Dict[str, Any]]] = {
+    "d1_chart": bench_d1_chart,
+    "planet_strengths": bench_planet_strengths,
+    "shadbala": bench_shadbala,
+    "ashtakavarga": bench_ashtakavarga,
+    "vimshottari_dasha": bench_vimshottari_dasha,
+    "nakshatra_pada": bench_nakshatra_pada,
+    "convert_to_utc": bench_convert_to_utc,
+    "panchanga_year": bench_panchanga_year,
+    "charts_endpoint": bench_charts_endpoint,
+    "report_endpoint": bench_report_endpoint,
+    "bulk_1k": bench_bulk_1k,
+    "bulk_100k": bench_bulk_100k,
+    "http_concurrent": bench_http_concurrent,
+}
+
+
+# --- Results ---
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_suite(args) -> Dict[str, Any]:
+    """Run the selected cases and return the results document."""
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "cpus": os.cpu_count(),
+        "settings": {"records": args.records, "requests": args.requests, "repeats": args.repeats,
+                     "concurrency": args.concurrency, "chart_workers": args.chart_workers, "quick": args.quick},
+        "cases": {},
+    }
+    for name in args.cases:
+        started = time.perf_counter()
+        result = CASES[name](args)
+        results["cases"][name] = result
+        print(f"{name:<18} {_format_seconds(result['seconds']):>12}/op  "
+              f"(min {_format_seconds(result['min'])}, {result['ops']} ops x {result['repeats']}, "
+              f"{time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    return results
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print a comparison table and return the names of the cases that regressed."""
+    regressions = []
+    print(f"{'case':<18} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(baseline["cases"]) | set(current["cases"])):
+        if name not in baseline["cases"] or name not in current["cases"]:
+            where = "baseline" if name not in baseline["cases"] else "current run"
+            print(f"{name:<18} {'':>12} {'':>12} {'':>9}  not in the {where}")
+            continue
+        before = baseline["cases"][name]["seconds"]
+        after = current["cases"][name]["seconds"]
+        change = (after / before - 1) * 100
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<18} {_format_seconds(before):>12} {_format_seconds(after):>12} {change:>+8.1f}%{flag}")
+    if baseline.get("machine") != current.get("machine") or baseline.get("cpus") != current.get("cpus"):
+        print("warning: the results come from different machines", file=sys.stderr)
+    return regressions
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} has results version {results.get('version')}, expected {RESULTS_VERSION}")
+    return results
+
+
+def _gate(regressions: List[str], threshold: float) -> None:
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {threshold:g}%: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+    print(f"no regressions over {threshold:g}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the suite and write JSON results")
+    run.add_argument("--out", default="-", help="results file (default stdout)")
+    run.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    run.add_argument("--records", type=int, default=500, help="inputs per function case")
+    run.add_argument("--requests", type=int, default=200, help="requests per HTTP round")
+    run.add_argument("--repeats", type=int, default=5)
+    run.add_argument("--concurrency", type=int, default=32)
+    run.add_argument("--chart-workers", type=int, default=0)
+    run.add_argument("--quick", action="store_true", help="a smaller run for CI smoke checks")
+    run.add_argument("--baseline", help="compare against this results file when done")
+    run.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="percent")
+    compare = commands.add_parser("compare", help="compare results against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="percent")
+    commands.add_parser("list", help="list the cases")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print("\n".join(CASES))
+        return
+    if args.command == "compare":
+        _gate(compare_results(_load(args.baseline), _load(args.current), args.threshold), args.threshold)
+        return
+
+    if args.quick:
+        args.records, args.requests, args.repeats = args.records // 5, args.requests // 4, 3
+    os.environ.setdefault("GEOCODER_FALLBACK", "none")
+    logging.disable(logging.INFO)
+    results = run_suite(args)
+    document = json.dumps(results, indent=2)
+    if args.out == "-":
+        print(document)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+    if args.baseline:
+        _gate(compare_results(_load(args.baseline), results, args.threshold), args.threshold)
+
+
+if __name__ == "__main__":
+    main()
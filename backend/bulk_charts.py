@@ -0,0 +1,56 @@
+"""
+Compute D1 charts for a stream of birth records and write them as JSON Lines.
+
+    python bulk_charts.py births.csv -o charts.jsonl --workers 8
+    cat births.jsonl | python bulk_charts.py - > charts.jsonl
+
+Input is CSV (with a header) or JSON Lines, from a file or stdin, with
+dob, tob, an optional id and name, and either latitude/longitude or a
+location to geocode. Output lines are in input order; progress goes to
+stderr. See astrology/bulk.py.
+"""
+import argparse
+import logging
+import os
+import sys
+
+
+def main():
+    # Keep stdout for the JSON lines only: anything else printed, by this
+    # process or by the workers that inherit its descriptors, goes to stderr.
+    # This has to happen before the astrology modules are imported.
+    stdout = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    from astrology.bulk import BULK_CHUNK_SIZE, BULK_LOG_LEVEL, BULK_WINDOW, run_bulk
+    from astrology.export import read_birth_records
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or JSON Lines birth records (- for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output JSON Lines file (default: stdout)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU, 0 runs in-process)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="records per worker task")
+    parser.add_argument("--window", type=int, default=BULK_WINDOW, help="pending chunks per worker")
+    parser.add_argument("--quiet", action="store_true", help="no progress reports")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # charts.py configures INFO logging on import; with --workers 0 the
+    # charts are computed here and would log every record
+    logging.getLogger("astrology").setLevel(BULK_LOG_LEVEL)
+
+    def report(line):
+        print(line, file=sys.stderr, flush=True)
+
+    out = stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        progress = run_bulk(read_birth_records(args.input), out, args.workers, args.chunk_size,
+                            args.window, None if args.quiet else report)
+    finally:
+        out.close()
+    report(f"Done: {progress.summary()}")
+
+
+if __name__ == "__main__":
+    main()
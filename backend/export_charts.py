@@ -0,0 +1,49 @@
+"""
+Export D1 charts for a file of birth records as Arrow IPC, Parquet or JSON Lines.
+
+    python export_charts.py births.csv charts.parquet
+    python export_charts.py births.jsonl charts.arrow --chunk-size 50000 --compression zstd
+
+Input is CSV (with a header) or JSON Lines with dob, tob, latitude,
+longitude and an optional id. The format follows the output extension
+(.arrow/.feather/.ipc, .parquet, .jsonl) unless --format is given. See
+astrology/export.py for the columns.
+"""
+import argparse
+import logging
+import sys
+import time
+
+from astrology.export import (EXPORT_CHUNK_SIZE, EXPORT_COMPRESSION, EXPORT_FORMATS, check_compression,
+                              export_charts, format_for_path, read_birth_records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or JSON Lines birth records (- for stdin)")
+    parser.add_argument("output", help="output file")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="output format (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="records computed and written at a time")
+    parser.add_argument("--compression", choices=sorted(set().union(*EXPORT_COMPRESSION.values())),
+                        help="column compression: none, lz4 or zstd for Arrow (default none); "
+                             "also snappy or gzip for Parquet (default snappy)")
+    args = parser.parse_args()
+    try:
+        check_compression(args.format or format_for_path(args.output), args.compression)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.WARNING)
+    start = time.perf_counter()
+
+    def progress(rows):
+        elapsed = time.perf_counter() - start
+        print(f"\r{rows} rows  {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    rows = export_charts(read_birth_records(args.input), args.output, args.format,
+                         args.chunk_size, args.compression, progress)
+    print(f"\rWrote {rows} rows to {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,24 @@
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from astrology.api import router as astrology_router
+from astrology.charts import EPHEMERIS_VALIDATION, validate_ephemeris_path
+from astrology.geocoding import preload_gazetteer
+from astrology.lagna import preload_lagna_tables
+from astrology.metrics import ServerTimingMiddleware
+from astrology.timezones import preload_timezone_resolver
+from astrology.pipeline import start_pipeline, stop_pipeline
+from astrology.transit_calendar import preload_transit_calendar
+
+logger = logging.getLogger(__name__)
+
+# "background" (default) starts serving at once and warms up behind it,
+# "blocking" finishes the warm-up before the first request, "off" skips it
+# and loads everything on first use
+STARTUP_PRELOAD = os.getenv('STARTUP_PRELOAD', 'background').lower()
 
 app = FastAPI(title="Vedic AI API")
 
@@ -20,6 +38,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-stage timings of every request: Server-Timing header and /api/v1/metrics
+app.add_middleware(ServerTimingMiddleware)
+
+async def _warm_up():
+    """Load the gazetteer, timezone polygons, transit calendar and lagna tables and start the chart workers."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, preload_gazetteer)
+    await loop.run_in_executor(None, preload_timezone_resolver)
+    await loop.run_in_executor(None, preload_transit_calendar)
+    await loop.run_in_executor(None, preload_lagna_tables)
+    await start_pipeline()
+
+
+def _warm_up_done(task: "asyncio.Task") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Startup warm-up failed: {str(task.exception())}")
+
+
+@app.on_event("startup")
+async def preload_resources():
+    # A directory listing, cached per process: a missing ephemeris still stops the server
+    if EPHEMERIS_VALIDATION == 'startup':
+        validate_ephemeris_path()
+    if STARTUP_PRELOAD == 'blocking':
+        await _warm_up()
+    elif STARTUP_PRELOAD == 'background':
+        app.state.warm_up = asyncio.create_task(_warm_up())
+        app.state.warm_up.add_done_callback(_warm_up_done)
+
+@app.on_event("shutdown")
+async def release_resources():
+    warm_up = getattr(app.state, "warm_up", None)
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    stop_pipeline()
+
 # Include routers
 app.include_router(astrology_router, prefix="/api/v1")
 
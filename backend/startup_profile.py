@@ -0,0 +1,115 @@
+"""
+Cold-start profile of the backend.
+
+    python startup_profile.py imports [--module run_api] [--top 25]
+    python startup_profile.py health [--runs 5] [--target-ms 1000]
+
+imports runs a fresh interpreter with -X importtime and reports the total
+import time of the module and the slowest imports (cumulative and self).
+health starts uvicorn on run_api:app in a subprocess, as a deployment
+would, and measures the time from process start to the first 200 from
+/api/v1/health; it exits non-zero when the median is over --target-ms.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+HEALTH_PATH = "/api/v1/health"
+HEALTH_TARGET_MS = float(os.getenv("HEALTH_TARGET_MS", "1000"))
+
+
+def import_times(module: str):
+    """(total microseconds, [(self us, cumulative us, name)]) for importing module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(own), int(cumulative), name.rstrip()))
+    total = next(cumulative for own, cumulative, name in reversed(rows) if name.strip() == module)
+    return total, rows
+
+
+def _print_imports(module: str, top: int) -> None:
+    total, rows = import_times(module)
+    print(f"import {module}: {total / 1e3:.0f} ms ({len(rows)} modules)\n")
+    print(f"slowest by cumulative time (ms):")
+    for own, cumulative, name in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"  {cumulative / 1e3:8.1f}  {name}")
+    print(f"\nslowest by self time (ms):")
+    for own, cumulative, name in sorted(rows, key=lambda row: -row[0])[:top]:
+        print(f"  {own / 1e3:8.1f}  {name.strip()}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_health(timeout: float = 60.0) -> float:
+    """Seconds from starting uvicorn to the first successful /health response."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{HEALTH_PATH}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "run_api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"No response from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports = commands.add_parser("imports", help="import time report")
+    imports.add_argument("--module", default="run_api")
+    imports.add_argument("--top", type=int, default=25)
+    health = commands.add_parser("health", help="time to the first /health response")
+    health.add_argument("--runs", type=int, default=5)
+    health.add_argument("--target-ms", type=float, default=HEALTH_TARGET_MS)
+    args = parser.parse_args()
+
+    if args.command == "imports":
+        _print_imports(args.module, args.top)
+        return
+
+    times = []
+    for run in range(args.runs):
+        times.append(time_to_health() * 1e3)
+        print(f"run {run + 1}: {times[-1]:.0f} ms to first {HEALTH_PATH}")
+    median = statistics.median(times)
+    verdict = "within" if median <= args.target_ms else "OVER"
+    print(f"median {median:.0f} ms, min {min(times):.0f} ms, max {max(times):.0f} ms "
+          f"({verdict} the {args.target_ms:.0f} ms target)")
+    if median > args.target_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
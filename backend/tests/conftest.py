@@ -0,0 +1,9 @@
+import pytest
+
+from astrology.pipeline import _configure_swisseph
+
+
+@pytest.fixture(autouse=True)
+def swisseph_settings():
+    """Ephemeris path and Lahiri ayanamsa, as the API's threads and workers use."""
+    _configure_swisseph()
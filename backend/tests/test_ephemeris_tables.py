@@ -0,0 +1,12 @@
+from astrology.ephemeris_tables import TABLE_ERROR_BOUND_ARCSEC, EphemerisTable, build_table, verify_table
+
+
+def test_table_error_within_bound_on_random_dates(tmp_path):
+    path = str(tmp_path / "ephemeris_tables.bin")
+    build_table(path, 2000, 2000)
+
+    errors = verify_table(EphemerisTable(path), samples=2000)
+
+    assert errors, "verify_table checked no bodies"
+    for name, error in errors.items():
+        assert error < TABLE_ERROR_BOUND_ARCSEC, f"{name}: {error:.4f}\""
@@ -0,0 +1,27 @@
+import numpy as np
+
+from astrology.lagna import LAGNA_ERROR_BOUND_ARCSEC, lagna_boundaries, verify
+
+
+def test_ascendant_agrees_with_swisseph():
+    errors = verify(samples=20000, max_latitude=66)
+
+    for name, error in errors.items():
+        assert error < LAGNA_ERROR_BOUND_ARCSEC, f"{name}: {error:.4f}\""
+
+
+def test_lagna_boundaries_enter_consecutive_signs():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        jd_start = float(rng.uniform(2415020.5, 2488069.5))
+        latitude = float(rng.uniform(-66.0, 66.0))
+        longitude = float(rng.uniform(-180.0, 180.0))
+
+        sign, boundaries = lagna_boundaries(jd_start, jd_start + 1, latitude, longitude)
+
+        assert len(boundaries) >= 12
+        previous_jd = jd_start
+        for jd, entered in boundaries:
+            assert entered == (sign + 1) % 12, f"skipped a sign at lat {latitude:.2f}, jd {jd:.5f}"
+            assert jd > previous_jd
+            sign, previous_jd = entered, jd
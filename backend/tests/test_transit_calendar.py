@@ -0,0 +1,13 @@
+from astrology.transit_calendar import (VERIFY_STATION_TOLERANCE_SECONDS, VERIFY_TOLERANCE_SECONDS,
+                                        TransitCalendar, build_calendar, verify_calendar)
+
+
+def test_calendar_matches_live_swisseph(tmp_path):
+    path = str(tmp_path / "transit_calendar.bin")
+    assert build_calendar(path, 2020, 2021) > 0
+
+    worst = verify_calendar(TransitCalendar(path), samples=500, windows=1)
+
+    assert worst["crossing_seconds"] < VERIFY_TOLERANCE_SECONDS
+    assert worst["station_seconds"] < VERIFY_STATION_TOLERANCE_SECONDS
+    assert worst["window_mismatches"] == 0